@@ -0,0 +1,138 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import dataclasses
+import hashlib
+import json
+import logging
+from enum import Enum
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def canonical(value: Any) -> Any:
+    """
+    Converts metadata into plain JSON values that are the same for the same metadata
+    in every run. Sets are sorted, because their order changes between runs.
+    """
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: canonical(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+        }
+    if isinstance(value, dict):
+        return {str(key): canonical(val) for key, val in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            (canonical(val) for val in value),
+            key=lambda val: json.dumps(val, sort_keys=True),
+        )
+    if isinstance(value, (list, tuple)):
+        return [canonical(val) for val in value]
+    if isinstance(value, Enum):
+        return canonical(value.value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def fingerprint(*values: Any) -> str:
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(json.dumps(canonical(value), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def tool_fingerprint() -> str:
+    """
+    Hashes the WRITEME sources, config, templates, and the version of the tools
+    package, so that a change to any of them renders every README again.
+    """
+    root = Path(__file__).parent
+    digest = hashlib.sha256()
+    for path in sorted(
+        [*root.glob("*.py"), *root.glob("*.jinja2"), *root.glob("includes/*.jinja2")]
+    ):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    try:
+        digest.update(version("aws-doc-sdk-examples-tools").encode())
+    except PackageNotFoundError:
+        pass
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Remembers, for each README, a hash of the inputs it was rendered from and a hash
+    of the rendered text. When the inputs are unchanged and the README on disk still
+    has the rendered text, rendering it again would give the same text, so it can
+    be skipped.
+    """
+
+    def __init__(self, path: Path, salt: str):
+        """
+        :param path: The JSON file the cache is kept in between runs.
+        :param salt: A hash of the inputs that all READMEs share. Entries saved with
+                     a different salt are discarded.
+        """
+        self.path = path
+        self.salt = salt
+        self.entries: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, path: Path, salt: str) -> "RenderCache":
+        cache = cls(path, salt)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return cache
+        except ValueError:
+            logger.warning("Ignoring unreadable WRITEME cache %s.", path)
+            return cache
+        if saved.get("version") == CACHE_VERSION and saved.get("salt") == salt:
+            cache.entries = saved.get("entries", {})
+        return cache
+
+    def inputs_key(self, inputs: str) -> str:
+        return fingerprint(self.salt, inputs)
+
+    def is_current(self, id: str, inputs_key: str, current_text: str) -> bool:
+        entry = self.entries.get(id)
+        return (
+            entry is not None
+            and entry["inputs"] == inputs_key
+            and entry["readme"] == text_hash(current_text)
+        )
+
+    def store(self, id: str, inputs_key: str, readme_hash: str):
+        self.entries[id] = {"inputs": inputs_key, "readme": readme_hash}
+
+    def save(self):
+        with self.path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "salt": self.salt, "entries": self.entries},
+                f,
+                sort_keys=True,
+            )
+        logger.debug(
+            "Saved %s entries to WRITEME cache %s.", len(self.entries), self.path
+        )
+
+
+def load_cache(path: Path, *shared_inputs: Any) -> RenderCache:
+    """
+    Loads the render cache, salted with the WRITEME tool itself and with the
+    metadata that every README is rendered from.
+    """
+    return RenderCache.load(path, fingerprint(tool_fingerprint(), *shared_inputs))
@@ -18,7 +18,8 @@ from aws_doc_sdk_examples_tools.entities import expand_all_entities
 from aws_doc_sdk_examples_tools.metadata import Example
 from aws_doc_sdk_examples_tools.sdks import Sdk
 from aws_doc_sdk_examples_tools.services import Service
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from cache import fingerprint
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 from scanner import Scanner
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,26 @@ class MissingMetadataError(Exception):
 class Renderer:
     def __init__(self, scanner: Scanner):
         self.scanner = scanner
+        # The environment and README template are the same for every example, so
+        # they are compiled once for each Renderer instead of for each README.
+        self.env = Environment(
+            autoescape=select_autoescape(
+                disabled_extensions=("jinja2",), default_for_string=True
+            ),
+            loader=FileSystemLoader(os.path.dirname(__file__)),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.template = self.env.get_template("service_readme.jinja2")
+        self.template.globals["now"] = datetime.datetime.utcnow
+        self._string_templates: Dict[str, Template] = {}
+
+    def _from_string(self, source: str) -> Template:
+        template = self._string_templates.get(source)
+        if template is None:
+            template = self.env.from_string(source)
+            self._string_templates[source] = template
+        return template
 
     def set_example(self, service: str, language: str, version: int, safe: bool):
         self.scanner.set_example(service, language, version)
@@ -50,25 +71,14 @@ class Renderer:
         if self.lang_config is None:
             return
 
-        env = Environment(
-            autoescape=select_autoescape(
-                disabled_extensions=("jinja2",), default_for_string=True
-            ),
-            loader=FileSystemLoader(os.path.dirname(__file__)),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
-        self.template = env.get_template("service_readme.jinja2")
-        self.template.globals["now"] = datetime.datetime.utcnow
-
         self.lang_config = self.lang_config.copy()
         service_info = {
             "name": self.scanner.svc_name,
             "sort": self.scanner.service().sort.replace(" ", ""),
         }
 
-        self._extract_service_folder(self.scanner, env, service_info)
-        sdk_api_ref_tmpl = env.from_string(self.lang_config.get("sdk_api_ref", ""))
+        self._extract_service_folder(self.scanner, service_info)
+        sdk_api_ref_tmpl = self._from_string(self.lang_config.get("sdk_api_ref", ""))
         self.lang_config["sdk_api_ref"] = sdk_api_ref_tmpl.render(service=service_info)
 
         self.readme_filename = (
@@ -77,7 +87,7 @@ class Renderer:
             / config.readme
         )
 
-    def _extract_service_folder(self, scanner, env, service_info):
+    def _extract_service_folder(self, scanner, service_info):
         if (
             "service_folder_overrides" in self.lang_config
             and scanner.svc_name in self.lang_config["service_folder_overrides"]
@@ -85,7 +95,7 @@ class Renderer:
             overrides = self.lang_config["service_folder_overrides"]
             self.lang_config["service_folder"] = overrides[scanner.svc_name]
         elif "service_folder" in self.lang_config:
-            svc_folder_tmpl = env.from_string(self.lang_config["service_folder"])
+            svc_folder_tmpl = self._from_string(self.lang_config["service_folder"])
             self.lang_config["service_folder"] = svc_folder_tmpl.render(
                 service=service_info
             )
@@ -342,6 +352,20 @@ class Renderer:
         else:
             return RenderStatus.UPDATED
 
+    def fingerprint(self) -> str:
+        """
+        Hashes the inputs that the README of the current example is rendered from,
+        other than the README itself and the inputs that all READMEs share.
+        """
+        examples, snippets = self.scanner.example_inputs()
+        return fingerprint(
+            self.lang_config,
+            self.scanner.service(),
+            self.scanner.sdk(),
+            examples,
+            snippets,
+        )
+
     def write(self):
         if self.readme_filename.exists():
             if self.safe:
@@ -4,13 +4,17 @@
 import typer
 from typing_extensions import Annotated
 import logging
+import multiprocessing
 import os
 
+from concurrent.futures import ProcessPoolExecutor
 from difflib import unified_diff
 from enum import Enum
+from itertools import repeat
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
+from cache import RenderCache, load_cache, text_hash
 from render import Renderer, RenderStatus, MissingMetadataError
 from scanner import Scanner
 
@@ -40,6 +44,7 @@ def prepare_scanner(doc_gen: DocGen) -> Optional[Scanner]:
 
     # Preload cross-content examples
     scanner.load_crosses()
+    scanner.build_index()
 
     return scanner
 
@@ -55,6 +60,11 @@ Service = Enum(
     "Service", {serv: serv for serv in ([*doc_gen.services.keys()] + ["all"])}
 )  # type: ignore
 
+CACHE_FILE = Path(__file__).parent / ".writeme_cache.json"
+
+# The kind of result, the example ID, the diff text, and the cache entry to keep.
+RenderResult = Tuple[Optional[str], str, Optional[str], Optional[Tuple[str, str]]]
+
 
 def writeme(
     languages: Annotated[
@@ -92,6 +102,18 @@ def writeme(
     diff: Annotated[
         bool, typer.Option(help="Show a diff of READMEs that have changed.")
     ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            help="The number of processes that render READMEs. 0 uses one process for each CPU."
+        ),
+    ] = 1,
+    cache: Annotated[
+        bool,
+        typer.Option(
+            help=f"Skip READMEs whose inputs and contents have not changed since the last run, as recorded in {CACHE_FILE.name}."
+        ),
+    ] = True,
 ):
     if Language.all in languages:  # type: ignore
         languages = list(Language)  # type: ignore
@@ -121,7 +143,7 @@ def writeme(
     if scanner is None:
         return -1
 
-    renderer = Renderer(scanner)
+    examples = []
     for service in services:
         if service == Service.all:  # type: ignore
             continue
@@ -130,41 +152,38 @@ def writeme(
                 continue
             (language, version) = language_and_version.value.split(":")
             id = f"{language}:{version}:{service}"
-            try:
-                renderer.set_example(service.value, language, int(version), safe)
-
-                logging.debug("Rendering %s", id)
-                render_status = renderer.render()
-                logging.debug("Status %s", render_status)
-
-                if render_status == RenderStatus.UPDATED:
-                    if dry_run:
-                        diff_text = None
-                        if diff:
-                            diff_text = make_diff(renderer, id)
-                        failed.append((id, diff_text))
-                    else:
-                        renderer.write()
-                        written.append(id)
-                elif render_status == RenderStatus.UNCHANGED:
-                    unchanged.append(id)
-                elif render_status == RenderStatus.UNMANAGED:
-                    non_writeme.append(id)
-                elif render_status == RenderStatus.NO_EXAMPLES:
-                    skipped.append(id)
-                elif render_status == RenderStatus.NO_FOLDER:
-                    no_folder.append(id)
-                elif render_status == RenderStatus.UNIMPLEMENTED:
-                    pass
-            except FileNotFoundError as fnfe:
-                logging.debug(fnfe, exc_info=True)
-                skipped.append(id)
-            except MissingMetadataError as mme:
-                logging.debug(mme, exc_info=True)
-                failed.append((id, None))
-            except Exception as e:
-                logging.error(e, exc_info=True)
-                failed.append((id, None))
+            examples.append((id, service.value, language, version))
+    render_cache = (
+        load_cache(CACHE_FILE, doc_gen.categories, doc_gen.entities) if cache else None
+    )
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    results = render_all(scanner, render_cache, examples, jobs, safe, dry_run, diff)
+    for kind, id, diff_text, cache_entry in results:
+        if render_cache is not None:
+            if cache_entry is None:
+                render_cache.entries.pop(id, None)
+            else:
+                render_cache.store(id, *cache_entry)
+        if kind == "written":
+            written.append(id)
+        elif kind == "failed":
+            failed.append((id, diff_text))
+        elif kind == "unchanged":
+            unchanged.append(id)
+        elif kind == "non_writeme":
+            non_writeme.append(id)
+        elif kind == "skipped":
+            skipped.append(id)
+        elif kind == "no_folder":
+            no_folder.append(id)
+
+    if render_cache is not None:
+        try:
+            render_cache.save()
+        except OSError as e:
+            logging.warning("Couldn't save the WRITEME cache: %s", e)
 
     skip_list = "\n".join(f"Skipped {f}" for f in sorted(skipped))
     logging.debug(skip_list or "(None Skipped)")
@@ -196,6 +215,150 @@ def writeme(
     return fail_count
 
 
+def render_all(
+    scanner: Scanner,
+    cache: Optional[RenderCache],
+    examples: List[Tuple[str, str, str, str]],
+    jobs: int,
+    safe: bool,
+    dry_run: bool,
+    diff: bool,
+) -> List[RenderResult]:
+    """
+    Renders the README of each (id, service, language, version) example, in a pool of
+    jobs processes when jobs is more than 1. The processes are forked, so they share
+    the scanner index that is already built instead of each loading the metadata.
+    """
+    if jobs > 1 and examples:
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            logging.warning(
+                "Rendering in one process, because this platform can't fork."
+            )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(scanner, cache),
+            ) as executor:
+                ids, services, languages, versions = zip(*examples)
+                return list(
+                    executor.map(
+                        _render_in_worker,
+                        ids,
+                        services,
+                        languages,
+                        versions,
+                        repeat(safe),
+                        repeat(dry_run),
+                        repeat(diff),
+                        chunksize=16,
+                    )
+                )
+
+    renderer = Renderer(scanner)
+    return [
+        render_example(
+            renderer, cache, id, service, language, version, safe, dry_run, diff
+        )
+        for id, service, language, version in examples
+    ]
+
+
+# Each worker process renders with its own Renderer, so the README template is
+# compiled once for each worker.
+_worker_renderer: Optional[Renderer] = None
+_worker_cache: Optional[RenderCache] = None
+
+
+def _init_worker(scanner: Scanner, cache: Optional[RenderCache]):
+    global _worker_renderer, _worker_cache
+    _worker_renderer = Renderer(scanner)
+    _worker_cache = cache
+
+
+def _render_in_worker(
+    id, service, language, version, safe, dry_run, diff
+) -> RenderResult:
+    return render_example(
+        _worker_renderer,
+        _worker_cache,
+        id,
+        service,
+        language,
+        version,
+        safe,
+        dry_run,
+        diff,
+    )
+
+
+def render_example(
+    renderer: Renderer,
+    cache: Optional[RenderCache],
+    id: str,
+    service: str,
+    language: str,
+    version: str,
+    safe: bool,
+    dry_run: bool,
+    diff: bool,
+) -> RenderResult:
+    """
+    Renders the README of one service for one SDK and, unless this is a dry run,
+    writes it when it has changed. When the cache shows that neither the inputs nor
+    the README have changed since the README was last found up to date, rendering
+    is skipped.
+    """
+    try:
+        renderer.set_example(service, language, int(version), safe)
+
+        inputs_key = None
+        if cache is not None and renderer.lang_config is not None:
+            inputs_key = cache.inputs_key(renderer.fingerprint())
+            current = renderer.read_current()
+            if cache.is_current(id, inputs_key, current):
+                logging.debug("Skipping %s, unchanged since the last run", id)
+                return "unchanged", id, None, (inputs_key, text_hash(current))
+
+        logging.debug("Rendering %s", id)
+        render_status = renderer.render()
+        logging.debug("Status %s", render_status)
+
+        if render_status == RenderStatus.UPDATED:
+            if dry_run:
+                diff_text = None
+                if diff:
+                    diff_text = make_diff(renderer, id)
+                return "failed", id, diff_text, None
+            else:
+                renderer.write()
+                return "written", id, None, None
+        elif render_status == RenderStatus.UNCHANGED:
+            cache_entry = None
+            if inputs_key is not None:
+                cache_entry = (inputs_key, text_hash(renderer.readme_text))
+            return "unchanged", id, None, cache_entry
+        elif render_status == RenderStatus.UNMANAGED:
+            return "non_writeme", id, None, None
+        elif render_status == RenderStatus.NO_EXAMPLES:
+            return "skipped", id, None, None
+        elif render_status == RenderStatus.NO_FOLDER:
+            return "no_folder", id, None, None
+    except FileNotFoundError as fnfe:
+        logging.debug(fnfe, exc_info=True)
+        return "skipped", id, None, None
+    except MissingMetadataError as mme:
+        logging.debug(mme, exc_info=True)
+        return "failed", id, None, None
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return "failed", id, None, None
+    return None, id, None, None
+
+
 def make_diff(renderer, id):
     current = renderer.read_current().split("\n")
     expected = renderer.readme_text.split("\n")
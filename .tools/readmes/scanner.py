@@ -38,6 +38,7 @@ class Scanner:
         self.customs: Dict[str, Example] = {}
         self.crosses: Dict[str, Example] = {}
         self.cross_scenarios: Dict[str, Example] = {}
+        self._categorized: Dict[str, Dict[str, Dict[str, Example]]] = {}
 
     def load_crosses(self):
         self.doc_gen.process_metadata(
@@ -57,37 +58,77 @@ class Scanner:
     def _example_key(self):
         return f"{self.lang_name}:{self.sdk_ver}:{self.svc_name}"
 
-    def set_example(self, svc_name: str, language: str, sdk_ver: int):
-        self.svc_name = svc_name
-        self.lang_name = language
-        self.sdk_ver = sdk_ver
-
-        self.hellos.clear()
-        self.actions.clear()
-        self.basics.clear()
-        self.scenarios.clear()
-        self.customs.clear()
-        self.cross_scenarios.clear()
-        self.crosses.clear()
-
-        key = self._example_key()
-        examples = self.examples[key]
+    def build_index(self):
+        """
+        Sorts the examples of every service and SDK into categories up front, so
+        that processes forked to render READMEs share one index instead of each
+        building their own.
+        """
+        for key, examples in self.examples.items():
+            self._categorized[key] = self._categorize(examples)
+
+    def _categorize(self, examples: List[Example]) -> Dict[str, Dict[str, Example]]:
+        categorized: Dict[str, Dict[str, Example]] = {
+            "hellos": {},
+            "actions": {},
+            "basics": {},
+            "scenarios": {},
+            "customs": {},
+            "crosses": {},
+            "cross_scenarios": {},
+        }
         for example in examples:
             if example.id.startswith("cross_"):
                 if example.category == config.categories["scenarios"]:
-                    self.cross_scenarios[example.id] = example
+                    categorized["cross_scenarios"][example.id] = example
                 else:
-                    self.crosses[example.id] = example
+                    categorized["crosses"][example.id] = example
             elif example.category == config.categories["hello"]:
-                self.hellos[example.id] = example
+                categorized["hellos"][example.id] = example
             elif example.category == config.categories["actions"]:
-                self.actions[example.id] = example
+                categorized["actions"][example.id] = example
             elif example.category == config.categories["basics"]:
-                self.basics[example.id] = example
+                categorized["basics"][example.id] = example
             elif example.category == config.categories["scenarios"]:
-                self.scenarios[example.id] = example
+                categorized["scenarios"][example.id] = example
             elif example.category not in config.categories.values():
-                self.customs[example.id] = example
+                categorized["customs"][example.id] = example
+        return categorized
+
+    def set_example(self, svc_name: str, language: str, sdk_ver: int):
+        self.svc_name = svc_name
+        self.lang_name = language
+        self.sdk_ver = sdk_ver
+
+        key = self._example_key()
+        categorized = self._categorized.get(key)
+        if categorized is None:
+            categorized = self._categorize(self.examples[key])
+            self._categorized[key] = categorized
+        self.hellos = categorized["hellos"]
+        self.actions = categorized["actions"]
+        self.basics = categorized["basics"]
+        self.scenarios = categorized["scenarios"]
+        self.customs = categorized["customs"]
+        self.crosses = categorized["crosses"]
+        self.cross_scenarios = categorized["cross_scenarios"]
+
+    def example_inputs(self):
+        """
+        Gets the examples of the current service and SDK and the snippets they
+        link to, which are the inputs that differ between READMEs.
+        """
+        examples = self.examples[self._example_key()]
+        tags = {
+            tag
+            for example in examples
+            for ex_ver in example.languages[self.lang_name].versions
+            if ex_ver.sdk_version == self.sdk_ver
+            for excerpt in ex_ver.excerpts or []
+            for tag in excerpt.snippet_tags or []
+        }
+        snippets = {tag: self.doc_gen.snippets.get(tag) for tag in sorted(tags)}
+        return examples, snippets
 
     def sdk(self) -> Sdk:
         return self.doc_gen.sdks[self.lang_name]
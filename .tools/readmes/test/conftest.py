@@ -0,0 +1,11 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Contains common test setup used to run WRITEME unit tests.
+"""
+
+import sys
+
+# This is needed so Python can find the WRITEME modules on the path.
+sys.path.append("..")
@@ -0,0 +1,132 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for the WRITEME render cache.
+"""
+
+import dataclasses
+import json
+from enum import Enum
+
+import pytest
+
+from cache import CACHE_VERSION, RenderCache, canonical, fingerprint, text_hash
+
+
+class Kind(Enum):
+    ACTION = "action"
+
+
+@dataclasses.dataclass
+class Snippet:
+    id: str
+    code: str
+    tags: set = dataclasses.field(default_factory=set)
+    kind: Kind = Kind.ACTION
+
+
+README_TEXT = "# Test README\n"
+
+
+def test_canonical():
+    snippet = Snippet("test-id", "print('test')", {"b", "a", "c"})
+
+    assert canonical(snippet) == {
+        "id": "test-id",
+        "code": "print('test')",
+        "tags": ["a", "b", "c"],
+        "kind": "action",
+    }
+    assert canonical({1: (2, None), "x": [1.5, True]}) == {
+        "1": [2, None],
+        "x": [1.5, True],
+    }
+    assert canonical(object).startswith("<class")
+
+
+def test_fingerprint():
+    snippet = Snippet("test-id", "print('test')", {"a", "b"})
+
+    assert fingerprint(snippet) == fingerprint(
+        Snippet("test-id", "print('test')", {"b", "a"})
+    )
+    assert fingerprint(snippet) != fingerprint(
+        Snippet("test-id", "print('changed')", {"a", "b"})
+    )
+    assert fingerprint("a", "b") != fingerprint("b", "a")
+    assert fingerprint({"x": 1, "y": 2}) == fingerprint({"y": 2, "x": 1})
+
+
+@pytest.fixture
+def saved_cache(tmp_path):
+    """Saves a cache with one entry and returns its path and the key of its inputs."""
+    cache = RenderCache(tmp_path / "cache.json", "test-salt")
+    inputs_key = cache.inputs_key(fingerprint(Snippet("test-id", "print('test')")))
+    cache.store("test-readme", inputs_key, text_hash(README_TEXT))
+    cache.save()
+    return cache.path, inputs_key
+
+
+def test_load_is_current(saved_cache):
+    path, inputs_key = saved_cache
+
+    cache = RenderCache.load(path, "test-salt")
+
+    assert cache.entries == {
+        "test-readme": {"inputs": inputs_key, "readme": text_hash(README_TEXT)}
+    }
+    assert cache.is_current("test-readme", inputs_key, README_TEXT)
+    assert not cache.is_current("other-readme", inputs_key, README_TEXT)
+
+
+def test_changed_snippet_renders(saved_cache):
+    path, _ = saved_cache
+
+    cache = RenderCache.load(path, "test-salt")
+    inputs_key = cache.inputs_key(fingerprint(Snippet("test-id", "print('changed')")))
+
+    assert not cache.is_current("test-readme", inputs_key, README_TEXT)
+
+
+def test_changed_readme_renders(saved_cache):
+    path, inputs_key = saved_cache
+
+    cache = RenderCache.load(path, "test-salt")
+
+    assert not cache.is_current("test-readme", inputs_key, README_TEXT + "Edited.\n")
+
+
+def test_salt_mismatch_renders(saved_cache):
+    path, _ = saved_cache
+
+    cache = RenderCache.load(path, "other-salt")
+    inputs_key = cache.inputs_key(fingerprint(Snippet("test-id", "print('test')")))
+
+    assert cache.entries == {}
+    assert not cache.is_current("test-readme", inputs_key, README_TEXT)
+
+
+@pytest.mark.parametrize(
+    "saved",
+    [
+        None,
+        "not json",
+        json.dumps(
+            {
+                "version": CACHE_VERSION + 1,
+                "salt": "test-salt",
+                "entries": {"test-readme": {"inputs": "x", "readme": "y"}},
+            }
+        ),
+    ],
+)
+def test_load_empty(tmp_path, saved):
+    path = tmp_path / "cache.json"
+    if saved is not None:
+        path.write_text(saved, encoding="utf-8")
+
+    cache = RenderCache.load(path, "test-salt")
+
+    assert cache.entries == {}
+    assert cache.salt == "test-salt"
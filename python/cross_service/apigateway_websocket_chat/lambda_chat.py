@@ -10,12 +10,19 @@ Amazon DynamoDB table to track active connections. When a message is sent by any
 participant, it is posted to all other active connections by using the Amazon
 API Gateway Management API.
 
+Lambda reuses a warm execution environment for later events, so the set of active
+connections is cached between events and refreshed from the table when it is older
+than the time-to-live specified in the `connection_cache_ttl` environment variable.
+Messages are posted to connections concurrently.
+
 Logs written by this handler can be found in Amazon CloudWatch.
 """
 
 import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.exceptions import ClientError
@@ -23,8 +30,76 @@ from botocore.exceptions import ClientError
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+DEFAULT_CONNECTION_CACHE_TTL = 30
+DEFAULT_POST_WORKERS = 16
+
+
+class ConnectionCache:
+    """
+    Caches the IDs of active connections. Connections added or removed by this
+    execution environment update the cache directly. Connections added or removed
+    by other execution environments are found when the cache expires and is
+    refreshed from the table.
+    """
+
+    def __init__(self, ttl):
+        """
+        :param ttl: The number of seconds to use the cached connections before they
+                    are refreshed from the table.
+        """
+        self.ttl = ttl
+        self._connection_ids = None
+        self._loaded_at = None
+
+    def get_connection_ids(self, table):
+        """
+        Gets the IDs of active connections. When the cache is empty or expired, all
+        pages of connections are scanned from the table.
+
+        :param table: The DynamoDB connection table.
+        :return: The set of active connection IDs.
+        """
+        if (
+            self._connection_ids is None
+            or time.monotonic() - self._loaded_at > self.ttl
+        ):
+            self._connection_ids = scan_connection_ids(table)
+            self._loaded_at = time.monotonic()
+        return set(self._connection_ids)
+
+    def add(self, connection_id):
+        if self._connection_ids is not None:
+            self._connection_ids.add(connection_id)
+
+    def discard(self, connection_ids):
+        if self._connection_ids is not None:
+            self._connection_ids.difference_update(connection_ids)
+
+
+# Module-level state is kept while the execution environment is warm.
+connection_cache = ConnectionCache(
+    float(os.environ.get("connection_cache_ttl", DEFAULT_CONNECTION_CACHE_TTL))
+)
 
-def handle_connect(user_name, table, connection_id):
+
+def scan_connection_ids(table):
+    """
+    Scans all pages of the DynamoDB table for connection IDs.
+
+    :param table: The DynamoDB connection table.
+    :return: The set of connection IDs in the table.
+    """
+    paginator = table.meta.client.get_paginator("scan")
+    return {
+        item["connection_id"]
+        for page in paginator.paginate(
+            TableName=table.name, ProjectionExpression="connection_id"
+        )
+        for item in page["Items"]
+    }
+
+
+def handle_connect(user_name, table, connection_id, cache=None):
     """
     Handles new connections by adding the connection ID and user name to the
     DynamoDB table.
@@ -32,6 +107,7 @@ def handle_connect(user_name, table, connection_id):
     :param user_name: The name of the user that started the connection.
     :param table: The DynamoDB connection table.
     :param connection_id: The websocket connection ID of the new connection.
+    :param cache: When specified, the new connection is added to this cache.
     :return: An HTTP status code that indicates the result of adding the connection
              to the DynamoDB table.
     """
@@ -39,6 +115,8 @@ def handle_connect(user_name, table, connection_id):
     try:
         table.put_item(Item={"connection_id": connection_id, "user_name": user_name})
         logger.info("Added connection %s for user %s.", connection_id, user_name)
+        if cache is not None:
+            cache.add(connection_id)
     except ClientError:
         logger.exception(
             "Couldn't add connection %s for user %s.", connection_id, user_name
@@ -47,12 +125,13 @@ def handle_connect(user_name, table, connection_id):
     return status_code
 
 
-def handle_disconnect(table, connection_id):
+def handle_disconnect(table, connection_id, cache=None):
     """
     Handles disconnections by removing the connection record from the DynamoDB table.
 
     :param table: The DynamoDB connection table.
     :param connection_id: The websocket connection ID of the connection to remove.
+    :param cache: When specified, the connection is removed from this cache.
     :return: An HTTP status code that indicates the result of removing the connection
              from the DynamoDB table.
     """
@@ -60,13 +139,73 @@ def handle_disconnect(table, connection_id):
     try:
         table.delete_item(Key={"connection_id": connection_id})
         logger.info("Disconnected connection %s.", connection_id)
+        if cache is not None:
+            cache.discard([connection_id])
     except ClientError:
         logger.exception("Couldn't disconnect connection %s.", connection_id)
         status_code = 503
     return status_code
 
 
-def handle_message(table, connection_id, event_body, apig_management_client):
+def post_to_connections(apig_management_client, connection_ids, message, max_workers):
+    """
+    Posts a message to connections concurrently on a bounded thread pool.
+
+    :param apig_management_client: A Boto3 API Gateway Management API client.
+    :param connection_ids: The IDs of the connections to post to.
+    :param message: The message to post, as bytes.
+    :param max_workers: The maximum number of posts to send at the same time.
+    :return: The IDs of the connections that are gone.
+    """
+
+    def post(conn_id):
+        try:
+            send_response = apig_management_client.post_to_connection(
+                Data=message, ConnectionId=conn_id
+            )
+            logger.info(
+                "Posted message to connection %s, got response %s.",
+                conn_id,
+                send_response,
+            )
+        except apig_management_client.exceptions.GoneException:
+            logger.info("Connection %s is gone, removing.", conn_id)
+            return conn_id
+        except ClientError:
+            logger.exception("Couldn't post to connection %s.", conn_id)
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return {
+            conn_id
+            for conn_id in executor.map(post, connection_ids)
+            if conn_id is not None
+        }
+
+
+def remove_connections(table, connection_ids):
+    """
+    Removes connections from the DynamoDB table in batches.
+
+    :param table: The DynamoDB connection table.
+    :param connection_ids: The IDs of the connections to remove.
+    """
+    try:
+        with table.batch_writer() as batch:
+            for conn_id in connection_ids:
+                batch.delete_item(Key={"connection_id": conn_id})
+    except ClientError:
+        logger.exception("Couldn't remove connections %s.", connection_ids)
+
+
+def handle_message(
+    table,
+    connection_id,
+    event_body,
+    apig_management_client,
+    cache=None,
+    max_workers=DEFAULT_POST_WORKERS,
+):
     """
     Handles messages sent by a participant in the chat. Looks up all connections
     currently tracked in the DynamoDB table, and uses the API Gateway Management API
@@ -81,6 +220,10 @@ def handle_message(table, connection_id, event_body, apig_management_client):
     :param event_body: The body of the message sent from API Gateway. This is a
                        dict with a `msg` field that contains the message to send.
     :param apig_management_client: A Boto3 API Gateway Management API client.
+    :param cache: When specified, active connections are read from this cache
+                  instead of scanned from the table.
+    :param max_workers: The maximum number of connections to post to at the
+                        same time.
     :return: An HTTP status code that indicates the result of posting the message
              to all active connections.
     """
@@ -93,10 +236,12 @@ def handle_message(table, connection_id, event_body, apig_management_client):
     except ClientError:
         logger.exception("Couldn't find user name. Using %s.", user_name)
 
-    connection_ids = []
+    connection_ids = set()
     try:
-        scan_response = table.scan(ProjectionExpression="connection_id")
-        connection_ids = [item["connection_id"] for item in scan_response["Items"]]
+        if cache is None:
+            connection_ids = scan_connection_ids(table)
+        else:
+            connection_ids = cache.get_connection_ids(table)
         logger.info("Found %s active connections.", len(connection_ids))
     except ClientError:
         logger.exception("Couldn't get connections.")
@@ -105,25 +250,15 @@ def handle_message(table, connection_id, event_body, apig_management_client):
     message = f"{user_name}: {event_body['msg']}".encode()  # utf-8
     logger.info("Message: %s", message)
 
-    for other_conn_id in connection_ids:
-        try:
-            if other_conn_id != connection_id:
-                send_response = apig_management_client.post_to_connection(
-                    Data=message, ConnectionId=other_conn_id
-                )
-                logger.info(
-                    "Posted message to connection %s, got response %s.",
-                    other_conn_id,
-                    send_response,
-                )
-        except ClientError:
-            logger.exception("Couldn't post to connection %s.", other_conn_id)
-        except apig_management_client.exceptions.GoneException:
-            logger.info("Connection %s is gone, removing.", other_conn_id)
-            try:
-                table.delete_item(Key={"connection_id": other_conn_id})
-            except ClientError:
-                logger.exception("Couldn't remove connection %s.", other_conn_id)
+    other_conn_ids = sorted(connection_ids - {connection_id})
+    if other_conn_ids:
+        gone_conn_ids = post_to_connections(
+            apig_management_client, other_conn_ids, message, max_workers
+        )
+        if gone_conn_ids:
+            remove_connections(table, gone_conn_ids)
+            if cache is not None:
+                cache.discard(gone_conn_ids)
 
     return status_code
 
@@ -134,7 +269,10 @@ def lambda_handler(event, context):
     and dispatches them to various handler functions.
 
     This function looks up the name of a DynamoDB table in the `table_name` environment
-    variable. The table must have a primary key named `connection_id`.
+    variable. The table must have a primary key named `connection_id`. The optional
+    `connection_cache_ttl` and `post_workers` environment variables set how long
+    active connections are cached and how many connections a message is posted to
+    at the same time.
 
     This function handles three routes: $connect, $disconnect, and sendmessage. Any
     other route results in a 404 status code.
@@ -161,9 +299,13 @@ def lambda_handler(event, context):
     response = {"statusCode": 200}
     if route_key == "$connect":
         user_name = event.get("queryStringParameters", {"name": "guest"}).get("name")
-        response["statusCode"] = handle_connect(user_name, table, connection_id)
+        response["statusCode"] = handle_connect(
+            user_name, table, connection_id, cache=connection_cache
+        )
     elif route_key == "$disconnect":
-        response["statusCode"] = handle_disconnect(table, connection_id)
+        response["statusCode"] = handle_disconnect(
+            table, connection_id, cache=connection_cache
+        )
     elif route_key == "sendmessage":
         body = event.get("body")
         body = json.loads(body if body is not None else '{"msg": ""}')
@@ -182,7 +324,12 @@ def lambda_handler(event, context):
                 "apigatewaymanagementapi", endpoint_url=f"https://{domain}/{stage}"
             )
             response["statusCode"] = handle_message(
-                table, connection_id, body, apig_management_client
+                table,
+                connection_id,
+                body,
+                apig_management_client,
+                cache=connection_cache,
+                max_workers=int(os.environ.get("post_workers", DEFAULT_POST_WORKERS)),
             )
     else:
         response["statusCode"] = 404
@@ -100,6 +100,102 @@ def test_handle_message(
     assert got_status_code == status_code
 
 
+def test_handle_message_cache_and_prune(make_stubber, monkeypatch):
+    dynamodb_resource = boto3.resource("dynamodb")
+    dynamodb_stubber = make_stubber(dynamodb_resource.meta.client)
+    apig_management_client = boto3.client("apigatewaymanagementapi")
+    apig_management_stubber = make_stubber(apig_management_client)
+    table = dynamodb_resource.Table("test-table")
+    connection_id = "test-connection_id"
+    user_name = "test-user"
+    msg = "test-msg"
+    cache = lambda_chat.ConnectionCache(ttl=60)
+
+    # The first message scans both pages of connections.
+    dynamodb_stubber.stub_get_item(
+        table.name,
+        {"connection_id": connection_id},
+        {"connection_id": connection_id, "user_name": user_name},
+    )
+    dynamodb_stubber.stub_scan(
+        table.name,
+        [{"connection_id": connection_id}, {"connection_id": "conn-1"}],
+        projection_expression="connection_id",
+        last_key={"connection_id": {"S": "conn-1"}},
+    )
+    dynamodb_stubber.stub_scan(
+        table.name,
+        [{"connection_id": "conn-2"}],
+        projection_expression="connection_id",
+        start_key={"connection_id": "conn-1"},
+    )
+    apig_management_stubber.stub_post_to_connection(
+        f"{user_name}: {msg}".encode(), "conn-1"
+    )
+    apig_management_stubber.stub_post_to_connection(
+        f"{user_name}: {msg}".encode(), "conn-2", error_code="GoneException"
+    )
+    dynamodb_stubber.stub_batch_write_item(
+        {table.name: [{"DeleteRequest": {"Key": {"connection_id": "conn-2"}}}]}
+    )
+    # The second message uses the cache, which no longer contains the gone
+    # connection but does contain a connection added in this environment.
+    dynamodb_stubber.stub_put_item(
+        table.name, {"connection_id": "conn-3", "user_name": user_name}
+    )
+    dynamodb_stubber.stub_get_item(
+        table.name,
+        {"connection_id": connection_id},
+        {"connection_id": connection_id, "user_name": user_name},
+    )
+    for conn_id in ("conn-1", "conn-3"):
+        apig_management_stubber.stub_post_to_connection(
+            f"{user_name}: {msg}".encode(), conn_id
+        )
+
+    assert (
+        lambda_chat.handle_message(
+            table,
+            connection_id,
+            {"msg": msg},
+            apig_management_client,
+            cache=cache,
+            max_workers=1,
+        )
+        == 200
+    )
+    lambda_chat.handle_connect(user_name, table, "conn-3", cache=cache)
+    assert (
+        lambda_chat.handle_message(
+            table,
+            connection_id,
+            {"msg": msg},
+            apig_management_client,
+            cache=cache,
+            max_workers=1,
+        )
+        == 200
+    )
+
+
+def test_connection_cache_expires(monkeypatch):
+    scans = []
+    monkeypatch.setattr(
+        lambda_chat, "scan_connection_ids", lambda table: scans.append(table) or {"c"}
+    )
+    now = [100.0]
+    monkeypatch.setattr(lambda_chat.time, "monotonic", lambda: now[0])
+    cache = lambda_chat.ConnectionCache(ttl=30)
+
+    assert cache.get_connection_ids("table") == {"c"}
+    now[0] += 30
+    assert cache.get_connection_ids("table") == {"c"}
+    assert len(scans) == 1
+    now[0] += 1
+    cache.get_connection_ids("table")
+    assert len(scans) == 2
+
+
 @pytest.mark.parametrize(
     "table_name,route,connection_id,user_name,msg_body,domain,stage,status_code",
     [
@@ -152,18 +248,21 @@ def test_lambda_handler(
     stage,
     status_code,
 ):
-    def verify_handle_connect(uname, tbl, conn):
+    def verify_handle_connect(uname, tbl, conn, cache):
+        assert cache is lambda_chat.connection_cache
         assert uname == user_name
         assert tbl.name == table_name
         assert conn == connection_id
         return status_code
 
-    def verify_handle_disconnect(tbl, conn):
+    def verify_handle_disconnect(tbl, conn, cache):
+        assert cache is lambda_chat.connection_cache
         assert tbl.name == table_name
         assert conn == connection_id
         return status_code
 
-    def verify_handle_message(tbl, conn, body, apig):
+    def verify_handle_message(tbl, conn, body, apig, cache, max_workers):
+        assert cache is lambda_chat.connection_cache
         assert tbl.name == table_name
         assert conn == connection_id
         assert body == json.loads(msg_body if msg_body is not None else '{"msg": ""}')
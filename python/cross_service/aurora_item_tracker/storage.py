@@ -8,6 +8,7 @@ Shows how to use the Amazon Relational Database Service (Amazon RDS) Data Servic
 interact with an Amazon Aurora Serverless database.
 """
 
+import json
 import logging
 
 from botocore.exceptions import ClientError
@@ -28,7 +29,9 @@ class Storage:
     Wraps calls to the Amazon RDS Data Service.
     """
 
-    def __init__(self, cluster, secret, db_name, table_name, rdsdata_client):
+    def __init__(
+        self, cluster, secret, db_name, table_name, rdsdata_client, json_records=False
+    ):
         """
         :param cluster: The Amazon Resource Name (ARN) of an Aurora DB cluster that
                         contains the work item database.
@@ -37,19 +40,28 @@ class Storage:
         :param db_name: The name of the work item database.
         :param table_name: The name of the work item table in the database.
         :param rdsdata_client: A Boto3 Amazon RDS Data Service client.
+        :param json_records: When True, queries ask the Data Service to return their
+                             records as a JSON string, which is smaller than typed
+                             records. Decoding it is not faster than unpacking
+                             typed records and uses more memory, so it is off by
+                             default.
         """
         self._cluster = cluster
         self._secret = secret
         self._db_name = db_name
         self._table_name = table_name
         self._rdsdata_client = rdsdata_client
+        self._json_records = json_records
 
-    def _run_statement(self, sql, sql_params=None):
+    def _run_statement(self, sql, sql_params=None, format_records_as=None):
         """
         Runs a SQL statement and associated parameters using the Amazon RDS Data Service.
 
         :param sql: The SQL statement to run.
         :param sql_params: The parameters associated with the SQL statement.
+        :param format_records_as: When 'JSON', the records of a query are returned as a
+                                  JSON string in the 'formattedRecords' field instead
+                                  of in the 'records' field.
         :return: The result of running the SQL statement.
         """
         try:
@@ -61,6 +73,8 @@ class Storage:
             }
             if sql_params is not None:
                 run_args["parameters"] = sql_params
+            if format_records_as is not None:
+                run_args["formatRecordsAs"] = format_records_as
             result = self._rdsdata_client.execute_statement(**run_args)
             logger.info("Ran statement on %s.", self._db_name)
         except ClientError as error:
@@ -95,6 +109,13 @@ class Storage:
             sql_params = [{"name": "archived", "value": {"booleanValue": archived}}]
         sql = f"{sql_select} FROM {self._table_name} {sql_where}"
         print(sql)
+        if self._json_records:
+            # The JSON records are keyed by column name, which are the same names
+            # as the fields of a work item.
+            results = self._run_statement(
+                sql, sql_params=sql_params, format_records_as="JSON"
+            )
+            return json.loads(results["formattedRecords"])
         results = self._run_statement(sql, sql_params=sql_params)
         output = [
             {
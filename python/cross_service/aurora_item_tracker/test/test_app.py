@@ -9,6 +9,7 @@ import boto3
 import pytest
 from app import create_app  # pylint: disable=E0611
 from botocore.stub import ANY
+from storage import Storage
 
 
 class MockManager:
@@ -184,6 +185,28 @@ def test_get_items_error(mock_mgr, error, stop_on, code, msg):
         assert msg in rv.json
 
 
+def test_get_work_items_json_records(mock_mgr):
+    sql, sql_params = mock_mgr.make_query("SELECT", "false")
+    mock_mgr.stubber.stub_execute_statement(
+        mock_mgr.cluster_arn,
+        mock_mgr.secret_arn,
+        mock_mgr.db_name,
+        sql,
+        sql_params,
+        formatted_records=mock_mgr.data_items,
+    )
+    storage = Storage(
+        mock_mgr.cluster_arn,
+        mock_mgr.secret_arn,
+        mock_mgr.db_name,
+        mock_mgr.table_name,
+        mock_mgr.client,
+        json_records=True,
+    )
+
+    assert storage.get_work_items(archived=False) == mock_mgr.data_items
+
+
 def test_post_item(mock_mgr):
     sql, sql_params = mock_mgr.make_query("INSERT", mock_mgr.data_items[0])
     mock_mgr.setup_stubs(
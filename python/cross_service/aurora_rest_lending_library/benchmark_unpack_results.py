@@ -0,0 +1,151 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Compares ways of unpacking the records that the Amazon RDS Data Service returns
+from a SELECT query:
+
+* Fields: the original unpacker, which looks up the value type of each field of
+  each record and makes a dict for each record.
+* Rows: unpack_query_results, which looks up the value type of each column once.
+* Columns: unpack_query_columns, which makes a list of values for each column and
+  no dict for each record.
+* JSON: decodes records that were requested with formatRecordsAs='JSON'.
+
+The query results are generated locally, so this benchmark does not call AWS.
+
+Run it with, for example:
+
+    python benchmark_unpack_results.py --records 50000
+"""
+
+import argparse
+import datetime
+import json
+import time
+import tracemalloc
+
+from library_api.chalicelib.postgresql_helper import (
+    VALUE_KEYS,
+    Column,
+    unpack_query_columns,
+    unpack_query_results,
+)
+
+
+def make_results(record_count):
+    """
+    Makes the columns and query results of a report of borrowed books, in both the
+    typed record format and the JSON format of the RDS Data Service.
+
+    :param record_count: The number of records in the results.
+    :return: The columns, the typed results, and the JSON results.
+    """
+    columns = {
+        "Lending.LendingID": Column("LendingID", int),
+        "Books.BookID": Column("BookID", int),
+        "Books.Title": Column("Title", str),
+        "Authors.FirstName": Column("FirstName", str),
+        "Authors.LastName": Column("LastName", str),
+        "Patrons.PatronID": Column("PatronID", int),
+        "Lending.Lent": Column("Lent", datetime.date),
+        "Lending.Returned": Column("Returned", datetime.date),
+    }
+    rows = [
+        [
+            index,
+            index % 997,
+            f"Title {index % 997}",
+            "Francine",
+            f"Author{index % 101}",
+            index % 503,
+            "2023-10-11",
+            None,
+        ]
+        for index in range(record_count)
+    ]
+    typed_results = {
+        "records": [
+            [
+                {"isNull": True} if val is None else {VALUE_KEYS[type(val)]: val}
+                for val in row
+            ]
+            for row in rows
+        ]
+    }
+    json_results = {
+        "formattedRecords": json.dumps([dict(zip(columns.keys(), row)) for row in rows])
+    }
+    return columns, typed_results, json_results
+
+
+def unpack_fields(columns, results):
+    """Unpacks the results the way that unpack_query_results originally did."""
+    return [
+        {
+            col_key: val.get(VALUE_KEYS[col.data_type], None)
+            for col_key, col, val in zip(columns.keys(), columns.values(), record)
+        }
+        for record in results["records"]
+    ]
+
+
+def unpack_json(columns, results):
+    """Decodes records that were formatted as JSON."""
+    return json.loads(results["formattedRecords"])
+
+
+def measure(func, *args, repeat=5):
+    """
+    Runs a function several times and measures its fastest duration, and then runs
+    it once more to measure the peak memory that Python allocates while it runs.
+    The durations are measured without tracing memory, because tracing slows down
+    code that allocates many objects more than code that allocates few.
+
+    :return: The result of the function, the duration in seconds, and the peak
+             memory in bytes.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(durations), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    columns, typed_results, json_results = make_results(args.records)
+    print(f"Results: {args.records} records of {len(columns)} columns.")
+    measured = [
+        (name, *measure(func, columns, results))
+        for name, func, results in (
+            ("Fields", unpack_fields, typed_results),
+            ("Rows", unpack_query_results, typed_results),
+            ("Columns", unpack_query_columns, typed_results),
+            ("JSON", unpack_json, json_results),
+        )
+    ]
+    expected = measured[0][1]
+    assert measured[1][1] == expected, "Rows differ from the original unpacker."
+    assert measured[2][1] == {
+        col_key: [record[col_key] for record in expected] for col_key in columns
+    }, "Columns differ from the original unpacker."
+    assert measured[3][1] == expected, "JSON differs from the original unpacker."
+
+    print(f"{'Method':<9}{'Seconds':>10}{'Peak MiB':>12}")
+    for name, _, duration, peak in measured:
+        print(f"{name:<9}{duration:>10.3f}{peak / 1024 / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,13 +20,13 @@ from botocore.exceptions import ClientError
 from .postgresql_helper import (
     Column,
     ForeignKey,
+    QueryCache,
     Table,
     create_table,
     delete,
     insert,
     insert_returning,
-    insert_without_batch,
-    query,
+    insert_with_lookup,
     unpack_insert_results,
     unpack_insert_results_v2,
     unpack_query_results,
@@ -35,6 +35,10 @@ from .postgresql_helper import (
 
 logger = logging.getLogger(__name__)
 
+# The maximum number of parameter sets sent in one batch_execute_statement call.
+# Larger imports are split into several calls that run in the same transaction.
+BATCH_SIZE = 200
+
 
 class DataServiceNotReadyException(Exception):
     pass
@@ -125,6 +129,7 @@ class Storage:
                 ],
             ),
         }
+        self._queries = QueryCache(self._tables)
 
     @classmethod
     def from_env(cls):
@@ -220,13 +225,14 @@ class Storage:
         else:
             return result
 
-    def _run_batch_statement(self, sql, sql_param_sets):
+    def _run_batch_statement(self, sql, sql_param_sets, transaction_id=None):
         """
         Runs a batch SQL statement and associated parameter sets using RDS Data Service.
 
         :param sql: The SQL statement to run.
         :param sql_param_sets: The parameter sets associated with the SQL statement.
                                Each parameter set represents an item in the batch.
+        :param transaction_id: The ID of a previously created transaction.
         :return: The result of running the batch SQL statement.
         """
         try:
@@ -237,6 +243,8 @@ class Storage:
                 "sql": sql,
                 "parameterSets": sql_param_sets,
             }
+            if transaction_id is not None:
+                run_args["transactionId"] = transaction_id
             result = self._rdsdata_client.batch_execute_statement(**run_args)
             logger.info("Ran batch statement on %s.", self._db_name)
         except ClientError:
@@ -245,6 +253,29 @@ class Storage:
         else:
             return result
 
+    def _run_batch_statements(
+        self, sql, sql_param_sets, batch_size=BATCH_SIZE, transaction_id=None
+    ):
+        """
+        Runs a batch SQL statement in chunks of parameter sets, so that no single
+        call exceeds the request size that RDS Data Service accepts.
+
+        :param sql: The SQL statement to run.
+        :param sql_param_sets: The parameter sets associated with the SQL statement.
+        :param batch_size: The maximum number of parameter sets in each call.
+        :param transaction_id: The ID of a previously created transaction.
+        :return: The number of items in the batch that were run.
+        """
+        count = 0
+        for start in range(0, len(sql_param_sets), batch_size):
+            result = self._run_batch_statement(
+                sql,
+                sql_param_sets[start : start + batch_size],
+                transaction_id=transaction_id,
+            )
+            count += len(result.get("updateResults", []))
+        return count
+
     def bootstrap_tables(self):
         """
         Creates tables in the database. The tables are defined in the constructor.
@@ -254,7 +285,7 @@ class Storage:
             sql = create_table(table)
             self._run_statement(sql)
 
-    def add_books(self, books):
+    def add_books(self, books, batch_size=BATCH_SIZE):
         """
         Adds a list of books and their authors to the database. The list of authors
         is first processed to remove duplicates. The data is set up with a foreign
@@ -262,7 +293,14 @@ class Storage:
         an auto-generated author ID. The book information and the corresponding author ID
         is added to the Books table.
 
+        Authors and books are each added with batch statements of no more than
+        batch_size rows, all in one transaction, so either every book is added or,
+        when any batch fails, none are. Because the Data API does not return the
+        generated author IDs from a batch, each book looks up its author ID by name
+        in the database.
+
         :param books: The list of books and their authors to add to the database.
+        :param batch_size: The maximum number of rows to add in each batch statement.
         :return: The counts of authors and books added to the database.
         """
         authors = {
@@ -272,64 +310,49 @@ class Storage:
             }
             for book in books
         }
-
-        # Construct a list of '(FirstName, LastName)' strings to be substituted into
-        # the VALUES clause of the INSERT statement.
-        authors_plain = [
-            """($first$%s$first$, $last$%s$last$)"""
-            % (" ".join(book["author"].split(" ")[:-1]), book["author"].split(" ")[-1])
-            for book in books
-        ]
-        values_clause = ", ".join(authors_plain)
-
-        sql = insert_without_batch(self._tables["Authors"], values_clause)
-
-        #        result = self._run_batch_statement(sql, sql_param_sets)
-        # Format the parameter set into a big string '''("John", "Smith"), ("Jane", "Jones") ...etc...'''
-        # that can be substituted straight into the VALUES clause of the INSERT statement.
-        result = self._run_statement(sql)
-
-        try:
-            author_count = len(result["updateResults"])
-            logger.info(
-                "Added %s authors to the database. Result set included updateResults field.",
-                author_count,
-            )
-        except Exception:
-            pass
-        try:
-            author_count = len(result["records"])
-            logger.info(
-                "Added %s authors to the database. Result set included records field.",
-                author_count,
-            )
-        except Exception:
-            pass
-
-        auth_ids = [
-            # generatedFields is blank in Data API v2. But that might not be a permanent limitation.
-            # So preserve the ability to switch back to it instead of reformatting the INSERT into a
-            # query and getting the generated IDs out of the 'records' fields.
-            #            field["generatedFields"][0]["longValue"]
-            #            for field in result["updateResults"]
-            field[0]["longValue"]
-            for field in result["records"]
-        ]
-        for auth, auth_id in zip(authors.values(), auth_ids):
-            auth["author_id"] = auth_id
-        sql, sql_param_sets = insert(
+        author_sql, author_param_sets = insert(
+            self._tables["Authors"], list(authors.values())
+        )
+        book_sql, book_param_sets = insert_with_lookup(
             self._tables["Books"],
+            self._tables["Authors"],
+            ["FirstName", "LastName"],
             [
                 {
                     "Title": book["title"],
-                    "AuthorID": authors[book["author"]]["author_id"],
+                    "Authors_FirstName": authors[book["author"]]["FirstName"],
+                    "Authors_LastName": authors[book["author"]]["LastName"],
                 }
                 for book in books
             ],
         )
-        result = self._run_batch_statement(sql, sql_param_sets)
-        book_count = len(result["updateResults"])
-        logger.info("Added %s books to the database.", book_count)
+
+        transaction_id = self._begin_transaction()
+        try:
+            logger.info("Started transaction %s.", transaction_id)
+            author_count = self._run_batch_statements(
+                author_sql, author_param_sets, batch_size, transaction_id
+            )
+            logger.info("Added %s authors to the database.", author_count)
+            book_count = self._run_batch_statements(
+                book_sql, book_param_sets, batch_size, transaction_id
+            )
+            logger.info("Added %s books to the database.", book_count)
+        except Exception:
+            transaction_status = self._rollback_transaction(transaction_id)
+            logger.warning(
+                "Transaction %s rolled back with status %s.",
+                transaction_id,
+                transaction_status,
+            )
+            raise
+        else:
+            transaction_status = self._commit_transaction(transaction_id)
+            logger.info(
+                "Transaction %s commited with status %s.",
+                transaction_id,
+                transaction_status,
+            )
         return author_count, book_count
 
     def get_books(self, author_id=None):
@@ -353,7 +376,7 @@ class Storage:
                 }
             ]
         )
-        sql, columns, params = query("Books", self._tables, where_clauses)
+        sql, columns, params = self._queries.query("Books", where_clauses)
         results = self._run_statement(sql, sql_params=params)
         output = unpack_query_results(columns, results)
         return output
@@ -423,7 +446,7 @@ class Storage:
         :return: The authors in the database.
         """
         logger.info("Listing all authors.")
-        sql, columns, _ = query("Authors", self._tables)
+        sql, columns, _ = self._queries.query("Authors")
         results = self._run_statement(sql)
         output = unpack_query_results(columns, results)
         return output
@@ -435,7 +458,7 @@ class Storage:
         :return: The patrons in the database.
         """
         logger.info("Listing all patrons.")
-        sql, columns, _ = query("Patrons", self._tables)
+        sql, columns, _ = self._queries.query("Patrons")
         results = self._run_statement(sql)
         output = unpack_query_results(columns, results)
         return output
@@ -477,9 +500,8 @@ class Storage:
         """
         logger.info("Listing all currently borrowed books.")
         try:
-            sql, columns, params = query(
+            sql, columns, params = self._queries.query(
                 "Lending",
-                self._tables,
                 [
                     {
                         "table": "Lending",
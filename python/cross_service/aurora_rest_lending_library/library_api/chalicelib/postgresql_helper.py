@@ -123,7 +123,6 @@ def _make_where_parts(where_clauses):
             to the RDS Data Service.
     """
     sql = ""
-    sql_params = None
     if where_clauses is not None:
         wheres = [
             f"{item['table']}.{item['column']} {item['op']} "
@@ -131,13 +130,24 @@ def _make_where_parts(where_clauses):
             for item in where_clauses
         ]
         sql = f" WHERE {' AND '.join(wheres)}"
-        sql_params = _make_params(
-            {
-                f"{item['table']}_{item['column']}": item["value"]
-                for item in where_clauses
-            }
-        )
-    return sql, sql_params
+    return sql, _make_where_params(where_clauses)
+
+
+def _make_where_params(where_clauses):
+    """
+    Makes the RDS Data Service parameters for a list of WHERE clauses, without
+    generating the WHERE statement itself.
+
+    :param where_clauses: The list of WHERE clause dict definitions, as defined in
+                          the _make_where_parts function.
+    :return: The parameters that can be passed to the RDS Data Service, or None when
+             there are no WHERE clauses.
+    """
+    if where_clauses is None:
+        return None
+    return _make_params(
+        {f"{item['table']}_{item['column']}": item["value"] for item in where_clauses}
+    )
 
 
 def create_table(table):
@@ -225,6 +235,54 @@ def insert_returning(table, value_sets):
     return sql, param_sets
 
 
+def insert_with_lookup(table, lookup_table, lookup_cols, value_sets):
+    """
+    Generates a PostgreSQL INSERT statement that looks up the value of a foreign key
+    column from other columns of the referenced table, instead of taking it as a
+    parameter. This lets rows that reference rows added earlier in the same batch be
+    inserted in a single batch_execute_statement call, without first reading back
+    the generated IDs.
+
+    When more than one row of the referenced table matches, the one with the highest
+    key is used, which is the most recently added row of an auto-increment key.
+
+    :param table: The table where the values are inserted.
+    :param lookup_table: The table referenced by the foreign key column.
+    :param lookup_cols: The names of the columns of the referenced table that
+                        identify the referenced row.
+    :param value_sets: The rows to insert into the table. Each row is a Python dict
+                       where the keys are the names of the columns that are not
+                       looked up, and of the lookup columns prefixed with the name of
+                       the referenced table, such as 'Authors_LastName'.
+    :return: The PostgreSQL INSERT statement and parameter sets that can be passed to
+             the RDS Data Service.
+    """
+    insert_clause = f"INSERT INTO {table.name}"
+    cols = []
+    vals = []
+    for col in table.cols:
+        if col.auto_increment:
+            continue
+        cols.append(col.name)
+        if (
+            col.foreign_key is not None
+            and col.foreign_key.table_name == lookup_table.name
+        ):
+            wheres = [
+                f"{lookup_table.name}.{name}=:{lookup_table.name}_{name}"
+                for name in lookup_cols
+            ]
+            vals.append(
+                f"(SELECT MAX({lookup_table.name}.{col.foreign_key.column_name}) "
+                f"FROM {lookup_table.name} WHERE {' AND '.join(wheres)})"
+            )
+        else:
+            vals.append(f":{col.name}")
+    sql = f"{insert_clause} ({', '.join(cols)}) VALUES ({', '.join(vals)})"
+    param_sets = [_make_params(values) for values in value_sets]
+    return sql, param_sets
+
+
 def insert_without_batch(table, values_clause):
     """
     Generates a PostgreSQL INSERT statement to insert values into a table. A single
@@ -311,6 +369,54 @@ def query(primary_name, tables, where_clauses=None):
     return sql, columns, sql_params
 
 
+class QueryCache:
+    """
+    Caches the SELECT statements and column lists generated by the query function,
+    keyed by the primary table and the shape of the WHERE clauses, which is their
+    tables, columns, and operators but not their values. Only the parameters are
+    made for each call, so repeated queries skip walking the foreign key tree and
+    building the statement.
+    """
+
+    def __init__(self, tables):
+        """
+        :param tables: The full list of tables in the database, as passed to the
+                       query function.
+        """
+        self.tables = tables
+        self._queries = {}
+
+    def query(self, primary_name, where_clauses=None):
+        """
+        Gets a PostgreSQL SELECT statement from the cache, or generates it with the
+        query function the first time it is requested.
+
+        :param primary_name: The name of the primary table to query.
+        :param where_clauses: A list of WHERE clauses that limit the data to retrieve.
+        :return: The PostgreSQL SELECT statement, the list of columns that were
+                 included in the query, and the parameters that can be passed to
+                 the RDS Data Service.
+        """
+        shape = (
+            None
+            if where_clauses is None
+            else tuple(
+                (item["table"], item["column"], item["op"]) for item in where_clauses
+            )
+        )
+        key = (primary_name, shape)
+        cached = self._queries.get(key)
+        if cached is None:
+            sql, columns, sql_params = query(primary_name, self.tables, where_clauses)
+            self._queries[key] = sql, columns
+            return sql, columns, sql_params
+        sql, columns = cached
+        return sql, columns, _make_where_params(where_clauses)
+
+    def __len__(self):
+        return len(self._queries)
+
+
 def unpack_query_results(columns, results):
     """
     Unpacks the result of a SELECT query into a list of Python dicts.
@@ -321,16 +427,41 @@ def unpack_query_results(columns, results):
     :param results: The results returned from the SELECT query.
     :return: The query records as a list of Python dicts.
     """
+    # Look up the value key of each column once instead of once for every field.
+    col_value_keys = [
+        (col_key, VALUE_KEYS[col.data_type]) for col_key, col in columns.items()
+    ]
     output = [
         {
-            col_key: val.get(VALUE_KEYS[col.data_type], None)
-            for col_key, col, val in zip(columns.keys(), columns.values(), record)
+            col_key: val.get(value_key)
+            for (col_key, value_key), val in zip(col_value_keys, record)
         }
         for record in results["records"]
     ]
     return output
 
 
+def unpack_query_columns(columns, results):
+    """
+    Unpacks the result of a SELECT query into a list of values for each column,
+    without making a dict for each record. This is faster and uses less memory than
+    unpack_query_results when a query returns many records and the caller works
+    with whole columns, such as to total or chart them.
+
+    :param columns: The columns that map to the fields in each result record, as
+                    defined in the unpack_query_results function.
+    :param results: The results returned from the SELECT query.
+    :return: A dict that maps each column key to the list of its values, in record
+             order.
+    """
+    records = results["records"]
+    output = {}
+    for index, (col_key, col) in enumerate(columns.items()):
+        value_key = VALUE_KEYS[col.data_type]
+        output[col_key] = [record[index].get(value_key) for record in records]
+    return output
+
+
 def unpack_insert_results(results):
     """
     Unpacks the result of an INSERT statement.
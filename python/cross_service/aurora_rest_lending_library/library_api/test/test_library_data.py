@@ -35,61 +35,96 @@ def test_bootstrap_tables(make_stubber):
     storage.bootstrap_tables()
 
 
-def test_add_books(make_stubber):
+@pytest.mark.parametrize(
+    "batch_size,error_code", [(200, None), (2, None), (2, "TestException")]
+)
+def test_add_books(make_stubber, batch_size, error_code):
     storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
     books = [
         {"title": "Book One", "author": "Francine First"},
         {"title": "Second Book", "author": "Stephanie Second"},
         {"title": "Book One 2 (the sequel)", "author": "Francine First"},
+        {"title": "Third Time", "author": "Theo Third"},
     ]
+    transaction_id = "test-transaction"
     author_sql = (
-        "INSERT INTO Authors (FirstName, LastName) " "VALUES (:FirstName, :LastName)"
+        "INSERT INTO Authors (FirstName, LastName) "
+        "VALUES (:FirstName, :LastName) RETURNING *"
     )
-    authors = {
-        book["author"]: {
-            "FirstName": " ".join(book["author"].split(" ")[:-1]),
-            "LastName": book["author"].split(" ")[-1],
-        }
-        for book in books
-    }
     author_param_sets = [
         [
-            {"name": "FirstName", "value": {"stringValue": author["FirstName"]}},
-            {"name": "LastName", "value": {"stringValue": author["LastName"]}},
+            {"name": "FirstName", "value": {"stringValue": first}},
+            {"name": "LastName", "value": {"stringValue": last}},
+        ]
+        for first, last in [
+            ("Francine", "First"),
+            ("Stephanie", "Second"),
+            ("Theo", "Third"),
         ]
-        for author in authors.values()
     ]
-    author_generated_field_sets = [[1], [2]]
-    book_sql = "INSERT INTO Books (Title, AuthorID) VALUES (:Title, :AuthorID)"
+    book_sql = (
+        "INSERT INTO Books (Title, AuthorID) VALUES (:Title, "
+        "(SELECT MAX(Authors.AuthorID) FROM Authors "
+        "WHERE Authors.FirstName=:Authors_FirstName "
+        "AND Authors.LastName=:Authors_LastName))"
+    )
     book_param_sets = [
         [
             {"name": "Title", "value": {"stringValue": book["title"]}},
-            {"name": "AuthorID", "value": {"longValue": author_id}},
+            {
+                "name": "Authors_FirstName",
+                "value": {"stringValue": book["author"].split(" ")[0]},
+            },
+            {
+                "name": "Authors_LastName",
+                "value": {"stringValue": book["author"].split(" ")[1]},
+            },
         ]
-        for book, author_id in zip(books, [1, 2, 1])
+        for book in books
     ]
-    book_generated_field_sets = [[11], [22], [33]]
 
-    rdsdata_stubber.stub_batch_execute_statement(
-        CLUSTER_ARN,
-        SECRET_ARN,
-        DB_NAME,
-        author_sql,
-        sql_param_sets=author_param_sets,
-        generated_field_sets=author_generated_field_sets,
-    )
-    rdsdata_stubber.stub_batch_execute_statement(
-        CLUSTER_ARN,
-        SECRET_ARN,
-        DB_NAME,
-        book_sql,
-        sql_param_sets=book_param_sets,
-        generated_field_sets=book_generated_field_sets,
+    rdsdata_stubber.stub_begin_transaction(
+        CLUSTER_ARN, SECRET_ARN, DB_NAME, transaction_id
     )
+    for index in range(0, len(author_param_sets), batch_size):
+        batch = author_param_sets[index : index + batch_size]
+        rdsdata_stubber.stub_batch_execute_statement(
+            CLUSTER_ARN,
+            SECRET_ARN,
+            DB_NAME,
+            author_sql,
+            sql_param_sets=batch,
+            generated_field_sets=[[]] * len(batch),
+            transaction_id=transaction_id,
+        )
+    for index in range(0, len(book_param_sets), batch_size):
+        batch = book_param_sets[index : index + batch_size]
+        rdsdata_stubber.stub_batch_execute_statement(
+            CLUSTER_ARN,
+            SECRET_ARN,
+            DB_NAME,
+            book_sql,
+            sql_param_sets=batch,
+            generated_field_sets=[[]] * len(batch),
+            transaction_id=transaction_id,
+            error_code=error_code,
+        )
+        if error_code is not None:
+            rdsdata_stubber.stub_rollack_transaction(
+                CLUSTER_ARN, SECRET_ARN, transaction_id
+            )
+            break
+    else:
+        rdsdata_stubber.stub_commit_transaction(CLUSTER_ARN, SECRET_ARN, transaction_id)
 
-    author_count, book_count = storage.add_books(books)
-    assert author_count == 2
-    assert book_count == 3
+    if error_code is None:
+        author_count, book_count = storage.add_books(books, batch_size)
+        assert author_count == 3
+        assert book_count == 4
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            storage.add_books(books, batch_size)
+        assert exc_info.value.response["Error"]["Code"] == error_code
 
 
 @pytest.mark.parametrize(
@@ -130,6 +165,34 @@ def test_get_books(make_stubber, author_id, error_code):
             assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+def test_get_books_reuses_query(make_stubber):
+    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
+    sql = (
+        "SELECT Books.BookID, Books.Title, Authors.AuthorID, "
+        "Authors.FirstName, Authors.LastName FROM Books "
+        "INNER JOIN Authors ON Books.AuthorID=Authors.AuthorID"
+        " WHERE Authors.AuthorID = :Authors_AuthorID"
+    )
+    author_ids = [13, 14, 13]
+
+    for author_id in author_ids:
+        rdsdata_stubber.stub_execute_statement(
+            CLUSTER_ARN,
+            SECRET_ARN,
+            DB_NAME,
+            sql,
+            sql_params=[
+                {"name": "Authors_AuthorID", "value": {"longValue": author_id}}
+            ],
+            records=[[1, "Title One", author_id, "Freddy", "Fake"]],
+        )
+
+    for author_id in author_ids:
+        got_books = storage.get_books(author_id)
+        assert got_books[0]["Authors.AuthorID"] == author_id
+    assert len(storage._queries) == 1
+
+
 @pytest.mark.parametrize(
     "error_code,stop_on_method",
     [(None, None), ("TestException", "stub_execute_statement")],
@@ -7,6 +7,8 @@ Unit tests for mysql_helper.py functions.
 
 import datetime
 
+import pytest
+
 import chalicelib.mysql_helper as mysql_helper
 from chalicelib.mysql_helper import Column, ForeignKey, Table
 
@@ -188,6 +190,25 @@ def test_unpack_query():
     assert output == [{"test1": "Hello", "test2": 13}]
 
 
+@pytest.mark.parametrize(
+    "records,expected",
+    [
+        (
+            [
+                [{"stringValue": "Hello"}, {"longValue": 13}],
+                [{"isNull": True}, {"longValue": 14}],
+            ],
+            {"test1": ["Hello", None], "test2": [13, 14]},
+        ),
+        ([], {"test1": [], "test2": []}),
+    ],
+)
+def test_unpack_query_columns(records, expected):
+    columns = {"test1": Column("test1", str), "test2": Column("test2", int)}
+    output = mysql_helper.unpack_query_columns(columns, {"records": records})
+    assert output == expected
+
+
 def test_unpack_insert_results():
     results = {"generatedFields": [{"longValue": 88}]}
     assert mysql_helper.unpack_insert_results(results) == 88
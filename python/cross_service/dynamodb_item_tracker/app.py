@@ -41,6 +41,13 @@ def create_app(test_config=None):
     * SECRET_KEY The secret key Flask uses for sessions. Change this temporary value
       to a secret value for production.
 
+    Optionally, you can also specify the following:
+
+    * SCAN_SEGMENTS The number of segments to scan in parallel when work items
+      are listed.
+    * ARCHIVED_INDEX_NAME The name of a global secondary index that is used to query
+      for active or archived work items instead of scanning the table.
+
     :param test_config: Configuration to use for testing.
     """
     app = Flask(__name__)
@@ -66,7 +73,11 @@ def create_app(test_config=None):
         dynamodb_resource = boto3.resource("dynamodb")
         ses_client = boto3.client("ses")
     table = dynamodb_resource.Table(app.config["TABLE_NAME"])
-    storage = Storage(table)  # pylint: disable=E1120
+    storage = Storage(
+        table,
+        scan_segments=app.config.get("SCAN_SEGMENTS", 1),
+        archived_index=app.config.get("ARCHIVED_INDEX_NAME"),
+    )
 
     item_list_view = ItemList.as_view("item_list_api", storage)
     report_view = Report.as_view("report_api", storage, sender_email, ses_client)
@@ -3,3 +3,8 @@
 TABLE_NAME = "NEED-TABLE-NAME"
 SENDER_EMAIL = "NEED-SENDER-EMAIL"
 SECRET_KEY = "change-for-production!"
+# The number of segments to scan in parallel when work items are listed.
+SCAN_SEGMENTS = 1
+# The name of a global secondary index that has a String partition key named
+# 'archivedkey'. When specified, active or archived items are queried from the index.
+ARCHIVED_INDEX_NAME = None
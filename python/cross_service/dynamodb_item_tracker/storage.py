@@ -9,13 +9,18 @@ in a table.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Global secondary index keys can't be Boolean, so when an archived index is used the
+# archived flag is also stored as the string 'true' or 'false' in this attribute.
+ARCHIVED_INDEX_KEY = "archivedkey"
+
 
 class StorageError(Exception):
     pass
@@ -26,29 +31,42 @@ class Storage:
     Encapsulates work item data in a DynamoDB table.
     """
 
-    def __init__(self, table):
+    def __init__(self, table, scan_segments=1, max_workers=None, archived_index=None):
         """
         :param table: A Boto3 DynamoDB Table object that represents an existing DynamoDB
                       table. This object is a high-level object that wraps low-level
                       DynamoDB service actions.
+        :param scan_segments: The number of segments to divide the table into when it
+                              is scanned. Segments are scanned in parallel.
+        :param max_workers: The maximum number of segments to scan at the same time.
+                            Defaults to the number of segments.
+        :param archived_index: The name of a global secondary index that has a
+                               partition key named ARCHIVED_INDEX_KEY. When specified,
+                               archived or non-archived work items are queried from
+                               the index instead of scanned from the table.
         """
         self.table = table
+        self.scan_segments = scan_segments
+        self.max_workers = max_workers or scan_segments
+        self.archived_index = archived_index
 
     def get_work_items(self, archived=None):
         """
-        Gets work items currently stored in the table.
+        Gets work items currently stored in the table. All pages of results are
+        returned.
 
         :param archived: When specified, only archived or non-archived work items are
                          returned. Otherwise, all work items are returned.
         :return: A list of work items currently stored in the table.
         """
         try:
-            if archived is None:
-                work_items = self.table.scan().get("Items", [])
+            if archived is not None and self.archived_index is not None:
+                work_items = self._query_archived(archived)
             else:
-                work_items = self.table.scan(
-                    FilterExpression=Attr("archived").eq(archived)
-                ).get("Items", [])
+                scan_kwargs = {"TableName": self.table.name}
+                if archived is not None:
+                    scan_kwargs["FilterExpression"] = Attr("archived").eq(archived)
+                work_items = self._scan(scan_kwargs)
         except ClientError as err:
             logger.exception(
                 "Couldn't get items from table %s with archived %s.",
@@ -59,6 +77,53 @@ class Storage:
         else:
             return work_items
 
+    def _scan(self, scan_kwargs):
+        """
+        Scans the table. When the table is divided into more than one segment, the
+        segments are scanned in parallel on a thread pool. The low-level client is
+        used because, unlike the Table resource, it can be shared by threads.
+
+        :param scan_kwargs: The arguments to pass to each scan request.
+        :return: The items of all segments.
+        """
+        paginator = self.table.meta.client.get_paginator("scan")
+
+        def scan_segment(segment):
+            segment_kwargs = dict(scan_kwargs)
+            if self.scan_segments > 1:
+                segment_kwargs.update(Segment=segment, TotalSegments=self.scan_segments)
+            return [
+                item
+                for page in paginator.paginate(**segment_kwargs)
+                for item in page.get("Items", [])
+            ]
+
+        if self.scan_segments == 1:
+            return scan_segment(0)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            segments = executor.map(scan_segment, range(self.scan_segments))
+            return [item for segment_items in segments for item in segment_items]
+
+    def _query_archived(self, archived):
+        """
+        Queries the archived index for archived or non-archived work items.
+
+        :param archived: Whether to get archived or non-archived work items.
+        :return: The work items.
+        """
+        paginator = self.table.meta.client.get_paginator("query")
+        return [
+            item
+            for page in paginator.paginate(
+                TableName=self.table.name,
+                IndexName=self.archived_index,
+                KeyConditionExpression=Key(ARCHIVED_INDEX_KEY).eq(
+                    str(archived).lower()
+                ),
+            )
+            for item in page.get("Items", [])
+        ]
+
     def get_work_item(self, iditem):
         """
         Gets a single work item from the table.
@@ -80,11 +145,14 @@ class Storage:
         """
         Adds or updates an item in the table. When the item contains an iditem field, it
         is updated. Otherwise, it is added. When an item is added, a UUID is generated
-        as its ID.
+        as its ID. When an archived index is used, the archived flag is also stored in
+        the index key attribute.
 
         :param item: The item to add or update.
         :return: The ID of the item.
         """
+        if self.archived_index is not None and item.get("archived") is not None:
+            item[ARCHIVED_INDEX_KEY] = str(item["archived"]).lower()
         try:
             if item.get("iditem") is None:
                 item["iditem"] = str(uuid4())
@@ -99,6 +99,53 @@ def test_get_items_error(mock_mgr):
         assert "A storage error occurred" in rv.json
 
 
+def test_get_items_parallel_scan(mock_mgr):
+    table_storage = Storage(mock_mgr.table, scan_segments=2, max_workers=1)
+    start_key = {"iditem": mock_mgr.data_items[0]["iditem"]}
+    with mock_mgr.stub_runner(None, None) as runner:
+        runner.add(
+            mock_mgr.stubber.stub_scan,
+            mock_mgr.table.name,
+            mock_mgr.data_items[:1],
+            last_key={"iditem": {"S": start_key["iditem"]}},
+            segment=0,
+            total_segments=2,
+        )
+        runner.add(
+            mock_mgr.stubber.stub_scan,
+            mock_mgr.table.name,
+            mock_mgr.data_items[1:2],
+            start_key=start_key,
+            segment=0,
+            total_segments=2,
+        )
+        runner.add(
+            mock_mgr.stubber.stub_scan,
+            mock_mgr.table.name,
+            mock_mgr.data_items[2:],
+            segment=1,
+            total_segments=2,
+        )
+
+    assert table_storage.get_work_items() == mock_mgr.data_items
+
+
+@pytest.mark.parametrize("archived", [True, False])
+def test_get_items_archived_index(mock_mgr, archived):
+    table_storage = Storage(mock_mgr.table, archived_index="archived-index")
+    items = [item for item in mock_mgr.data_items if item["archived"] == archived]
+    with mock_mgr.stub_runner(None, None) as runner:
+        runner.add(
+            mock_mgr.stubber.stub_query,
+            mock_mgr.table.name,
+            items,
+            key_condition=ANY,
+            index_name="archived-index",
+        )
+
+    assert table_storage.get_work_items(archived) == items
+
+
 def test_get_item(mock_mgr):
     with mock_mgr.stub_runner(None, None) as runner:
         runner.add(
@@ -148,6 +195,22 @@ def test_post_item(mock_mgr, monkeypatch):
         assert mock_mgr.web_items[1]["id"] == rv.json
 
 
+def test_add_item_archived_index(mock_mgr, monkeypatch):
+    table_storage = Storage(mock_mgr.table, archived_index="archived-index")
+    item = mock_mgr.data_items[1].copy()
+    with mock_mgr.stub_runner(None, None) as runner:
+        runner.add(
+            mock_mgr.stubber.stub_put_item,
+            mock_mgr.table.name,
+            {**item, storage.ARCHIVED_INDEX_KEY: "true"},
+        )
+
+    iditem = item.pop("iditem")
+    monkeypatch.setattr(storage, "uuid4", lambda: iditem)
+
+    assert table_storage.add_or_update_work_item(item) == iditem
+
+
 def test_post_item_error(mock_mgr, monkeypatch):
     with mock_mgr.stub_runner("TestException", 0) as runner:
         runner.add(
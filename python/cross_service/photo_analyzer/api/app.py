@@ -18,12 +18,14 @@ import logging
 
 import boto3
 from analysis import Analysis
+from botocore.config import Config
 from flask import Flask
 from flask_cors import CORS
 from flask_restful import Api
 from photo import Photo
 from photo_list import PhotoList
 from report import Report
+from report_engine import ReportEngine
 
 logger = logging.getLogger(__name__)
 
@@ -56,8 +58,13 @@ def create_app(test_config=None):
     api = Api(app)
 
     bucket = boto3.resource("s3").Bucket(app.config.get("BUCKET_NAME"))
-    rekognition_client = boto3.client("rekognition")
+    report_workers = app.config.get("REPORT_WORKERS", 8)
+    # Each photo that is analyzed at the same time holds a connection.
+    rekognition_client = boto3.client(
+        "rekognition", config=Config(max_pool_connections=report_workers)
+    )
     ses_client = boto3.client("ses")
+    report_engine = ReportEngine(bucket, rekognition_client, report_workers)
 
     api.add_resource(PhotoList, "/photos", resource_class_args=(bucket,))
     api.add_resource(Photo, "/photos/<string:photo_key>", resource_class_args=(bucket,))
@@ -69,7 +76,7 @@ def create_app(test_config=None):
     api.add_resource(
         Report,
         "/photos/report",
-        resource_class_args=(bucket, rekognition_client, ses_client),
+        resource_class_args=(bucket, rekognition_client, ses_client, report_engine),
     )
 
     return app
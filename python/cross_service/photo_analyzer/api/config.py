@@ -2,3 +2,5 @@
 # SPDX-License-Identifier: Apache-2.0
 BUCKET_NAME = "NEED-BUCKET-NAME"
 SECRET_KEY = "change-for-production!"
+# The number of photos that are analyzed at the same time when a report is created.
+REPORT_WORKERS = 8
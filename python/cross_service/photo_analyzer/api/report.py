@@ -1,10 +1,11 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import json
 import logging
 
 from botocore.exceptions import ClientError
-from flask import render_template
+from flask import Response, render_template, request
 from flask_restful import Resource, reqparse
 
 logger = logging.getLogger(__name__)
@@ -16,52 +17,37 @@ class Report(Resource):
     Amazon Simple Storage Service (Amazon S3) bucket and send emails about them.
     """
 
-    def __init__(self, photo_bucket, rekognition_client, ses_client):
+    def __init__(self, photo_bucket, rekognition_client, ses_client, report_engine):
         """
         :param photo_bucket: The S3 bucket where your photos are stored.
         :param rekognition_client: A Boto3 Amazon Rekognition client.
         :param ses_client: A Boto3 Amazon Simple Email Service (Amazon SES) client.
+        :param report_engine: The engine that analyzes the photos. Flask-RESTful
+                              creates a Report for each request, so the engine is
+                              created once by the application and shared, which
+                              reuses its thread pool and label cache.
         """
         self.photo_bucket = photo_bucket
         self.rekognition_client = rekognition_client
         self.ses_client = ses_client
+        self.report_engine = report_engine
 
     def get(self):
         """
-        Uses Amazon Rekognition to analyze all images in your S3 bucket and returns a
-        report as a list of comma-separated value (CSV) records.
+        Uses Amazon Rekognition to analyze all images in your S3 bucket and streams a
+        report of comma-separated value (CSV) records. Photos are analyzed in
+        parallel and photos that have not changed since an earlier report are not
+        analyzed again.
 
-        :return: The CSV report and an HTTP code.
+        Query parameters:
+            format: When `csv`, the report is streamed as a text/csv document.
+                    Otherwise, it is streamed as a JSON list of CSV records.
+
+        :return: The streamed report, or None and an HTTP code when the photos in the
+                 bucket can't be listed.
         """
-        result = 200
-        report_csv = ["Photo,Label,Confidence"]
         try:
-            for photo in self.photo_bucket.objects.all():
-                try:
-                    response = self.rekognition_client.detect_labels(
-                        Image={
-                            "S3Object": {
-                                "Bucket": self.photo_bucket.name,
-                                "Name": photo.key,
-                            }
-                        }
-                    )
-                    logger.info(
-                        "Found %s labels in %s.", len(response["Labels"]), photo.key
-                    )
-                    for label in response.get("Labels", []):
-                        report_csv.append(
-                            ",".join(
-                                (photo.key, label["Name"], str(label["Confidence"]))
-                            )
-                        )
-                except ClientError as err:
-                    logger.warning(
-                        "Couldn't detect labels in %s. Here's why: %s: %s",
-                        photo.key,
-                        err.response["Error"]["Code"],
-                        err.response["Error"]["Message"],
-                    )
+            photos = self.report_engine.list_photos()
         except ClientError as err:
             logger.error(
                 "Couldn't list photos in bucket '%s'. Here's why: %s: %s",
@@ -69,8 +55,19 @@ class Report(Resource):
                 err.response["Error"]["Code"],
                 err.response["Error"]["Message"],
             )
-            result = 400
-        return report_csv, result
+            return None, 400
+
+        records = self.report_engine.iter_records(photos)
+        if request.args.get("format") == "csv":
+            return Response((f"{record}\n" for record in records), mimetype="text/csv")
+
+        def json_records():
+            yield "["
+            for index, record in enumerate(records):
+                yield f"{',' if index else ''}{json.dumps(record)}"
+            yield "]"
+
+        return Response(json_records(), mimetype="application/json")
 
     def post(self):
         """
@@ -0,0 +1,157 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+REPORT_HEADER = "Photo,Label,Confidence"
+
+
+class LabelCache:
+    """
+    A thread-safe, least-recently-used cache of the labels that Amazon Rekognition
+    detected in a photo, keyed by the ETag of the photo object. An ETag changes when
+    the content of an object changes, so a cached entry is never stale.
+    """
+
+    def __init__(self, max_size=10000):
+        """
+        :param max_size: The maximum number of photos to keep labels for.
+        """
+        self.max_size = max_size
+        self._labels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, e_tag):
+        with self._lock:
+            labels = self._labels.get(e_tag)
+            if labels is not None:
+                self._labels.move_to_end(e_tag)
+            return labels
+
+    def put(self, e_tag, labels):
+        with self._lock:
+            self._labels[e_tag] = labels
+            self._labels.move_to_end(e_tag)
+            while len(self._labels) > self.max_size:
+                self._labels.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._labels)
+
+
+class ReportEngine:
+    """
+    Builds reports of the labels that Amazon Rekognition detects in the photos in an
+    Amazon Simple Storage Service (Amazon S3) bucket. Photos are analyzed by a
+    bounded pool of threads and the labels are cached by ETag, so photos that have
+    not changed since the last report are not analyzed again.
+
+    An engine is meant to live as long as the application, so that its thread pool
+    and cache are shared by all report requests.
+    """
+
+    def __init__(self, photo_bucket, rekognition_client, max_workers=8, cache=None):
+        """
+        :param photo_bucket: The S3 bucket where your photos are stored.
+        :param rekognition_client: A Boto3 Amazon Rekognition client. Its connection
+                                   pool should have at least max_workers connections.
+        :param max_workers: The maximum number of photos to analyze at the same time.
+        :param cache: The cache of labels. A new cache is created when not specified.
+        """
+        self.photo_bucket = photo_bucket
+        self.rekognition_client = rekognition_client
+        self.max_workers = max_workers
+        self.cache = LabelCache() if cache is None else cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def list_photos(self):
+        """
+        Lists the photos in the bucket.
+
+        :return: The list of (key, ETag) pairs of the photo objects.
+        """
+        return [(photo.key, photo.e_tag) for photo in self.photo_bucket.objects.all()]
+
+    def detect_labels(self, photo_key, e_tag=None):
+        """
+        Gets the labels of a photo, from the cache when the photo has been analyzed
+        before, and otherwise from Amazon Rekognition.
+
+        :param photo_key: The key of the photo object in the bucket.
+        :param e_tag: The ETag of the photo object. When not specified, the labels
+                      are not cached.
+        :return: The list of labels, or an empty list when the photo can't be
+                 analyzed.
+        """
+        if e_tag is not None:
+            labels = self.cache.get(e_tag)
+            if labels is not None:
+                logger.info("Got %s cached labels for %s.", len(labels), photo_key)
+                return labels
+        try:
+            response = self.rekognition_client.detect_labels(
+                Image={
+                    "S3Object": {"Bucket": self.photo_bucket.name, "Name": photo_key}
+                }
+            )
+        except ClientError as err:
+            logger.warning(
+                "Couldn't detect labels in %s. Here's why: %s: %s",
+                photo_key,
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            return []
+        labels = [
+            (label["Name"], label["Confidence"]) for label in response.get("Labels", [])
+        ]
+        logger.info("Found %s labels in %s.", len(labels), photo_key)
+        if e_tag is not None:
+            self.cache.put(e_tag, labels)
+        return labels
+
+    def iter_records(self, photos):
+        """
+        Analyzes photos on the thread pool and yields the report as comma-separated
+        value (CSV) records, starting with a header record. Records are yielded in
+        the order of the photos, as soon as each photo is analyzed. No more than
+        twice max_workers photos are queued at a time, and queued photos are
+        cancelled when the caller stops iterating.
+
+        :param photos: The list of (key, ETag) pairs of the photos to analyze.
+        :return: A generator of CSV records.
+        """
+        yield REPORT_HEADER
+        photos = iter(photos)
+        pending = deque()
+        try:
+            while True:
+                for photo_key, e_tag in photos:
+                    pending.append(
+                        (
+                            photo_key,
+                            self._executor.submit(self.detect_labels, photo_key, e_tag),
+                        )
+                    )
+                    if len(pending) >= self.max_workers * 2:
+                        break
+                if not pending:
+                    break
+                photo_key, future = pending.popleft()
+                for name, confidence in future.result():
+                    yield ",".join((photo_key, name, str(confidence)))
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        """Shuts down the thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
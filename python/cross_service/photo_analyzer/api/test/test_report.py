@@ -5,14 +5,35 @@
 Unit tests for report.py
 """
 
+import json
+import time
 from unittest.mock import MagicMock
 
 import boto3
 import pytest
+from flask import Flask
 from report import Report
+from report_engine import ReportEngine
 from flask_restful import reqparse
 
 
+def make_labels(photos):
+    labels = {}
+    for index, photo in enumerate(photos):
+        label = MagicMock(confidence=index, instances=[], parents=[])
+        label.name = f"label-{index}"
+        labels[photo] = [label]
+    return labels
+
+
+def get_report(report, query=""):
+    with Flask(__name__).test_request_context(f"/photos/report{query}"):
+        got = report.get()
+    if isinstance(got, tuple):
+        return got
+    return got.get_data(as_text=True), got.status_code
+
+
 @pytest.mark.parametrize(
     "error_code, stop_on_method",
     [
@@ -27,17 +48,14 @@ def test_get_report(make_stubber, stub_runner, error_code, stop_on_method):
     rekognition_client = boto3.client("rekognition")
     rekognition_stubber = make_stubber(rekognition_client)
     bucket = s3_resource.Bucket("test-bucket")
-    report = Report(bucket, rekognition_client, None)
+    engine = ReportEngine(bucket, rekognition_client, max_workers=1)
+    report = Report(bucket, rekognition_client, None, engine)
     photos = [f"photo-{index}" for index in range(3)]
-    labels = {}
-    for index, photo in enumerate(photos):
-        label = MagicMock(confidence=index, instances=[], parents=[])
-        label.name = f"label-{index}"
-        labels[photo] = [label]
+    labels = make_labels(photos)
 
     with stub_runner(error_code, stop_on_method) as runner:
         runner.add(s3_stubber.stub_list_objects, bucket.name, photos)
-        for photo, label in zip(photos, labels):
+        for photo in photos:
             runner.add(
                 rekognition_stubber.stub_detect_labels,
                 {"S3Object": {"Bucket": bucket.name, "Name": photo}},
@@ -46,22 +64,85 @@ def test_get_report(make_stubber, stub_runner, error_code, stop_on_method):
                 raise_and_continue=True,
             )
 
-    got_report, result = report.get()
+    got_report, result = get_report(report)
     if error_code is None:
-        assert got_report[1:] == [
+        assert json.loads(got_report) == ["Photo,Label,Confidence"] + [
             ",".join((photo, label[0].name, str(label[0].confidence)))
             for photo, label in labels.items()
         ]
         assert result == 200
     elif stop_on_method == "stub_list_objects":
         assert result == 400
+    else:
+        assert json.loads(got_report) == ["Photo,Label,Confidence"]
+        assert result == 200
+
+
+def test_get_report_csv_uses_cache(make_stubber):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    rekognition_client = boto3.client("rekognition")
+    rekognition_stubber = make_stubber(rekognition_client)
+    bucket = s3_resource.Bucket("test-bucket")
+    engine = ReportEngine(bucket, rekognition_client, max_workers=1)
+    photos = [f"photo-{index}" for index in range(3)]
+    e_tags = ['"etag-0"', '"etag-1"', '"etag-2"']
+    labels = make_labels(photos)
+    expected = "".join(
+        f"{record}\n"
+        for record in ["Photo,Label,Confidence"]
+        + [
+            ",".join((photo, label[0].name, str(label[0].confidence)))
+            for photo, label in labels.items()
+        ]
+    )
+
+    s3_stubber.stub_list_objects(bucket.name, photos, e_tags=e_tags)
+    for photo in photos:
+        rekognition_stubber.stub_detect_labels(
+            {"S3Object": {"Bucket": bucket.name, "Name": photo}}, None, labels[photo]
+        )
+    # The second report lists the photos again, but gets the labels from the cache.
+    s3_stubber.stub_list_objects(bucket.name, photos, e_tags=e_tags)
+
+    for _ in range(2):
+        got_report, result = get_report(
+            Report(bucket, rekognition_client, None, engine), "?format=csv"
+        )
+        assert got_report == expected
+        assert result == 200
+    assert len(engine.cache) == 3
+
+
+def test_iter_records_is_ordered_and_bounded():
+    rekognition_client = MagicMock()
+    in_flight = []
+    max_in_flight = []
+
+    def detect_labels(Image):
+        key = Image["S3Object"]["Name"]
+        in_flight.append(key)
+        max_in_flight.append(len(in_flight))
+        time.sleep(0.001 * (hash(key) % 5))
+        in_flight.remove(key)
+        return {"Labels": [{"Name": f"label-{key}", "Confidence": 90.0}]}
+
+    rekognition_client.detect_labels.side_effect = detect_labels
+    engine = ReportEngine(MagicMock(), rekognition_client, max_workers=4)
+    photos = [(f"photo-{index}", f"etag-{index}") for index in range(50)]
+
+    records = list(engine.iter_records(photos))
+    engine.shutdown()
+
+    assert records[1:] == [f"{key},label-{key},90.0" for key, _ in photos]
+    assert max(max_in_flight) <= 4
 
 
 @pytest.mark.parametrize("error_code", [None, "TestException"])
 def test_post_report(make_stubber, monkeypatch, error_code):
     ses_client = boto3.client("ses")
     ses_stubber = make_stubber(ses_client)
-    report = Report(None, None, ses_client)
+    report = Report(None, None, ses_client, None)
 
     post_args = {
         "sender": "test-sender",
@@ -3,13 +3,20 @@
 
 import json
 import logging
-from typing import Any, Dict
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List
 
 import boto3
 from botocore.exceptions import ClientError
 
 log = logging.getLogger(__name__)
 
+# The maximum number of items in a single BatchWriteItem request.
+BATCH_WRITE_LIMIT = 25
+
 
 class RecommendationServiceError(Exception):
     """
@@ -28,6 +35,52 @@ class RecommendationServiceError(Exception):
         super().__init__(self.message)
 
 
+def iter_json_array(data: IO[str], chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Yields each element of a JSON array from a file, reading the file in chunks
+    instead of loading all of it into memory.
+
+    :param data: A file that contains a JSON array.
+    :param chunk_size: The number of characters to read from the file at a time.
+    :return: A generator of the decoded elements of the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    at_eof = False
+    in_array = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer and not in_array:
+            if buffer[0] != "[":
+                raise ValueError("The data file does not contain a JSON array.")
+            buffer = buffer[1:]
+            in_array = True
+            continue
+        if buffer[:1] == "]":
+            return
+        if buffer[:1] == ",":
+            buffer = buffer[1:]
+            continue
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+            else:
+                # An element is complete when it is followed by a separator. Without
+                # this check, a number that continues in the next chunk is cut short.
+                if buffer[end:].lstrip()[:1] in (",", "]"):
+                    yield item
+                    buffer = buffer[end:]
+                    continue
+        if at_eof:
+            raise ValueError("The JSON array in the data file is not complete.")
+        chunk = data.read(chunk_size)
+        at_eof = not chunk
+        buffer += chunk
+
+
 # snippet-start:[python.example_code.workflow.ResilientService_RecommendationService]
 class RecommendationService:
     """
@@ -82,25 +135,98 @@ class RecommendationService:
         else:
             return response
 
-    def populate(self, data_file: str) -> None:
+    def populate(
+        self, data_file: str, max_workers: int = 4, max_attempts: int = 8
+    ) -> Dict[str, float]:
         """
-        Populates the recommendations table from a JSON file.
+        Populates the recommendations table from a JSON file. The file is read as a
+        stream and its items are written in batches of 25 by a pool of threads. Items
+        that DynamoDB returns as unprocessed are written again with backoff.
 
         :param data_file: The path to the data file.
+        :param max_workers: The maximum number of batches to write at the same time.
+        :param max_attempts: The maximum number of times to write a batch.
+        :return: The number of items written, the number of seconds it took, and the
+                 number of items written per second.
         :raises RecommendationServiceError: If the table population fails.
         """
+        start = time.perf_counter()
+        item_count = 0
         try:
-            with open(data_file) as data:
-                items = json.load(data)
-            batch = [{"PutRequest": {"Item": item}} for item in items]
-            self.dynamodb_client.batch_write_item(RequestItems={self.table_name: batch})
-            log.info(
-                "Populated table %s with items from %s.", self.table_name, data_file
-            )
+            with open(data_file) as data, ThreadPoolExecutor(max_workers) as executor:
+                pending = set()
+                for batch in self._iter_batches(iter_json_array(data)):
+                    if len(pending) >= max_workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        item_count += sum(future.result() for future in done)
+                    pending.add(executor.submit(self._write_batch, batch, max_attempts))
+                item_count += sum(future.result() for future in pending)
         except ClientError as err:
             raise RecommendationServiceError(
                 self.table_name, f"Couldn't populate table from {data_file}: {err}"
             )
+        seconds = time.perf_counter() - start
+        stats = {
+            "items": item_count,
+            "seconds": seconds,
+            "items_per_second": item_count / seconds if seconds else 0.0,
+        }
+        log.info(
+            "Populated table %s with %s items from %s at %.1f items/s.",
+            self.table_name,
+            item_count,
+            data_file,
+            stats["items_per_second"],
+        )
+        return stats
+
+    @staticmethod
+    def _iter_batches(items: Iterable[Dict[str, Any]]) -> Iterator[List[Dict]]:
+        """
+        Groups items into lists of put requests that fit in one BatchWriteItem request.
+
+        :param items: The items to put.
+        :return: A generator of lists of put requests.
+        """
+        items = iter(items)
+        while batch := [
+            {"PutRequest": {"Item": item}} for item in islice(items, BATCH_WRITE_LIMIT)
+        ]:
+            yield batch
+
+    def _write_batch(
+        self, requests: List[Dict], max_attempts: int, base_delay: float = 0.05
+    ) -> int:
+        """
+        Writes a batch of put requests, and writes unprocessed requests again with
+        exponential backoff and jitter until all are processed.
+
+        :param requests: The put requests to write.
+        :param max_attempts: The maximum number of times to write the batch.
+        :param base_delay: The number of seconds to wait before the first retry.
+        :return: The number of requests that were written.
+        :raises RecommendationServiceError: If requests are still unprocessed after
+                                            the last attempt.
+        """
+        remaining = requests
+        for attempt in range(max_attempts):
+            response = self.dynamodb_client.batch_write_item(
+                RequestItems={self.table_name: remaining}
+            )
+            remaining = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            if not remaining:
+                return len(requests)
+            log.info(
+                "%s items were unprocessed by table %s, retrying.",
+                len(remaining),
+                self.table_name,
+            )
+            time.sleep(random.uniform(0, base_delay * 2**attempt))
+        raise RecommendationServiceError(
+            self.table_name,
+            f"{len(remaining)} items were still unprocessed after {max_attempts} "
+            f"attempts.",
+        )
 
     def destroy(self) -> None:
         """
@@ -0,0 +1,99 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for populating the recommendations table in recommendation_service.py.
+
+Batches are written from several threads at once, so these tests use a thread-safe
+fake client instead of a stubber, which expects calls in a set order.
+"""
+
+import io
+import json
+import threading
+
+import pytest
+
+from recommendation_service import (
+    RecommendationService,
+    RecommendationServiceError,
+    iter_json_array,
+)
+
+
+class FakeDynamoDBClient:
+    def __init__(self, unprocessed_per_call=0):
+        """
+        :param unprocessed_per_call: The number of items to return as unprocessed from
+                                     each call that writes more than five items.
+        """
+        self.unprocessed_per_call = unprocessed_per_call
+        self.lock = threading.Lock()
+        self.batch_sizes = []
+        self.written = []
+
+    def batch_write_item(self, RequestItems):
+        ((table_name, requests),) = RequestItems.items()
+        assert len(requests) <= 25
+        # Returns the first items as unprocessed, so that small retries succeed.
+        skip = self.unprocessed_per_call if len(requests) > 5 else 0
+        with self.lock:
+            self.batch_sizes.append(len(requests))
+            unprocessed = requests[:skip]
+            self.written += [
+                request["PutRequest"]["Item"] for request in requests[skip:]
+            ]
+        if unprocessed:
+            return {"UnprocessedItems": {table_name: unprocessed}}
+        return {"UnprocessedItems": {}}
+
+
+def make_items(count):
+    return [
+        {
+            "MediaType": {"S": "Book"},
+            "ItemId": {"N": str(index)},
+            "Title": {"S": f"Title {index}"},
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_json_array(chunk_size):
+    items = make_items(10) + [1, 2.5, "text", None, [1, [2]]]
+    data = io.StringIO(json.dumps(items, indent=2))
+
+    assert list(iter_json_array(data, chunk_size)) == items
+
+
+@pytest.mark.parametrize("data", ["", "{}", "[1, 2", "[1 2]"])
+def test_iter_json_array_bad_data(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(data), 1))
+
+
+@pytest.mark.parametrize("item_count,unprocessed_per_call", [(0, 0), (130, 0), (60, 3)])
+def test_populate(tmp_path, item_count, unprocessed_per_call):
+    items = make_items(item_count)
+    data_file = tmp_path / "recommendations.json"
+    data_file.write_text(json.dumps(items))
+    client = FakeDynamoDBClient(unprocessed_per_call)
+    service = RecommendationService("test-table", client)
+
+    stats = service.populate(str(data_file), max_workers=3)
+
+    assert stats["items"] == item_count
+    assert sorted(client.written, key=lambda item: int(item["ItemId"]["N"])) == items
+    assert all(size <= 25 for size in client.batch_sizes)
+
+
+def test_populate_gives_up(tmp_path):
+    data_file = tmp_path / "recommendations.json"
+    data_file.write_text(json.dumps(make_items(10)))
+    client = FakeDynamoDBClient(unprocessed_per_call=10)
+    service = RecommendationService("test-table", client)
+
+    with pytest.raises(RecommendationServiceError):
+        service.populate(str(data_file), max_attempts=2)
+    assert client.batch_sizes == [10, 10]
@@ -6,6 +6,7 @@ Unit tests for textract_wrapper.py.
 """
 
 import json
+import time
 from io import BytesIO
 from unittest.mock import mock_open, patch
 
@@ -105,8 +106,18 @@ def test_prepare_job(monkeypatch, error_code):
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+def check_until(twrapper, queue_url, job_id, done):
+    """Checks the queue about once every 10 ms, the way the explorer app does."""
+    deadline = time.monotonic() + 5
+    while True:
+        status = twrapper.check_job_queue(queue_url, job_id)
+        if done(status) or time.monotonic() > deadline:
+            return status
+        time.sleep(0.01)
+
+
 @pytest.mark.parametrize("error_code", [None, "TestException"])
-def test_check_job_queue(make_stubber, error_code):
+def test_check_job_queue(make_stubber, caplog, error_code):
     sqs_resource = boto3.resource("sqs")
     sqs_stubber = make_stubber(sqs_resource.meta.client)
     twrapper = TextractWrapper(None, None, sqs_resource)
@@ -124,19 +135,55 @@ def test_check_job_queue(make_stubber, error_code):
     sqs_stubber.stub_receive_messages(
         queue_url,
         messages,
-        None,
-        omit_wait_time=True,
+        10,
         message_attributes=None,
         error_code=error_code,
     )
     if error_code is None:
         sqs_stubber.stub_delete_message(queue_url, receipt_handle="Receipt-0")
-
-    got_status = twrapper.check_job_queue(queue_url, job_id)
-    if error_code is None:
+        got_status = check_until(
+            twrapper, queue_url, job_id, lambda got: got is not None
+        )
         assert got_status == status
     else:
+        got_status = check_until(
+            twrapper,
+            queue_url,
+            job_id,
+            lambda got: "Couldn't get messages" in caplog.text,
+        )
         assert got_status is None
+        assert "Couldn't get messages" in caplog.text
+
+
+def test_check_job_queue_keeps_status_until_checked(make_stubber):
+    sqs_resource = boto3.resource("sqs")
+    sqs_stubber = make_stubber(sqs_resource.meta.client)
+    twrapper = TextractWrapper(None, None, sqs_resource)
+    queue_url = "test-queue_url"
+    job_id = "test-job_id"
+    status = "SUCCEEDED"
+    messages = [
+        {
+            "body": json.dumps(
+                {"Message": json.dumps({"JobId": job_id, "Status": status})}
+            )
+        }
+    ]
+    sqs_stubber.stub_receive_messages(queue_url, messages, 10, message_attributes=None)
+    sqs_stubber.stub_delete_message(queue_url, receipt_handle="Receipt-0")
+
+    got_statuses = [twrapper.check_job_queue(queue_url, job_id, timeout=0)]
+    # The message is received and deleted in the background between checks.
+    deadline = time.monotonic() + 5
+    while sqs_stubber._queue and time.monotonic() < deadline:
+        time.sleep(0.01)
+    while got_statuses[-1] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+        got_statuses.append(twrapper.check_job_queue(queue_url, job_id, timeout=0))
+
+    assert got_statuses[-1] == status
+    assert twrapper.job_futures == {}
 
 
 @pytest.mark.parametrize("error_code", [None, "TestException"])
@@ -247,6 +294,59 @@ def test_get_analysis_job(make_stubber, error_code):
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+@pytest.mark.parametrize(
+    "stub_name,func_name",
+    [
+        ("stub_get_document_text_detection", "get_detection_job"),
+        ("stub_get_document_analysis", "get_analysis_job"),
+    ],
+)
+def test_get_job_all_pages(make_stubber, stub_name, func_name):
+    textract_client = boto3.client("textract")
+    textract_stubber = make_stubber(textract_client)
+    twrapper = TextractWrapper(textract_client, None, None)
+    job_id = "test-job_id"
+    pages = [
+        [{"Id": f"{page}-{index}", "BlockType": "LINE"} for index in range(3)]
+        for page in range(3)
+    ]
+
+    for page, blocks in enumerate(pages):
+        getattr(textract_stubber, stub_name)(
+            job_id,
+            "SUCCEEDED",
+            blocks=blocks,
+            next_token=f"token-{page}" if page > 0 else None,
+            response_next_token=f"token-{page + 1}" if page < 2 else None,
+        )
+
+    got_job = getattr(twrapper, func_name)(job_id)
+    assert got_job["JobStatus"] == "SUCCEEDED"
+    assert got_job["Blocks"] == [block for blocks in pages for block in blocks]
+    assert "NextToken" not in got_job
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_detection_job_pages_error(make_stubber, prefetch):
+    textract_client = boto3.client("textract")
+    textract_stubber = make_stubber(textract_client)
+    twrapper = TextractWrapper(textract_client, None, None)
+    job_id = "test-job_id"
+
+    textract_stubber.stub_get_document_text_detection(
+        job_id, "SUCCEEDED", blocks=[], response_next_token="token-1"
+    )
+    textract_stubber.stub_get_document_text_detection(
+        job_id, "SUCCEEDED", next_token="token-1", error_code="TestException"
+    )
+
+    pages = twrapper.iter_detection_job_pages(job_id, prefetch=prefetch)
+    assert next(pages)["NextToken"] == "token-1"
+    with pytest.raises(ClientError) as exc_info:
+        next(pages)
+    assert exc_info.value.response["Error"]["Code"] == "TestException"
+
+
 test_input = [
     {
         "Id": "1",
@@ -317,3 +417,54 @@ test_hierarchy = {
 def test_make_page_hierarchy():
     got_blocks = TextractWrapper.make_page_hierarchy(test_input)
     assert got_blocks == test_hierarchy
+
+
+def test_iter_page_hierarchies_yields_each_page():
+    blocks = [
+        {
+            "Id": f"{page}",
+            "BlockType": "PAGE",
+            "Page": page,
+            "Relationships": [{"Type": "CHILD", "Ids": [f"{page}-1"]}],
+        }
+        for page in range(1, 4)
+    ]
+    blocks = [
+        block
+        for page in blocks
+        for block in (
+            page,
+            {"Id": f"{page['Id']}-1", "BlockType": "LINE", "Page": page["Page"]},
+        )
+    ]
+    read = []
+
+    def read_blocks():
+        for block in blocks:
+            read.append(block["Id"])
+            yield block
+
+    pages = TextractWrapper.iter_page_hierarchies(read_blocks())
+    first_page = next(pages)
+    assert first_page["Children"] == [blocks[1]]
+    # The first page is yielded as soon as a block of the second page is read.
+    assert read == ["1", "1-1", "2"]
+    assert [page["Id"] for page in pages] == ["2", "3"]
+
+
+def test_make_page_hierarchy_deep():
+    depth = 5000
+    blocks = [
+        {
+            "Id": str(index),
+            "BlockType": "PAGE" if index == 0 else "CELL",
+            "Relationships": [{"Type": "CHILD", "Ids": [str(index + 1)]}],
+        }
+        for index in range(depth)
+    ] + [{"Id": str(depth), "BlockType": "WORD"}]
+
+    got_blocks = TextractWrapper.make_page_hierarchy(blocks)
+    block = got_blocks["Children"][0]
+    for _ in range(depth):
+        block = block["Children"][0]
+    assert block == {"Id": str(depth), "BlockType": "WORD"}
@@ -8,11 +8,17 @@ Shows how to use the AWS SDK for Python (Boto3) with Amazon Textract to
 detect text, form, and table elements in document images.
 """
 
-import json
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 from botocore.exceptions import ClientError
 
+# Add relative path to include demo_tools in this code example without need for setup.
+sys.path.append("../..")
+from demo_tools.job_notifier import JobNotifier
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +34,8 @@ class TextractWrapper:
         self.textract_client = textract_client
         self.s3_resource = s3_resource
         self.sqs_resource = sqs_resource
+        self.notifiers = {}
+        self.job_futures = {}
 
     def detect_file_text(self, *, document_file_name=None, document_bytes=None):
         """
@@ -99,34 +107,44 @@ class TextractWrapper:
             logger.exception("Couldn't upload %s to %s.", document_name, bucket_name)
             raise
 
-    def check_job_queue(self, queue_url, job_id):
+    def check_job_queue(self, queue_url, job_id, timeout=0):
         """
-        Polls an Amazon SQS queue for messages that indicate a specified Textract
-        job has completed.
+        Checks whether a message that indicates a specified Textract job has
+        completed was received from an Amazon SQS queue. Each queue is read by one
+        notifier that long-polls in the background for all jobs that are checked
+        with it, so messages about other jobs are kept for them. The notifier
+        deletes a message as soon as it arrives, so the future of each job is kept
+        until a check finds it done.
 
         :param queue_url: The URL of the Amazon SQS queue to poll.
         :param job_id: The ID of the Textract job.
-        :return: The status of the job.
+        :param timeout: The number of seconds to wait for the message.
+        :return: The status of the job, or None when the job has not completed or the
+                 queue can't be read.
         """
-        status = None
+        notifier = self.notifiers.get(queue_url)
+        if notifier is None:
+            notifier = JobNotifier(self.sqs_resource.Queue(queue_url))
+            self.notifiers[queue_url] = notifier
+        key = (queue_url, job_id)
+        future = self.job_futures.get(key)
+        if future is None:
+            future = notifier.watch(job_id)
+            self.job_futures[key] = future
         try:
-            queue = self.sqs_resource.Queue(queue_url)
-            messages = queue.receive_messages()
-            if messages:
-                msg_body = json.loads(messages[0].body)
-                msg = json.loads(msg_body["Message"])
-                if msg.get("JobId") == job_id:
-                    messages[0].delete()
-                    status = msg.get("Status")
-                    logger.info(
-                        "Got message %s with status %s.", messages[0].message_id, status
-                    )
-            else:
-                logger.info("No messages in queue %s.", queue_url)
+            status = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.info("No message yet for job %s in queue %s.", job_id, queue_url)
+            return None
         except ClientError:
             logger.exception("Couldn't get messages from queue %s.", queue_url)
+            status = None
         else:
-            return status
+            logger.info("Job %s has status %s.", job_id, status)
+        # The job is done, or its queue can't be read and the next check watches
+        # it again.
+        del self.job_futures[key]
+        return status
 
     def start_detection_job(
         self, bucket_name, document_file_name, sns_topic_arn, sns_role_arn
@@ -168,21 +186,27 @@ class TextractWrapper:
 
     def get_detection_job(self, job_id):
         """
-        Gets data for a previously started text detection job.
+        Gets data for a previously started text detection job. When the job has
+        completed, the blocks from all pages of the job results are returned.
 
         :param job_id: The ID of the job to retrieve.
         :return: The job data, including a list of blocks that describe elements
                  detected in the image.
         """
-        try:
-            response = self.textract_client.get_document_text_detection(JobId=job_id)
-            job_status = response["JobStatus"]
-            logger.info("Job %s status is %s.", job_id, job_status)
-        except ClientError:
-            logger.exception("Couldn't get data for job %s.", job_id)
-            raise
-        else:
-            return response
+        return self._get_job(self.iter_detection_job_pages(job_id))
+
+    def iter_detection_job_pages(self, job_id, prefetch=True):
+        """
+        Gets each page of the results of a previously started text detection job.
+
+        :param job_id: The ID of the job to retrieve.
+        :param prefetch: When True, the next page of results is requested while the
+                         current page is processed.
+        :return: A generator of responses from Amazon Textract.
+        """
+        return self._iter_job_pages(
+            self.textract_client.get_document_text_detection, job_id, prefetch
+        )
 
     def start_analysis_job(
         self,
@@ -232,40 +256,170 @@ class TextractWrapper:
     def get_analysis_job(self, job_id):
         """
         Gets data for a previously started detection job that includes additional
-        elements.
+        elements. When the job has completed, the blocks from all pages of the job
+        results are returned.
 
         :param job_id: The ID of the job to retrieve.
         :return: The job data, including a list of blocks that describe elements
                  detected in the image.
         """
+        return self._get_job(self.iter_analysis_job_pages(job_id))
+
+    def iter_analysis_job_pages(self, job_id, prefetch=True):
+        """
+        Gets each page of the results of a previously started detection job that
+        includes additional elements.
+
+        :param job_id: The ID of the job to retrieve.
+        :param prefetch: When True, the next page of results is requested while the
+                         current page is processed.
+        :return: A generator of responses from Amazon Textract.
+        """
+        return self._iter_job_pages(
+            self.textract_client.get_document_analysis, job_id, prefetch
+        )
+
+    @staticmethod
+    def _iter_job_pages(get_job_page, job_id, prefetch):
+        """
+        Gets each page of job results by following the NextToken of each response.
+        Each token is only known from the page before it, so pages are requested in
+        order. With prefetch, the request for the next page runs on a background
+        thread while the caller processes the current page.
+
+        :param get_job_page: The Textract client function that gets a page of results.
+        :param job_id: The ID of the job to retrieve.
+        :param prefetch: When True, the next page is requested in the background.
+        :return: A generator of responses from Amazon Textract.
+        """
+
+        def get_page(next_token):
+            kwargs = {"JobId": job_id}
+            if next_token is not None:
+                kwargs["NextToken"] = next_token
+            return get_job_page(**kwargs)
+
         try:
-            response = self.textract_client.get_document_analysis(JobId=job_id)
-            job_status = response["JobStatus"]
-            logger.info("Job %s status is %s.", job_id, job_status)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                response = get_page(None)
+                logger.info("Job %s status is %s.", job_id, response["JobStatus"])
+                while True:
+                    next_token = response.get("NextToken")
+                    if next_token is None:
+                        yield response
+                        break
+                    if prefetch:
+                        future = executor.submit(get_page, next_token)
+                        yield response
+                        response = future.result()
+                    else:
+                        yield response
+                        response = get_page(next_token)
         except ClientError:
             logger.exception("Couldn't get data for job %s.", job_id)
             raise
-        else:
-            return response
+
+    @staticmethod
+    def _get_job(pages):
+        """
+        Combines pages of job results into a single response that contains the blocks
+        from all pages.
+
+        :param pages: The responses from Amazon Textract.
+        :return: The first response, with the blocks and warnings of all pages.
+        """
+        job = None
+        for page in pages:
+            if job is None:
+                job = dict(page)
+                for key in ("Blocks", "Warnings"):
+                    if key in job:
+                        job[key] = list(job[key])
+            else:
+                for key in ("Blocks", "Warnings"):
+                    if key in page:
+                        job.setdefault(key, []).extend(page[key])
+        job.pop("NextToken", None)
+        logger.info("Got %s blocks.", len(job.get("Blocks", [])))
+        return job
 
     @staticmethod
     def _add_children(block, block_dict):
         """
-        A recursive function that adds children to a block, based on its list
-        of relationship IDs.
+        Adds children to a block and to all of its descendants, based on their lists
+        of relationship IDs. The hierarchy is walked with a stack instead of by
+        recursion, so deeply nested elements, such as large tables, do not exceed
+        the recursion limit.
 
         :param block: The block to populate with children.
         :param block_dict: A dictionary of all blocks for fast lookup by ID.
         """
-        for kids in [
-            rels["Ids"]
-            for rels in block.get("Relationships", [])
-            if rels["Type"] == "CHILD"
-        ]:
-            block["Children"] = []
-            for kid in [block_dict[k_id] for k_id in kids]:
-                block["Children"].append(kid)
-                TextractWrapper._add_children(kid, block_dict)
+        stack = [block]
+        visited = {id(block)}
+        while stack:
+            parent = stack.pop()
+            kid_ids = [
+                k_id
+                for rels in parent.get("Relationships", [])
+                if rels["Type"] == "CHILD"
+                for k_id in rels["Ids"]
+            ]
+            if not kid_ids:
+                continue
+            parent["Children"] = [
+                block_dict[k_id] for k_id in kid_ids if k_id in block_dict
+            ]
+            for kid in parent["Children"]:
+                if id(kid) not in visited:
+                    visited.add(id(kid))
+                    stack.append(kid)
+
+    @staticmethod
+    def iter_page_hierarchies(blocks):
+        """
+        Makes a hierarchy of child blocks for each page in a list of blocks, and
+        yields each page as soon as all of its blocks are read. Textract returns
+        blocks in page order, so the blocks of a page are complete when a block
+        from the next page is read. Blocks that have no page number, such as those
+        returned by synchronous functions, are treated as belonging to one page.
+
+        This lets large documents be processed a page at a time as the pages of job
+        results are received, for example:
+
+            blocks = (
+                block
+                for page in wrapper.iter_analysis_job_pages(job_id)
+                for block in page.get("Blocks", [])
+            )
+            for page in wrapper.iter_page_hierarchies(blocks):
+                ...
+
+        :param blocks: An iterable of blocks returned by Textract.
+        :return: A generator of PAGE blocks that contain their children.
+        """
+        page_number = None
+        block_dict = {}
+        for block in blocks:
+            block_page = block.get("Page", 1)
+            if block_page != page_number and block_dict:
+                yield from TextractWrapper._make_pages(block_dict)
+                block_dict = {}
+            page_number = block_page
+            block_dict[block["Id"]] = block
+        yield from TextractWrapper._make_pages(block_dict)
+
+    @staticmethod
+    def _make_pages(block_dict):
+        """
+        Adds children to each PAGE block in a dictionary of blocks.
+
+        :param block_dict: A dictionary of the blocks of a page, keyed by ID.
+        :return: A generator of PAGE blocks that contain their children.
+        """
+        for block in block_dict.values():
+            if block["BlockType"] == "PAGE":
+                TextractWrapper._add_children(block, block_dict)
+                yield block
 
     @staticmethod
     def make_page_hierarchy(blocks):
@@ -279,10 +433,4 @@ class TextractWrapper:
         :param blocks: The list of blocks returned by Textract.
         :return: A single parent node that contains the list of pages as its children.
         """
-        block_dict = {block["Id"]: block for block in blocks}
-        pages = []
-        for block in block_dict.values():
-            if block["BlockType"] == "PAGE":
-                pages.append(block)
-                TextractWrapper._add_children(block, block_dict)
-        return {"Children": pages}
+        return {"Children": list(TextractWrapper.iter_page_hierarchies(blocks))}
@@ -2,13 +2,21 @@
 # SPDX-License-Identifier: Apache-2.0
 
 """
-Base class for implementing custom waiters for services that don't already have
-prebuilt waiters. This class leverages botocore waiter code.
+Base classes for implementing custom waiters for services that don't already have
+prebuilt waiters. CustomWaiter leverages botocore waiter code to wait for one
+resource. BatchWaiter waits for many resources by polling them together.
 """
 
+from concurrent.futures import Future, InvalidStateError
 from enum import Enum
 import logging
+import threading
+import time
+
 import botocore.waiter
+import jmespath
+from botocore import xform_name
+from botocore.exceptions import WaiterError
 
 logger = logging.getLogger(__name__)
 
@@ -130,3 +138,244 @@ class CustomWaiter:
         self.client.meta.events.register(event_name, self)
         self.waiter.wait(**kwargs)
         self.client.meta.events.unregister(event_name, self)
+
+
+class BatchWaiter:
+    """
+    Base class for a waiter that waits for many resources at once. Each poll sends
+    one call for each batch of resource IDs, to an operation that accepts a list of
+    IDs, such as DescribeInstances. Each resource has its own future, which is
+    resolved as soon as that resource reaches an accepted state, so callers can act
+    on the first resources that are ready while the rest are still polled.
+
+    The delay between polls adapts to progress. It is halved after a poll in which
+    some resources reach an accepted state, and grows by half after a poll in which
+    none do, between a minimum and a maximum delay.
+
+    For example, to implement a waiter for many Amazon EC2 instances, create a class
+    like the following:
+
+        class InstancesRunningWaiter(BatchWaiter):
+            def __init__(self, client):
+                super().__init__(
+                    'InstancesRunning', 'DescribeInstances', 'InstanceIds',
+                    'Reservations[].Instances[]', 'InstanceId', 'State.Name',
+                    {'running': WaitState.SUCCESS, 'terminated': WaitState.FAILURE},
+                    client)
+
+        futures = InstancesRunningWaiter(ec2_client).submit(instance_ids)
+    """
+
+    def __init__(
+        self,
+        name,
+        operation,
+        id_param,
+        resources_path,
+        id_path,
+        status_path,
+        acceptors,
+        client,
+        batch_size=100,
+        delay=10,
+        min_delay=2,
+        max_delay=60,
+        timeout=600,
+        missing_state=None,
+    ):
+        """
+        Subclasses should pass specific operations, paths, and acceptors to
+        their superclass.
+
+        :param name: The name of the waiter. This can be any descriptive string.
+        :param operation: The operation to poll. This must match the casing of
+                          the underlying operation model, which is typically in
+                          CamelCase.
+        :param id_param: The name of the operation parameter that takes the list of
+                         resource IDs.
+        :param resources_path: A JMESPath expression that finds the list of resources
+                               in a response, such as 'Reservations[].Instances[]'.
+        :param id_path: A JMESPath expression that finds the ID of a resource.
+        :param status_path: A JMESPath expression that finds the status of a resource.
+        :param acceptors: The statuses that end the wait for a resource, and whether
+                          each is a success or a failure.
+        :param client: The Boto3 client.
+        :param batch_size: The most resource IDs to send in one call.
+        :param delay: The number of seconds to wait after the first poll.
+        :param min_delay: The shortest number of seconds to wait between polls.
+        :param max_delay: The longest number of seconds to wait between polls.
+        :param timeout: The number of seconds after which resources that are still
+                        waiting fail with a WaiterError.
+        :param missing_state: The state of a resource that is not in the response,
+                              such as a deleted resource. When this is None, the
+                              resource is polled again.
+        """
+        self.name = name
+        self.operation = operation
+        self.id_param = id_param
+        self.resources_expression = jmespath.compile(resources_path)
+        self.id_expression = jmespath.compile(id_path)
+        self.status_expression = jmespath.compile(status_path)
+        self.acceptors = acceptors
+        self.client = client
+        self.batch_size = batch_size
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.missing_state = missing_state
+
+    def submit(self, resource_ids, **kwargs):
+        """
+        Starts polling in a background thread.
+
+        :param resource_ids: The IDs of the resources to wait for.
+        :param kwargs: Other keyword arguments that are passed to the operation.
+        :return: A dict of futures, keyed by resource ID. A future's result is the
+                 resource from the last poll, or None when the resource was missing.
+                 When the resource reaches a failure state or the wait times out,
+                 the future raises a WaiterError.
+        """
+        futures = {resource_id: Future() for resource_id in resource_ids}
+        threading.Thread(
+            target=self._poll, args=(futures, kwargs), name=self.name, daemon=True
+        ).start()
+        return futures
+
+    def wait(self, resource_ids, **kwargs):
+        """
+        Polls until every resource reaches an accepted state.
+
+        :param resource_ids: The IDs of the resources to wait for.
+        :param kwargs: Other keyword arguments that are passed to the operation.
+        :return: A dict of resources from the last poll, keyed by resource ID.
+        """
+        futures = {resource_id: Future() for resource_id in resource_ids}
+        self._poll(futures, kwargs)
+        return {resource_id: future.result() for resource_id, future in futures.items()}
+
+    def _poll(self, futures, kwargs):
+        """
+        Polls the pending resources until each of their futures is resolved.
+        An error from the operation is set on every future that is still pending.
+        """
+        pending = dict(futures)
+        deadline = time.monotonic() + self.timeout
+        delay = None
+        try:
+            while True:
+                pending = {
+                    resource_id: future
+                    for resource_id, future in pending.items()
+                    if not future.cancelled()
+                }
+                resolved = self._poll_once(pending, kwargs)
+                if not pending:
+                    return
+                if delay is None:
+                    delay = self.delay
+                elif resolved:
+                    delay = max(self.min_delay, delay / 2)
+                else:
+                    delay = min(self.max_delay, delay * 1.5)
+                if time.monotonic() + delay > deadline:
+                    error = WaiterError(
+                        name=self.name,
+                        reason="Max wait time exceeded",
+                        last_response={"PendingIds": list(pending)},
+                    )
+                    for future in pending.values():
+                        self._settle(future, error=error)
+                    return
+                time.sleep(delay)
+        except Exception as error:
+            for future in pending.values():
+                if not future.done():
+                    self._settle(future, error=error)
+
+    def _poll_once(self, pending, kwargs):
+        """
+        Calls the operation for every batch of pending resources and resolves the
+        futures of resources that reached an accepted state.
+
+        :return: The number of resources that were resolved.
+        """
+        resource_ids = list(pending)
+        seen = set()
+        resolved = 0
+        for start in range(0, len(resource_ids), self.batch_size):
+            params = {
+                **kwargs,
+                self.id_param: resource_ids[start : start + self.batch_size],
+            }
+            for response in self._responses(params):
+                for resource in self.resources_expression.search(response) or []:
+                    resource_id = self.id_expression.search(resource)
+                    if resource_id not in pending:
+                        continue
+                    seen.add(resource_id)
+                    status = self.status_expression.search(resource)
+                    if status in self.acceptors:
+                        self._resolve(
+                            resource_id,
+                            pending.pop(resource_id),
+                            self.acceptors[status],
+                            status,
+                            resource,
+                        )
+                        resolved += 1
+        if self.missing_state is not None:
+            for resource_id in resource_ids:
+                if resource_id not in seen and resource_id in pending:
+                    self._resolve(
+                        resource_id,
+                        pending.pop(resource_id),
+                        self.missing_state,
+                        None,
+                        None,
+                    )
+                    resolved += 1
+        logger.info(
+            "Waiter %s called %s for %s resources, %s are done and %s are waiting.",
+            self.name,
+            self.operation,
+            len(resource_ids),
+            resolved,
+            len(pending),
+        )
+        return resolved
+
+    def _responses(self, params):
+        method = xform_name(self.operation)
+        if self.client.can_paginate(method):
+            yield from self.client.get_paginator(method).paginate(**params)
+        else:
+            yield getattr(self.client, method)(**params)
+
+    def _resolve(self, resource_id, future, state, status, resource):
+        if state == WaitState.SUCCESS:
+            self._settle(future, result=resource)
+        else:
+            self._settle(
+                future,
+                error=WaiterError(
+                    name=self.name,
+                    reason=f"{resource_id} reached the failure status {status}",
+                    last_response=resource,
+                ),
+            )
+
+    @staticmethod
+    def _settle(future, result=None, error=None):
+        """
+        Sets the result or error of a future. A caller can cancel a future at any
+        time, even after it was last checked, so a cancelled future is skipped
+        instead of failing the poll of every other resource.
+        """
+        try:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        except InvalidStateError:
+            logger.info("Skipped a future that was cancelled while it was polled.")
@@ -0,0 +1,310 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Waits for many asynchronous jobs, such as Amazon Textract, Amazon Rekognition Video,
+or Amazon Polly jobs, from one process without a polling loop for each job.
+
+When jobs publish their completion to an Amazon Simple Notification Service
+(Amazon SNS) topic that is subscribed by an Amazon Simple Queue Service (Amazon SQS)
+queue, one thread long-polls the queue with batch receives and completes the future
+of each job that a message is about. When jobs have no notification channel, one
+thread polls the status of all of them, backing off each job separately.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+
+def parse_job_message(message_body):
+    """
+    Gets the job ID and status from the body of an Amazon SQS message that contains
+    an Amazon SNS job notification. Amazon Textract and Amazon Rekognition name these
+    JobId and Status, and Amazon Polly names them taskId and taskStatus.
+
+    :param message_body: The body of the message.
+    :return: The job ID and status, or None and None when the message is not a job
+             notification.
+    """
+    try:
+        message = json.loads(json.loads(message_body)["Message"])
+        job_id = message.get("JobId", message.get("taskId"))
+        status = message.get("Status", message.get("taskStatus"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None, None
+    return job_id, status
+
+
+class JobNotifier:
+    """
+    Dispatches job completions to a future for each job. Jobs are watched either
+    through a notification queue or by polling a status function.
+
+    The receive and poll threads only run while there are jobs to wait for, so a
+    notifier that is not waiting for anything makes no requests.
+    """
+
+    def __init__(
+        self,
+        queue=None,
+        wait_time=20,
+        initial_delay=1,
+        max_delay=30,
+        backoff=2,
+        parse_message=parse_job_message,
+        max_notified=1000,
+    ):
+        """
+        :param queue: A Boto3 Amazon SQS Queue that receives job notifications. When
+                      this is None, jobs can only be watched by polling.
+        :param wait_time: The number of seconds to long-poll the queue.
+        :param initial_delay: The number of seconds between the first two polls of
+                              a job that has no notification channel.
+        :param max_delay: The maximum number of seconds between polls of a job.
+        :param backoff: The factor the delay between polls grows by after each poll.
+        :param parse_message: A function that gets the job ID and status from the
+                              body of a queue message.
+        :param max_notified: The maximum number of notifications to remember for
+                             jobs that are not watched yet. Their messages are left
+                             in the queue, so a notification that is forgotten is
+                             received again after its visibility timeout.
+        """
+        self.queue = queue
+        self.wait_time = wait_time
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.parse_message = parse_message
+        self.max_notified = max_notified
+        self._lock = threading.Lock()
+        self._poll_ready = threading.Condition(self._lock)
+        self._futures = {}
+        self._queued = set()
+        self._notified = OrderedDict()
+        self._polled = []
+        self._sequence = itertools.count()
+        self._receiving = False
+        self._polling = False
+        self._closed = False
+
+    def watch(self, job_id, poll=None, max_polls=None):
+        """
+        Starts watching for a job to complete. Watching a job that is already
+        watched returns the same future.
+
+        :param job_id: The ID of the job.
+        :param poll: A function that is called with the job ID to get the result of a
+                     job that has no notification channel. It returns None while the
+                     job is running. When this is None, the job is watched through
+                     the notification queue.
+        :param max_polls: The maximum number of times to poll the job before its
+                          future raises a TimeoutError. When this is None, the job is
+                          polled until it completes.
+        :return: A future that resolves to the result of the poll function, or to
+                 the job status in the notification.
+        """
+        notified = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The notifier is closed.")
+            future = self._futures.get(job_id)
+            if future is not None:
+                return future
+            future = Future()
+            if poll is None:
+                if self.queue is None:
+                    raise ValueError(
+                        f"Job {job_id} has no poll function and the notifier has no "
+                        f"queue."
+                    )
+                notified = self._notified.pop(job_id, None)
+                if notified is None:
+                    self._futures[job_id] = future
+                    self._queued.add(job_id)
+                    if not self._receiving:
+                        self._receiving = True
+                        threading.Thread(target=self._receive, daemon=True).start()
+            else:
+                self._futures[job_id] = future
+                heapq.heappush(
+                    self._polled,
+                    (
+                        time.monotonic(),
+                        next(self._sequence),
+                        job_id,
+                        poll,
+                        self.initial_delay,
+                        max_polls,
+                    ),
+                )
+                self._poll_ready.notify()
+                if not self._polling:
+                    self._polling = True
+                    threading.Thread(target=self._poll, daemon=True).start()
+        if notified is not None:
+            # The job completed before it was watched, and its message was left in
+            # the queue until now.
+            status, message = notified
+            try:
+                message.delete()
+            except ClientError as error:
+                logger.exception("Couldn't delete message %s.", message.message_id)
+                future.set_exception(error)
+            else:
+                future.set_result(status)
+        return future
+
+    def wait(self, job_id, poll=None, max_polls=None, timeout=None):
+        """
+        Waits for a job to complete.
+
+        :param job_id: The ID of the job.
+        :param poll: A function that gets the result of a job that has no notification
+                     channel. See watch.
+        :param max_polls: The maximum number of times to poll the job.
+        :param timeout: The maximum number of seconds to wait.
+        :return: The result of the job.
+        """
+        return self.watch(job_id, poll, max_polls).result(timeout)
+
+    def close(self):
+        """Stops watching and cancels the futures of all jobs that are not done."""
+        with self._lock:
+            self._closed = True
+            futures = list(self._futures.values())
+            self._futures.clear()
+            self._queued.clear()
+            self._notified.clear()
+            self._polled.clear()
+            self._poll_ready.notify()
+        for future in futures:
+            future.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _resolve(self, job_id, result=None, error=None):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            self._queued.discard(job_id)
+        if future is None:
+            return False
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+        return True
+
+    def _receive(self):
+        """
+        Long-polls the queue while there are jobs that wait for a notification and
+        dispatches each notification to the future of its job.
+        """
+        while True:
+            with self._lock:
+                waiting = list(self._queued)
+                if self._closed or not waiting:
+                    self._receiving = False
+                    return
+            try:
+                messages = self.queue.receive_messages(
+                    MaxNumberOfMessages=10, WaitTimeSeconds=self.wait_time
+                )
+                logger.info("Polled queue for messages, got %s.", len(messages))
+            except Exception as error:
+                # Jobs that wait on a queue that can't be read would otherwise wait
+                # forever, so they get the error instead.
+                logger.exception("Couldn't receive messages from the queue.")
+                for job_id in waiting:
+                    self._resolve(job_id, error=error)
+                continue
+            for message in messages:
+                self._dispatch(message)
+
+    def _dispatch(self, message):
+        job_id, status = self.parse_message(message.body)
+        if job_id is None:
+            logger.warning("Message %s is not a job notification.", message.message_id)
+            return
+        with self._lock:
+            watched = job_id in self._futures
+            if not watched:
+                # The job isn't watched yet, or the message is for another consumer
+                # of the queue, so the message is left in the queue and only its
+                # status is remembered, up to max_notified of them.
+                self._notified[job_id] = (status, message)
+                self._notified.move_to_end(job_id)
+                while len(self._notified) > self.max_notified:
+                    self._notified.popitem(last=False)
+        if not watched:
+            logger.info("Got message %s for a job that isn't watched.", job_id)
+            return
+        try:
+            message.delete()
+        except ClientError as error:
+            logger.exception("Couldn't delete message %s.", message.message_id)
+            self._resolve(job_id, error=error)
+            return
+        logger.info("Got message %s with status %s.", job_id, status)
+        self._resolve(job_id, status)
+
+    def _poll(self):
+        """
+        Polls each job that has no notification channel when its delay is up, and
+        doubles its delay, with jitter, each time it is still running.
+        """
+        while True:
+            with self._lock:
+                while (
+                    not self._closed
+                    and self._polled
+                    and self._polled[0][0] > time.monotonic()
+                ):
+                    self._poll_ready.wait(self._polled[0][0] - time.monotonic())
+                if self._closed or not self._polled:
+                    self._polling = False
+                    return
+                _, _, job_id, poll, delay, polls_left = heapq.heappop(self._polled)
+            try:
+                result = poll(job_id)
+            except Exception as error:
+                logger.exception("Couldn't poll job %s.", job_id)
+                self._resolve(job_id, error=error)
+                continue
+            if result is not None:
+                self._resolve(job_id, result)
+                continue
+            if polls_left is not None:
+                polls_left -= 1
+                if polls_left <= 0:
+                    self._resolve(
+                        job_id, error=TimeoutError(f"Job {job_id} did not complete.")
+                    )
+                    continue
+            with self._lock:
+                if job_id in self._futures:
+                    heapq.heappush(
+                        self._polled,
+                        (
+                            time.monotonic() + random.uniform(delay / 2, delay),
+                            next(self._sequence),
+                            job_id,
+                            poll,
+                            min(delay * self.backoff, self.max_delay),
+                            polls_left,
+                        ),
+                    )
@@ -1,15 +1,46 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+
+"""
+Retries functions that fail because AWS is busy or not yet ready, with exponential
+backoff and jitter.
+
+Jitter spreads out the retries of many callers that fail at the same time, so they
+don't all retry at the same moment and get throttled again. A Retrier can stop
+retrying after a number of attempts or at a deadline, and can share a RetryBudget
+with other retriers, even in other threads, so that a widespread outage doesn't
+multiply the load on a service with retries.
+"""
+
+import asyncio
 import logging
+import math
+import random
 import sys
+import threading
 import time
+from dataclasses import dataclass
+
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
 
 class MaxRetriesExceededError(Exception):
-    pass
+    """
+    Raised when a function still fails after it has been retried as much as allowed.
+
+    :ivar last_error: The error raised by the last attempt, or None when the last
+                      attempt returned a result that is retried.
+    :ivar last_result: The result returned by the last attempt.
+    :ivar stats: The RetryStats of the call.
+    """
+
+    def __init__(self, message, last_error=None, last_result=None, stats=None):
+        super().__init__(message)
+        self.last_error = last_error
+        self.last_result = last_result
+        self.stats = stats
 
 
 def wait(seconds, tick=12):
@@ -32,45 +63,258 @@ def wait(seconds, tick=12):
     sys.stdout.flush()
 
 
+def no_jitter(rng, base_delay, max_delay, attempt, previous_delay):
+    """Doubles the delay after each attempt: 1, 2, 4, 8, and so on."""
+    return min(max_delay, base_delay * 2 ** (attempt - 1))
+
+
+def full_jitter(rng, base_delay, max_delay, attempt, previous_delay):
+    """Picks a random delay between zero and the doubled delay."""
+    return rng.uniform(0, no_jitter(rng, base_delay, max_delay, attempt, None))
+
+
+def decorrelated_jitter(rng, base_delay, max_delay, attempt, previous_delay):
+    """
+    Picks a random delay between the base delay and three times the previous
+    delay, so that each delay depends on the last one instead of on the attempt.
+    """
+    return min(max_delay, rng.uniform(base_delay, 3 * (previous_delay or base_delay)))
+
+
+def retry_on_error_codes(*error_codes):
+    """
+    Makes a function that decides to retry AWS client errors with the specified
+    error codes.
+    """
+
+    def _should_retry(error):
+        return (
+            isinstance(error, ClientError)
+            and error.response["Error"]["Code"] in error_codes
+        )
+
+    return _should_retry
+
+
+class RetryBudget:
+    """
+    A thread-safe store of retry tokens that is shared by retriers. Each retry
+    takes a token, and each successful call returns part of one. When the budget
+    runs out, calls fail instead of retrying, until enough calls succeed again.
+    """
+
+    def __init__(self, max_tokens=10, success_refill=0.1):
+        """
+        :param max_tokens: The most retries that can be made before calls succeed.
+        :param success_refill: The part of a token that each successful call returns.
+        """
+        self.max_tokens = max_tokens
+        self.success_refill = success_refill
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Takes a token for a retry. Returns False when no token is left."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.success_refill)
+
+
+@dataclass
+class RetryStats:
+    """The attempts, seconds slept, and total seconds of one retried call."""
+
+    attempts: int = 0
+    total_sleep: float = 0
+    elapsed: float = 0
+
+
+class Retrier:
+    """
+    Runs a function and retries it with exponential backoff and jitter when it
+    raises a retryable error or returns a result that must be retried.
+    """
+
+    def __init__(
+        self,
+        should_retry=None,
+        retry_on_result=None,
+        max_attempts=5,
+        base_delay=1,
+        max_delay=32,
+        jitter=full_jitter,
+        deadline=None,
+        budget=None,
+        rng=None,
+    ):
+        """
+        :param should_retry: A function that gets an error raised by the function
+                             and returns True when it is retried. By default, no
+                             error is retried. See `retry_on_error_codes`.
+        :param retry_on_result: A function that gets the result of the function and
+                                returns True when it is retried.
+        :param max_attempts: The most times the function is called.
+        :param base_delay: The number of seconds to wait before the first retry,
+                           before jitter is applied.
+        :param max_delay: The longest wait between two attempts, in seconds.
+        :param jitter: The function that picks each wait, such as `full_jitter`,
+                       `decorrelated_jitter`, or `no_jitter`.
+        :param deadline: The number of seconds after the first attempt starts after
+                         which no more retries are started.
+        :param budget: A RetryBudget that limits retries across retriers.
+        :param rng: The random number generator used for jitter.
+        """
+        self.should_retry = should_retry or (lambda error: False)
+        self.retry_on_result = retry_on_result or (lambda result: False)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.budget = budget
+        self.rng = rng or random.Random()
+
+    def run(self, func, *func_args, **func_kwargs):
+        """
+        Runs the function, retrying it as needed.
+
+        :return: The result of the function.
+        """
+        return self.run_with_stats(func, *func_args, **func_kwargs)[0]
+
+    def run_with_stats(self, func, *func_args, **func_kwargs):
+        """
+        Runs the function, retrying it as needed.
+
+        :return: The result of the function and the RetryStats of the call.
+        """
+        stats = RetryStats()
+        start = time.monotonic()
+        delay = None
+        while True:
+            stats.attempts += 1
+            try:
+                result = func(*func_args, **func_kwargs)
+            except Exception as error:
+                if not self.should_retry(error):
+                    raise
+                delay = self._next_delay(func, stats, start, delay, error=error)
+            else:
+                if not self.retry_on_result(result):
+                    return self._succeeded(stats, start, result)
+                delay = self._next_delay(func, stats, start, delay, result=result)
+            time.sleep(delay)
+            stats.total_sleep += delay
+
+    async def run_async(self, func, *func_args, **func_kwargs):
+        """
+        Awaits a coroutine function, retrying it as needed. Waits between attempts
+        don't block the event loop.
+
+        :return: The result of the function.
+        """
+        return (await self.run_async_with_stats(func, *func_args, **func_kwargs))[0]
+
+    async def run_async_with_stats(self, func, *func_args, **func_kwargs):
+        """
+        Awaits a coroutine function, retrying it as needed.
+
+        :return: The result of the function and the RetryStats of the call.
+        """
+        stats = RetryStats()
+        start = time.monotonic()
+        delay = None
+        while True:
+            stats.attempts += 1
+            try:
+                result = await func(*func_args, **func_kwargs)
+            except Exception as error:
+                if not self.should_retry(error):
+                    raise
+                delay = self._next_delay(func, stats, start, delay, error=error)
+            else:
+                if not self.retry_on_result(result):
+                    return self._succeeded(stats, start, result)
+                delay = self._next_delay(func, stats, start, delay, result=result)
+            await asyncio.sleep(delay)
+            stats.total_sleep += delay
+
+    def _succeeded(self, stats, start, result):
+        stats.elapsed = time.monotonic() - start
+        if self.budget is not None:
+            self.budget.record_success()
+        logger.debug(
+            "Succeeded after %s attempts and %.2f seconds of sleep.",
+            stats.attempts,
+            stats.total_sleep,
+        )
+        return result, stats
+
+    def _next_delay(self, func, stats, start, previous_delay, error=None, result=None):
+        """
+        Picks how long to wait before the next attempt, or raises
+        MaxRetriesExceededError when no more attempts are allowed.
+        """
+        stats.elapsed = time.monotonic() - start
+        delay = self.jitter(
+            self.rng, self.base_delay, self.max_delay, stats.attempts, previous_delay
+        )
+        reason = None
+        if stats.attempts >= self.max_attempts:
+            reason = f"failed after {stats.attempts} attempts"
+        elif self.deadline is not None and stats.elapsed + delay > self.deadline:
+            reason = (
+                f"failed, and a retry would pass the {self.deadline} second deadline"
+            )
+        elif self.budget is not None and not self.budget.try_acquire():
+            reason = "failed, and the retry budget is used up"
+        if reason is not None:
+            raise MaxRetriesExceededError(
+                f"{getattr(func, '__name__', func)} {reason}.",
+                last_error=error,
+                last_result=result,
+                stats=stats,
+            ) from error
+        logger.info(
+            "Attempt %s to run %s failed, retrying in %.2f seconds.",
+            stats.attempts,
+            getattr(func, "__name__", func),
+            delay,
+        )
+        return delay
+
+
 class ExponentialRetry:
-    def __init__(self, func, error_code, max_sleep=32):
+    def __init__(self, func, error_code, max_sleep=32, jitter=full_jitter):
         self.func = func
         self.error_code = error_code
         self.max_sleep = max_sleep
+        self.retrier = Retrier(
+            should_retry=retry_on_error_codes(error_code),
+            retry_on_result=lambda result: result is None,
+            max_attempts=int(math.log2(max(max_sleep, 1))) + 2,
+            base_delay=1,
+            max_delay=max_sleep,
+            jitter=jitter,
+        )
 
     def run(self, *func_args, **func_kwargs):
         """
-        Retries the specified function with a simple exponential backoff algorithm.
+        Retries the specified function with exponential backoff and jitter, while
+        it raises the specified error code or returns None.
         This is necessary when AWS is not yet ready to perform an action because all
         resources have not been fully deployed.
 
-        :param func: The function to retry.
-        :param error_code: The error code to retry. Other errors are raised again.
         :param func_args: The positional arguments to pass to the function.
         :param func_kwargs: The keyword arguments to pass to the function.
         :return: The return value of the retried function.
         """
-        sleepy_time = 1
-        func_return = None
-        while sleepy_time <= self.max_sleep and func_return is None:
-            try:
-                func_return = self.func(*func_args, **func_kwargs)
-                logger.info("Ran %s, got %s.", self.func.__name__, func_return)
-            except ClientError as error:
-                if error.response["Error"]["Code"] == self.error_code:
-                    print(
-                        f"Sleeping for {sleepy_time} to give AWS time to "
-                        f"connect resources."
-                    )
-                    time.sleep(sleepy_time)
-                    sleepy_time = sleepy_time * 2
-                else:
-                    logger.error(
-                        "%s raised an error and cannot be retried.", self.func.__name__
-                    )
-                    raise
-        if sleepy_time > self.max_sleep:
-            raise MaxRetriesExceededError(
-                f"{self.func.__name__} exceeded the allowable number of retries."
-            )
+        func_return = self.retrier.run(self.func, *func_args, **func_kwargs)
+        logger.info("Ran %s, got %s.", self.func.__name__, func_return)
         return func_return
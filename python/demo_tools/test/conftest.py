@@ -0,0 +1,12 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Contains common test fixtures used to run unit tests.
+"""
+
+import sys
+
+# This is needed so Python can find test_tools and demo_tools on the path.
+sys.path.append("..")
+from test_tools.fixtures.common import *
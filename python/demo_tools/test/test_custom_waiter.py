@@ -0,0 +1,200 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for the BatchWaiter in custom_waiter.py.
+"""
+
+import time
+from concurrent.futures import Future
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, WaiterError
+
+from demo_tools.custom_waiter import BatchWaiter, WaitState
+
+
+class InstancesRunningWaiter(BatchWaiter):
+    def __init__(self, client, **kwargs):
+        super().__init__(
+            "InstancesRunning",
+            "DescribeInstances",
+            "InstanceIds",
+            "Reservations[].Instances[]",
+            "InstanceId",
+            "State.Name",
+            {"running": WaitState.SUCCESS, "terminated": WaitState.FAILURE},
+            client,
+            **kwargs,
+        )
+
+
+def instances_response(states, next_token=None):
+    response = {
+        "Reservations": [
+            {
+                "Instances": [
+                    {"InstanceId": instance_id, "State": {"Name": state}}
+                    for instance_id, state in states.items()
+                ]
+            }
+        ]
+    }
+    if next_token is not None:
+        response["NextToken"] = next_token
+    return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Replaces time.sleep and returns the list of delays it is called with."""
+    delays = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+def test_wait_resolves_each_resource_and_adapts_delay(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    polls = [
+        {"i-a": "pending", "i-b": "pending"},
+        {"i-a": "pending", "i-b": "pending"},
+        {"i-a": "running", "i-b": "pending"},
+        {"i-b": "running"},
+    ]
+    for states in polls:
+        ec2_stubber.add_response(
+            "describe_instances",
+            instances_response(states),
+            {"InstanceIds": list(states)},
+        )
+
+    got = InstancesRunningWaiter(ec2_client).wait(["i-a", "i-b"])
+
+    assert got["i-a"]["State"]["Name"] == "running"
+    assert got["i-b"]["State"]["Name"] == "running"
+    # The first delay, then half again after no progress, then halved after progress.
+    assert sleeps == [10, 15, 7.5]
+
+
+def test_submit_fails_resources_in_failure_state(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-a": "terminated", "i-b": "running"}),
+        {"InstanceIds": ["i-a", "i-b"]},
+    )
+
+    futures = InstancesRunningWaiter(ec2_client).submit(["i-a", "i-b"])
+
+    assert futures["i-b"].result(timeout=5)["InstanceId"] == "i-b"
+    with pytest.raises(WaiterError) as exc_info:
+        futures["i-a"].result(timeout=5)
+    assert "terminated" in str(exc_info.value)
+
+
+@pytest.mark.parametrize("missing_state", [WaitState.SUCCESS, WaitState.FAILURE])
+def test_wait_missing_state(make_stubber, sleeps, missing_state):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-a": "running"}),
+        {"InstanceIds": ["i-a", "i-gone"]},
+    )
+    waiter = InstancesRunningWaiter(ec2_client, missing_state=missing_state)
+
+    futures = {"i-a": Future(), "i-gone": Future()}
+    waiter._poll(futures, {})
+
+    assert futures["i-a"].result()["InstanceId"] == "i-a"
+    if missing_state == WaitState.SUCCESS:
+        assert futures["i-gone"].result() is None
+    else:
+        with pytest.raises(WaiterError):
+            futures["i-gone"].result()
+    assert sleeps == []
+
+
+def test_wait_batches_and_pages(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-a": "running"}, next_token="page-2"),
+        {"InstanceIds": ["i-a", "i-b"]},
+    )
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-b": "running"}),
+        {"InstanceIds": ["i-a", "i-b"], "NextToken": "page-2"},
+    )
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-c": "running"}),
+        {"InstanceIds": ["i-c"]},
+    )
+
+    got = InstancesRunningWaiter(ec2_client, batch_size=2).wait(["i-a", "i-b", "i-c"])
+
+    assert sorted(got) == ["i-a", "i-b", "i-c"]
+    assert sleeps == []
+
+
+def test_wait_times_out(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    for _ in range(3):
+        ec2_stubber.add_response(
+            "describe_instances",
+            instances_response({"i-a": "pending"}),
+            {"InstanceIds": ["i-a"]},
+        )
+
+    with pytest.raises(WaiterError) as exc_info:
+        InstancesRunningWaiter(ec2_client, timeout=20).wait(["i-a"])
+    assert "Max wait time exceeded" in str(exc_info.value)
+    # A third delay of 22.5 seconds would pass the timeout.
+    assert sleeps == [10, 15]
+
+
+def test_client_error_fails_every_resource(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    ec2_stubber.add_client_error(
+        "describe_instances",
+        "TestException",
+        expected_params={"InstanceIds": ["i-a", "i-b"]},
+    )
+
+    futures = InstancesRunningWaiter(ec2_client).submit(["i-a", "i-b"])
+
+    for future in futures.values():
+        with pytest.raises(ClientError):
+            future.result(timeout=5)
+
+
+def test_future_cancelled_during_poll(make_stubber, sleeps):
+    ec2_client = boto3.client("ec2")
+    ec2_stubber = make_stubber(ec2_client)
+    ec2_stubber.add_response(
+        "describe_instances",
+        instances_response({"i-a": "running", "i-b": "running"}),
+        {"InstanceIds": ["i-a", "i-b"]},
+    )
+    waiter = InstancesRunningWaiter(ec2_client)
+    futures = {"i-a": Future(), "i-b": Future()}
+    responses = waiter._responses
+
+    def cancel_then_respond(params):
+        # The caller cancels a future after the poll has checked for cancellation.
+        futures["i-a"].cancel()
+        yield from responses(params)
+
+    waiter._responses = cancel_then_respond
+    waiter._poll(futures, {})
+
+    assert futures["i-a"].cancelled()
+    assert futures["i-b"].result()["InstanceId"] == "i-b"
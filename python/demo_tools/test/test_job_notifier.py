@@ -0,0 +1,88 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for job_notifier.py.
+"""
+
+import json
+import queue
+import threading
+
+import pytest
+
+from demo_tools.job_notifier import JobNotifier
+
+
+class FakeMessage:
+    def __init__(self, job_id, status):
+        self.message_id = f"message-{job_id}"
+        self.body = json.dumps(
+            {"Message": json.dumps({"JobId": job_id, "Status": status})}
+        )
+        self.deleted = False
+
+    def delete(self):
+        self.deleted = True
+
+
+class FakeQueue:
+    """Hands out batches of messages, and nothing once they run out."""
+
+    def __init__(self, batches):
+        self.batches = queue.Queue()
+        for batch in batches:
+            self.batches.put(batch)
+        self.received = threading.Event()
+
+    def receive_messages(self, MaxNumberOfMessages, WaitTimeSeconds):
+        try:
+            return self.batches.get(timeout=0.05)
+        except queue.Empty:
+            self.received.set()
+            return []
+
+
+def test_watch_resolves_and_deletes_notification():
+    message = FakeMessage("job-1", "SUCCEEDED")
+    with JobNotifier(FakeQueue([[message]]), wait_time=0) as notifier:
+        assert notifier.wait("job-1", timeout=5) == "SUCCEEDED"
+    assert message.deleted
+
+
+def test_unwatched_notifications_stay_in_queue():
+    watched = FakeMessage("job-1", "SUCCEEDED")
+    early = FakeMessage("job-2", "FAILED")
+    others = [FakeMessage(f"other-{index}", "SUCCEEDED") for index in range(3)]
+    fake_queue = FakeQueue([[early, *others, watched]])
+    with JobNotifier(fake_queue, wait_time=0, max_notified=2) as notifier:
+        assert notifier.wait("job-1", timeout=5) == "SUCCEEDED"
+        assert watched.deleted
+        assert not early.deleted
+        assert not any(message.deleted for message in others)
+
+        # Only the last two unwatched notifications are remembered. A forgotten
+        # notification is still in the queue, so it is received again.
+        assert list(notifier._notified) == ["other-1", "other-2"]
+        assert notifier.wait("other-2", timeout=5) == "SUCCEEDED"
+        assert others[2].deleted
+
+        fake_queue.batches.put([early])
+        assert notifier.wait("job-2", timeout=5) == "FAILED"
+        assert early.deleted
+
+
+@pytest.mark.parametrize("polls", [1, 3])
+def test_watch_polls_job(polls):
+    results = [None] * (polls - 1) + ["done"]
+    with JobNotifier(initial_delay=0.01, max_delay=0.02) as notifier:
+        assert notifier.wait("job-1", lambda job_id: results.pop(0), timeout=5) == (
+            "done"
+        )
+    assert results == []
+
+
+def test_watch_polls_job_times_out():
+    with JobNotifier(initial_delay=0.01, max_delay=0.02) as notifier:
+        with pytest.raises(TimeoutError):
+            notifier.wait("job-1", lambda job_id: None, max_polls=2, timeout=5)
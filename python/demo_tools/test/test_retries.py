@@ -0,0 +1,246 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for retries.py.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from demo_tools.retries import (
+    ExponentialRetry,
+    MaxRetriesExceededError,
+    Retrier,
+    RetryBudget,
+    decorrelated_jitter,
+    full_jitter,
+    no_jitter,
+    retry_on_error_codes,
+)
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": "Test error"}}, "test_op")
+
+
+class Flaky:
+    """Raises or returns each of a list of outcomes in turn."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Replaces time.sleep and returns the list of delays it is called with."""
+    delays = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+def test_run_retries_until_success(sleeps):
+    func = Flaky(client_error("Throttling"), client_error("Throttling"), "done")
+    retrier = Retrier(
+        should_retry=retry_on_error_codes("Throttling"), rng=random.Random(1)
+    )
+
+    result, stats = retrier.run_with_stats(func)
+
+    assert result == "done"
+    assert stats.attempts == 3
+    assert len(sleeps) == 2
+    assert stats.total_sleep == pytest.approx(sum(sleeps))
+
+
+def test_run_raises_error_that_is_not_retried(sleeps):
+    func = Flaky(client_error("AccessDenied"), "done")
+    retrier = Retrier(should_retry=retry_on_error_codes("Throttling"))
+
+    with pytest.raises(ClientError):
+        retrier.run(func)
+    assert func.calls == 1
+    assert sleeps == []
+
+
+def test_run_gives_up_after_max_attempts(sleeps):
+    error = client_error("Throttling")
+    retrier = Retrier(
+        should_retry=retry_on_error_codes("Throttling"),
+        max_attempts=4,
+        jitter=no_jitter,
+    )
+
+    with pytest.raises(MaxRetriesExceededError) as exc_info:
+        retrier.run(Flaky(error))
+    assert "after 4 attempts" in str(exc_info.value)
+    assert exc_info.value.last_error is error
+    assert exc_info.value.stats.attempts == 4
+    assert sleeps == [1, 2, 4]
+
+
+def test_run_gives_up_at_deadline(sleeps):
+    retrier = Retrier(
+        retry_on_result=lambda result: result is None,
+        max_attempts=10,
+        jitter=no_jitter,
+        deadline=2.5,
+    )
+
+    with pytest.raises(MaxRetriesExceededError) as exc_info:
+        retrier.run(Flaky(None))
+    assert "deadline" in str(exc_info.value)
+    assert exc_info.value.last_error is None
+    assert exc_info.value.stats.attempts == 3
+    assert sleeps == [1, 2]
+
+
+def test_budget_is_shared_across_threads(sleeps):
+    budget = RetryBudget(max_tokens=3)
+    errors = []
+
+    def run():
+        retrier = Retrier(
+            retry_on_result=lambda result: result is None,
+            max_attempts=10,
+            budget=budget,
+        )
+        try:
+            retrier.run(Flaky(None))
+        except MaxRetriesExceededError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert all("budget" in str(error) for error in errors)
+    # Each thread makes its first attempt, and only three retries are allowed.
+    assert sum(error.stats.attempts for error in errors) == 4 + 3
+    assert budget.tokens == 0
+
+
+def test_budget_is_refilled_by_success():
+    budget = RetryBudget(max_tokens=2, success_refill=0.5)
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+    Retrier(budget=budget).run(lambda: "done")
+    assert budget.tokens == 0.5
+    assert not budget.try_acquire()
+    for _ in range(5):
+        budget.record_success()
+    assert budget.tokens == 2
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_jitter_bounds(seed):
+    rng = random.Random(seed)
+    base_delay, max_delay = 0.5, 8
+    previous = None
+    for attempt in range(1, 12):
+        capped = min(max_delay, base_delay * 2 ** (attempt - 1))
+        assert no_jitter(rng, base_delay, max_delay, attempt, None) == capped
+        assert 0 <= full_jitter(rng, base_delay, max_delay, attempt, None) <= capped
+        delay = decorrelated_jitter(rng, base_delay, max_delay, attempt, previous)
+        assert base_delay <= delay <= min(max_delay, 3 * (previous or base_delay))
+        previous = delay
+
+
+def test_seeded_rng_repeats_delays(sleeps):
+    def run(seed):
+        retrier = Retrier(
+            retry_on_result=lambda result: result is None,
+            max_attempts=6,
+            jitter=decorrelated_jitter,
+            rng=random.Random(seed),
+        )
+        with pytest.raises(MaxRetriesExceededError):
+            retrier.run(Flaky(None))
+
+    run(7)
+    first = list(sleeps)
+    sleeps.clear()
+    run(7)
+    assert sleeps == first
+
+
+@pytest.mark.parametrize(
+    "outcomes,expected",
+    [
+        ((None, None, "ready"), "ready"),
+        ((client_error("NotReady"), "ready"), "ready"),
+    ],
+)
+def test_exponential_retry(sleeps, outcomes, expected):
+    func = Flaky(*outcomes)
+    func.__name__ = "flaky"
+
+    assert ExponentialRetry(func, "NotReady", max_sleep=8).run() == expected
+    assert func.calls == len(outcomes)
+
+
+def test_exponential_retry_gives_up(sleeps):
+    func = Flaky(None)
+    func.__name__ = "flaky"
+
+    with pytest.raises(MaxRetriesExceededError):
+        ExponentialRetry(func, "NotReady", max_sleep=8, jitter=no_jitter).run()
+    assert func.calls == 5
+    assert sleeps == [1, 2, 4, 8]
+
+
+def test_run_async():
+    outcomes = [client_error("Throttling"), None, "done"]
+    calls = []
+
+    async def func(value):
+        calls.append(value)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    retrier = Retrier(
+        should_retry=retry_on_error_codes("Throttling"),
+        retry_on_result=lambda result: result is None,
+        base_delay=0.001,
+        rng=random.Random(1),
+    )
+
+    result, stats = asyncio.run(retrier.run_async_with_stats(func, "value"))
+
+    assert result == "done"
+    assert calls == ["value"] * 3
+    assert stats.attempts == 3
+
+
+def test_run_async_gives_up():
+    async def func():
+        return None
+
+    retrier = Retrier(
+        retry_on_result=lambda result: result is None,
+        max_attempts=2,
+        base_delay=0.001,
+    )
+
+    with pytest.raises(MaxRetriesExceededError):
+        asyncio.run(retrier.run_async(func))
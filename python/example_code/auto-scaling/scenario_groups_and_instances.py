@@ -34,6 +34,7 @@ from action_wrapper import AutoScalingWrapper
 # Add relative path to include demo_tools in this code example without needing to set up.
 sys.path.append("../..")
 import demo_tools.question as q  # noqa
+from demo_tools.custom_waiter import BatchWaiter, WaitState  # noqa
 from demo_tools.retries import wait  # noqa
 
 # Configure coloredlogs
@@ -257,23 +258,43 @@ def wait_for_group(group_name: str, as_wrapper: AutoScalingWrapper) -> list:
     return wait_for_instances(instance_ids, as_wrapper)
 
 
+class InstancesReadyWaiter(BatchWaiter):
+    """
+    Waits for instances in Auto Scaling groups to be in service or terminated.
+    Instances that are no longer in a group are terminated, so they are done too.
+    """
+
+    def __init__(self, autoscaling_client):
+        super().__init__(
+            "InstancesReady",
+            "DescribeAutoScalingInstances",
+            "InstanceIds",
+            "AutoScalingInstances",
+            "InstanceId",
+            "LifecycleState",
+            {"InService": WaitState.SUCCESS, "Terminated": WaitState.SUCCESS},
+            autoscaling_client,
+            batch_size=50,
+            missing_state=WaitState.SUCCESS,
+        )
+
+
 def wait_for_instances(instance_ids: list, as_wrapper: AutoScalingWrapper) -> list:
     """
     Waits for instances to start or stop in an Auto Scaling group.
     Prints the data for each instance after scaling activities are complete.
 
+    All instances are polled together, with one call for each batch of 50 instances.
+
     :param instance_ids: A list of instance IDs to wait for.
     :param as_wrapper: The AutoScalingWrapper that manages Auto Scaling groups.
     :return: A list of instance IDs that were waited on.
     """
-    ready = False
     instances = []
-    while not ready:
-        instances = as_wrapper.describe_instances(instance_ids) if instance_ids else []
-        if all([x["LifecycleState"] in ["Terminated", "InService"] for x in instances]):
-            ready = True
-        else:
-            wait(10)
+    if instance_ids:
+        waiter = InstancesReadyWaiter(as_wrapper.autoscaling_client)
+        ready = waiter.wait(instance_ids)
+        instances = [instance for instance in ready.values() if instance is not None]
     if instances:
         print(
             f"Here are the details of the instance{'s' if len(instances) > 1 else ''}:"
@@ -0,0 +1,145 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Benchmarks converse_async.py without calling Amazon Bedrock. A local stub client
+replays a canned response stream, blocking for a set latency before the response
+and between deltas, the way a real HTTP stream does.
+
+Two ways of streaming many prompts from one event loop are compared:
+
+* Blocking: call the client and iterate the stream inside the async generator,
+  yielding to the loop with asyncio.sleep(0) between deltas.
+* Offloaded: use AsyncConverse, which runs the request and the stream on a thread
+  pool with a concurrency limit.
+
+Run it with, for example:
+
+    python benchmark_converse_async.py --prompts 200 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from converse_async import AsyncConverse
+
+
+class ReplayStream:
+    """Replays canned ConverseStream events, blocking between deltas."""
+
+    def __init__(self, deltas, delta_delay):
+        self.deltas = deltas
+        self.delta_delay = delta_delay
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        yield {"messageStart": {"role": "assistant"}}
+        for delta in self.deltas:
+            if self._closed.wait(self.delta_delay):
+                raise ConnectionError("The stream was closed.")
+            yield {
+                "contentBlockDelta": {"delta": {"text": delta}, "contentBlockIndex": 0}
+            }
+        yield {"contentBlockStop": {"contentBlockIndex": 0}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+    def close(self):
+        self._closed.set()
+
+
+class ReplayClient:
+    """
+    A stand-in for a Bedrock Runtime client whose converse_stream method blocks
+    for a set latency and returns a canned stream.
+    """
+
+    def __init__(self, latency, delta_count, delta_delay):
+        self.latency = latency
+        self.deltas = [f"token{index} " for index in range(delta_count)]
+        self.delta_delay = delta_delay
+
+    def converse_stream(self, **kwargs):
+        time.sleep(self.latency)
+        return {"stream": ReplayStream(self.deltas, self.delta_delay)}
+
+
+async def blocking_converse_stream(client, prompt):
+    """Streams a response the way converse_async.py did before it used a thread pool."""
+    response = client.converse_stream(
+        modelId="replay", messages=[{"role": "user", "content": [{"text": prompt}]}]
+    )
+    for chunk in response["stream"]:
+        if "contentBlockDelta" in chunk:
+            yield chunk["contentBlockDelta"]["delta"]["text"]
+        await asyncio.sleep(0)
+
+
+async def run_prompts(make_stream, prompt_count):
+    """
+    Streams all prompts at the same time from one event loop.
+
+    :return: The responses and the number of seconds it took to get them.
+    """
+
+    async def gather(prompt):
+        return "".join([text async for text in make_stream(prompt)])
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *[gather(f"Prompt {index}") for index in range(prompt_count)]
+    )
+    return responses, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--prompts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--deltas", type=int, default=20)
+    parser.add_argument("--delta-delay", type=float, default=0.01)
+    parser.add_argument("--skip-blocking", action="store_true")
+    args = parser.parse_args()
+
+    client = ReplayClient(args.latency, args.deltas, args.delta_delay)
+    expected = "".join(client.deltas)
+    print(
+        f"{args.prompts} prompts, {args.deltas} deltas each, {args.latency}s latency, "
+        f"{args.delta_delay}s between deltas."
+    )
+    print(f"{'Method':<12}{'Seconds':>10}{'Prompts/s':>12}")
+
+    results = []
+    if not args.skip_blocking:
+        results.append(
+            (
+                "Blocking",
+                *await run_prompts(
+                    lambda prompt: blocking_converse_stream(client, prompt),
+                    args.prompts,
+                ),
+            )
+        )
+    converse = AsyncConverse(client, max_concurrency=args.concurrency)
+    results.append(
+        (
+            "Offloaded",
+            *await run_prompts(
+                lambda prompt: converse.converse_stream("replay", [prompt]),
+                args.prompts,
+            ),
+        )
+    )
+    converse.close()
+
+    for name, responses, duration in results:
+        assert all(response == expected for response in responses), name
+        print(f"{name:<12}{duration:>10.2f}{args.prompts / duration:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,28 +6,175 @@
 Use the Conversation API to send a text message to Anthropic Claude. Streaming the
 responses allows running the requests in parallel, speeding overall throughput for
 several requests.
+
+Boto3 clients are blocking, so the request and the iteration of the response stream
+run on a thread pool and the text deltas are handed back to the asyncio event loop.
+A semaphore limits the number of requests in flight, each request has a timeout, and
+the deltas of each response are buffered in a bounded queue so a slow consumer holds
+back the thread that reads the stream.
 """
 
 import asyncio
 import logging
+import threading
 import time
+import weakref
 from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from os import environ
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logging.basicConfig(level=environ.get("LOG_LEVEL", "WARN").upper(), force=True)
 
-# Create a Bedrock Runtime client in the AWS Region you want to use.
-client = boto3.client("bedrock-runtime", region_name="us-east-1")
+# The maximum number of requests in flight at the same time.
+MAX_CONCURRENCY = 32
+
+# The maximum number of text deltas of one response that wait to be consumed. When a
+# consumer falls behind, the thread that reads the response stream waits for it.
+MAX_BUFFERED_DELTAS = 64
+
+# Create a Bedrock Runtime client in the AWS Region you want to use. Each request in
+# flight holds an HTTP connection, so the connection pool is sized to match.
+client = boto3.client(
+    "bedrock-runtime",
+    region_name="us-east-1",
+    config=Config(max_pool_connections=MAX_CONCURRENCY),
+)
 
 # Set the model ID, e.g., Claude 3 Haiku.
 model_id = "anthropic.claude-3-haiku-20240307-v1:0"
 
-
-async def converse_stream(user_message: str) -> AsyncIterator[str]:
-    """Call Bedrock Runtime streaming. Yield each text item in the stream. Add a sleep(0) to unblock the asyncio loop."""
+# Marks the end of a response stream.
+_END_OF_STREAM = object()
+
+
+class AsyncConverse:
+    """
+    Sends Converse API requests from asyncio code without blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        bedrock_client,
+        max_concurrency=MAX_CONCURRENCY,
+        timeout=60,
+        max_buffered_deltas=MAX_BUFFERED_DELTAS,
+    ):
+        """
+        :param bedrock_client: A Boto3 Bedrock Runtime client. Its connection pool
+                               should have at least max_concurrency connections.
+        :param max_concurrency: The maximum number of requests in flight. Each
+                                request in flight uses one thread of the pool.
+        :param timeout: The default number of seconds a request can take, from
+                        sending the request to receiving the last delta.
+        :param max_buffered_deltas: The maximum number of text deltas of a response
+                                    that wait for the caller to consume them.
+        """
+        self.client = bedrock_client
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_buffered_deltas = max_buffered_deltas
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # An asyncio.Semaphore can only be used by one event loop, and on older
+        # versions of Python it binds to a loop when it is created. Each loop gets its
+        # own semaphore, created from inside that loop the first time it is needed.
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def close(self):
+        """Shuts down the thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _semaphore(self):
+        """Gets the semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def converse_stream(
+        self, model_id, messages, inference_config=None, timeout=None
+    ) -> AsyncIterator[str]:
+        """
+        Sends messages to a model and yields the text deltas of the response as they
+        arrive. Waits for a free slot when max_concurrency requests are in flight.
+
+        :param model_id: The ID of the model to use.
+        :param messages: The messages of the conversation.
+        :param inference_config: The inference configuration of the request.
+        :param timeout: The number of seconds the request can take. Defaults to the
+                        timeout of this object.
+        :return: An async iterator of text deltas.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            # The pool thread takes a slot before it queues a delta and the loop
+            # gives it back when the delta is consumed, so the queue never holds more
+            # than max_buffered_deltas deltas and the end of the stream.
+            queue = asyncio.Queue(maxsize=self.max_buffered_deltas + 1)
+            slots = threading.Semaphore(self.max_buffered_deltas)
+            stream = None
+            closed = False
+
+            def pump():
+                # Runs on the thread pool: sends the request and puts each text
+                # delta on the queue of the event loop.
+                nonlocal stream
+                try:
+                    request = {"modelId": model_id, "messages": messages}
+                    if inference_config is not None:
+                        request["inferenceConfig"] = inference_config
+                    response = self.client.converse_stream(**request)
+                    stream = response["stream"]
+                    if closed:
+                        stream.close()
+                        return
+                    for chunk in stream:
+                        if "contentBlockDelta" in chunk:
+                            text = chunk["contentBlockDelta"]["delta"]["text"]
+                            slots.acquire()
+                            if closed:
+                                return
+                            loop.call_soon_threadsafe(queue.put_nowait, text)
+                    loop.call_soon_threadsafe(queue.put_nowait, _END_OF_STREAM)
+                except Exception as error:
+                    if not closed:
+                        loop.call_soon_threadsafe(queue.put_nowait, error)
+
+            pump_future = loop.run_in_executor(self._executor, pump)
+            try:
+                while True:
+                    item = await asyncio.wait_for(
+                        queue.get(), max(deadline - loop.time(), 0)
+                    )
+                    if item is _END_OF_STREAM:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    slots.release()
+                    yield item
+            finally:
+                # On a timeout or when the caller stops early, closing the stream
+                # ends the iteration on the pool thread and frees it. Giving back a
+                # slot wakes the pool thread if it is waiting for the caller.
+                closed = True
+                slots.release()
+                if stream is not None:
+                    stream.close()
+                if not pump_future.done():
+                    pump_future.cancel()
+
+
+async def converse_stream(
+    converse: AsyncConverse, user_message: str
+) -> AsyncIterator[str]:
+    """Call Bedrock Runtime streaming. Yield each text item in the stream."""
     conversation = [
         {
             "role": "user",
@@ -39,20 +186,13 @@ async def converse_stream(user_message: str) -> AsyncIterator[str]:
         yield f""""{user_message}":\n"""
 
         # Send the message to the model, using a basic inference configuration.
-        response = client.converse_stream(
-            modelId=model_id,
-            messages=conversation,
-            inferenceConfig={"maxTokens": 512, "temperature": 0.5, "topP": 0.9},
-        )
-
-        for chunk in response["stream"]:
-            if "contentBlockDelta" in chunk:
-                text = chunk["contentBlockDelta"]["delta"]["text"]
-                print(f"In converse_stream {user_message} {text}")
-                yield text
-            # This await sleep(0) is necessary to allow the asyncio runtime an
-            # opportunity to jump to other tasks in the block.
-            await asyncio.sleep(0)
+        async for text in converse.converse_stream(
+            model_id,
+            conversation,
+            inference_config={"maxTokens": 512, "temperature": 0.5, "topP": 0.9},
+        ):
+            logging.info("In converse_stream %s %s", user_message, text)
+            yield text
 
     except (ClientError, Exception) as e:
         print(f"ERROR: Can't invoke '{model_id}'. Reason: {e}")
@@ -63,22 +203,26 @@ async def gather_stream(iterator: AsyncIterator[str]) -> str:
     return "".join([item async for item in iterator])
 
 
-def make_tasks():
+def make_tasks(converse):
     prompts = [f"Count to {i * 10} in prime numbers" for i in range(2, 10)]
-    return [converse_stream(prompt) for prompt in prompts]
+    return [converse_stream(converse, prompt) for prompt in prompts]
 
 
 async def main():
+    converse = AsyncConverse(client)
+
     start_parallel = time.time()
     parallel_results = await asyncio.gather(
-        *[gather_stream(task) for task in make_tasks()]
+        *[gather_stream(task) for task in make_tasks(converse)]
     )
     end_parallel = time.time()
 
     start_sequential = time.time()
-    sequential_results = [await gather_stream(task) for task in make_tasks()]
+    sequential_results = [await gather_stream(task) for task in make_tasks(converse)]
     end_sequential = time.time()
 
+    converse.close()
+
     logging.info("Parallel results: \n%s", parallel_results)
     logging.info("Sequential results:\n%s", sequential_results)
 
@@ -87,9 +231,9 @@ async def main():
 
     print(
         "\n"
-        "If you review the output of this program, you should see two sets of streaming log statements.\n"
-        'The first should intermix "Count to 20", "Count to 30", etc. The second set should not mix,\n'
-        'and be "Count to 20", "Count to 20", ... "Count to 90", " Count to 90".\n'
+        "Run with LOG_LEVEL=INFO to see the streaming log statements. In the first set,\n"
+        'the deltas of "Count to 20", "Count to 30", etc. are intermixed. The second set\n'
+        'does not mix, and is "Count to 20", "Count to 20", ... "Count to 90".\n'
         "\n"
         "This shows the parallel nature of the first set of requests, and the sequential nature of the second set."
     )
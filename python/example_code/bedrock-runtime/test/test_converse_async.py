@@ -0,0 +1,139 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "models", "anthropic_claude")
+)
+from benchmark_converse_async import ReplayClient
+from converse_async import AsyncConverse
+
+
+async def collect(converse, prompt, **kwargs):
+    return "".join(
+        [text async for text in converse.converse_stream("replay", [prompt], **kwargs)]
+    )
+
+
+def test_converse_stream_limits_concurrency():
+    client = ReplayClient(latency=0.05, delta_count=3, delta_delay=0)
+    calls = []
+    active = []
+    max_active = []
+    lock = threading.Lock()
+    converse_stream = client.converse_stream
+
+    def counting_converse_stream(**kwargs):
+        with lock:
+            calls.append(kwargs)
+            active.append(1)
+            max_active.append(len(active))
+        try:
+            return converse_stream(**kwargs)
+        finally:
+            with lock:
+                active.pop()
+
+    client.converse_stream = counting_converse_stream
+    converse = AsyncConverse(client, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*[collect(converse, "hi") for _ in range(6)])
+
+    responses = asyncio.run(run())
+    converse.close()
+
+    assert responses == ["".join(client.deltas)] * 6
+    assert len(calls) == 6
+    assert max(max_active) == 2
+    assert calls[0]["messages"] == ["hi"]
+    assert "inferenceConfig" not in calls[0]
+
+
+def test_converse_stream_from_several_event_loops():
+    client = ReplayClient(latency=0.01, delta_count=3, delta_delay=0)
+    converse = AsyncConverse(client, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*[collect(converse, "hi") for _ in range(6)])
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+    converse.close()
+
+    assert first == second == ["".join(client.deltas)] * 6
+
+
+def test_converse_stream_backpressure():
+    client = ReplayClient(latency=0, delta_count=50, delta_delay=0)
+    read = []
+    deltas = client.deltas
+
+    class CountingDeltas:
+        def __iter__(self):
+            for delta in deltas:
+                read.append(delta)
+                yield delta
+
+    client.deltas = CountingDeltas()
+    converse = AsyncConverse(client, max_buffered_deltas=4)
+
+    async def run():
+        stream = converse.converse_stream("replay", ["hi"])
+        first = await stream.__anext__()
+        await asyncio.sleep(0.2)
+        read_while_waiting = len(read)
+        rest = [text async for text in stream]
+        return first, read_while_waiting, rest
+
+    first, read_while_waiting, rest = asyncio.run(run())
+    converse.close()
+
+    assert read_while_waiting <= 6
+    assert [first, *rest] == deltas
+
+
+def test_converse_stream_timeout():
+    client = ReplayClient(latency=0, delta_count=100, delta_delay=0.05)
+    converse = AsyncConverse(client, timeout=0.2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect(converse, "hi"))
+    converse.close()
+
+
+def test_converse_stream_error():
+    class FailingClient:
+        def converse_stream(self, **kwargs):
+            raise ValueError("Test error")
+
+    converse = AsyncConverse(FailingClient())
+
+    with pytest.raises(ValueError):
+        asyncio.run(collect(converse, "hi"))
+    converse.close()
+
+
+def test_benchmark_converse_async():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "benchmark_converse_async.py",
+            "--prompts=20",
+            "--latency=0.01",
+            "--deltas=5",
+            "--delta-delay=0.001",
+        ],
+        cwd=os.path.join(os.path.dirname(__file__), "..", "models", "anthropic_claude"),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Offloaded" in result.stdout
@@ -1,15 +1,24 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import threading
+
 import boto3
 
 from date_utilities import DateUtilities
 
 DEFAULT_QUERY = "fields @timestamp, @message | sort @timestamp asc"
 DEFAULT_LOG_GROUP = "/workflows/cloudwatch-logs/large-query"
+# CloudWatch Logs Insights allows a limited number of concurrent queries per account.
+# Stay below that limit so other users of the account can still run queries.
+DEFAULT_MAX_CONCURRENT_QUERIES = 10
+DEFAULT_INITIAL_BUCKETS = 4
+TERMINAL_QUERY_STATUSES = ["Complete", "Failed", "Cancelled", "Timeout", "Unknown"]
+
 
 class DateOutOfBoundsError(Exception):
     """Exception raised when the date range for a query is out of bounds."""
@@ -21,6 +30,10 @@ class CloudWatchQuery:
     """
     A class to query AWS CloudWatch logs within a specified date range.
 
+    The date range is split into buckets that are queried concurrently on a bounded
+    thread pool. When a bucket returns the maximum number of logs, the rest of the
+    bucket is split in two and queried again, until every log in the range is found.
+
     :vartype date_range: tuple
     :ivar limit: Maximum number of log entries to return.
     :vartype limit: int
@@ -28,78 +41,216 @@ class CloudWatchQuery:
     :query_string str: query
     """
 
-    def __init__(self, log_group: str = DEFAULT_LOG_GROUP, query_string: str=DEFAULT_QUERY) -> None:
-        self.lock = threading.Lock()
+    def __init__(
+        self,
+        log_group: str = DEFAULT_LOG_GROUP,
+        query_string: str = DEFAULT_QUERY,
+        client=None,
+        max_concurrent_queries: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        initial_buckets: int = DEFAULT_INITIAL_BUCKETS,
+    ) -> None:
+        """
+        :param log_group: Name of the log group to query.
+        :param query_string: The CloudWatch Logs Insights query to run.
+        :param client: A Boto3 CloudWatch Logs client. The client is shared by all
+                       query threads. When not specified, a default client is made.
+        :param max_concurrent_queries: The maximum number of queries to run at the
+                                       same time.
+        :param initial_buckets: The number of equal parts to split the date range
+                                into before the first queries are started.
+        """
+        self.client = client if client is not None else boto3.client("logs")
         self.log_group = log_group
         self.query_string = query_string
+        self.max_concurrent_queries = max_concurrent_queries
+        self.initial_buckets = initial_buckets
         self.query_results = []
+        self.result_count = 0
+        self.duplicate_count = 0
         self.query_duration = None
         self.datetime_format = "%Y-%m-%d %H:%M:%S.%f"
         self.date_utilities = DateUtilities()
         self.limit = 10000
+        self.min_poll_delay = 0.25
+        self.max_poll_delay = 5
+        self._stop = threading.Event()
 
     def query_logs(self, date_range):
         """
-        Executes a CloudWatch logs query for a specified date range and calculates the execution time of the query.
+        Executes a CloudWatch logs query for a specified date range and calculates the
+        execution time of the query. All logs are kept in the `query_results`
+        attribute. To process large date ranges without holding every log in memory,
+        use `iter_logs` instead.
 
-        :return: A batch of logs retrieved from the CloudWatch logs query.
-        :rtype: list
+        :param date_range: The date range to query, as a tuple of ISO 8601 strings.
+        :type date_range: tuple
         """
-        start_time = datetime.now()
+        self.query_results = list(self.iter_logs(date_range))
+
+    def iter_logs(self, date_range):
+        """
+        Queries a date range and yields each log as soon as it and all earlier logs
+        in the range have been retrieved, so logs are yielded in timestamp order while
+        later parts of the range are still being queried.
+
+        :param date_range: The date range to query, as a tuple of ISO 8601 strings.
+        :type date_range: tuple
+        :return: Yields logs, each a list of {"field", "value"} dicts.
+        """
+        for batch in self.iter_batches(date_range):
+            yield from batch
+
+    def export_logs(self, date_range, sink):
+        """
+        Queries a date range and writes the logs to a result sink one batch at a
+        time, so the size of the date range is not limited by available memory.
 
+        :param date_range: The date range to query, as a tuple of ISO 8601 strings.
+        :type date_range: tuple
+        :param sink: A ResultSink that receives each batch of logs. The sink is
+                     closed when the export finishes.
+        """
+        with sink:
+            for batch in self.iter_batches(date_range):
+                sink.write(batch)
+
+    def iter_batches(self, date_range):
+        """
+        Queries a date range and yields the logs of each bucket as soon as the bucket
+        and all earlier buckets have been retrieved. Batches are yielded in timestamp
+        order.
+
+        A full bucket is continued from its most recent timestamp, so the logs at
+        that timestamp are returned twice. These duplicates are removed.
+
+        :param date_range: The date range to query, as a tuple of ISO 8601 strings.
+        :type date_range: tuple
+        :return: Yields lists of logs, each log a list of {"field", "value"} dicts.
+        """
+        start_time = datetime.now()
         start_date, end_date = self.date_utilities.normalize_date_range_format(
             date_range, from_format="unix_timestamp", to_format="datetime"
         )
-
         logging.info(
             f"Original query:"
             f"\n       START:     {start_date}"
             f"\n       END:       {end_date}"
             f"\n       LOG GROUP: {self.log_group}"
         )
-        self.recursive_query((start_date, end_date))
-        end_time = datetime.now()
-        self.query_duration = (end_time - start_time).total_seconds()
+        start_ms = round(
+            self.date_utilities.convert_iso8601_to_unix_timestamp(start_date)
+        )
+        end_ms = round(self.date_utilities.convert_iso8601_to_unix_timestamp(end_date))
+
+        self.result_count = 0
+        self.duplicate_count = 0
+        self._stop.clear()
+        # Counts of the logs yielded at the most recent timestamp. Batches arrive in
+        # timestamp order, so a duplicate can only have the most recent timestamp.
+        latest_timestamp = None
+        latest_counts = Counter()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_queries)
+        try:
+            # Each segment is either a list of logs that are ready to yield or a
+            # future for a bucket that is still being queried. Segments are kept in
+            # timestamp order.
+            segments = deque(
+                executor.submit(self._query_bucket, executor, bucket)
+                for bucket in self.split_range((start_ms, end_ms), self.initial_buckets)
+            )
+            while segments:
+                segment = segments.popleft()
+                if isinstance(segment, list):
+                    batch = []
+                    # Logs from earlier batches that this batch can repeat. Identical
+                    # logs within one batch are distinct log events and are kept.
+                    repeatable = latest_counts.copy()
+                    for log in segment:
+                        timestamp = self._timestamp(log)
+                        if timestamp != latest_timestamp:
+                            latest_timestamp = timestamp
+                            latest_counts = Counter()
+                            repeatable = Counter()
+                        key = tuple((item["field"], item["value"]) for item in log)
+                        if repeatable[key] > 0:
+                            repeatable[key] -= 1
+                            self.duplicate_count += 1
+                            continue
+                        latest_counts[key] += 1
+                        batch.append(log)
+                    if batch:
+                        self.result_count += len(batch)
+                        yield batch
+                else:
+                    logs, child_futures = segment.result()
+                    segments.extendleft(reversed(child_futures))
+                    segments.appendleft(logs)
+        finally:
+            self._stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.query_duration = (datetime.now() - start_time).total_seconds()
 
-    def recursive_query(self, date_range):
+    @staticmethod
+    def split_range(date_range, parts):
         """
-        Processes logs within a given date range, fetching batches of logs recursively if necessary.
+        Splits a range of UNIX timestamps in milliseconds into equal, non-overlapping
+        parts.
 
-        :param date_range: The date range to fetch logs for, specified as a tuple (start_timestamp, end_timestamp).
+        :param date_range: The start and end of the range, inclusive.
         :type date_range: tuple
-        :return: None if the recursive fetching is continued or stops when the final batch of logs is processed.
-                 Although it doesn't explicitly return the query results, this method accumulates all fetched logs
-                 in the `self.query_results` attribute.
-        :rtype: None
-        """
-        batch_of_logs = self.perform_query(date_range)
-        # Add the batch to the accumulated logs
-        with self.lock:
-            self.query_results.extend(batch_of_logs)
-        if len(batch_of_logs) == self.limit:
-            logging.info(f"Fetched {self.limit}, checking for more...")
-            most_recent_log = self.find_most_recent_log(batch_of_logs)
-            most_recent_log_timestamp = next(
-                item["value"]
-                for item in most_recent_log
-                if item["field"] == "@timestamp"
-            )
-            new_range = (most_recent_log_timestamp, date_range[1])
-            midpoint = self.date_utilities.find_middle_time(new_range)
+        :param parts: The number of parts to split the range into.
+        :type parts: int
+        :return: A list of (start, end) tuples in order.
+        :rtype: list
+        """
+        start, end = date_range
+        parts = max(1, min(parts, end - start + 1))
+        step = (end - start + 1) / parts
+        bounds = [start + round(step * index) for index in range(parts)] + [end + 1]
+        return [(bounds[index], bounds[index + 1] - 1) for index in range(parts)]
 
-            first_half_thread = threading.Thread(
-                target=self.recursive_query,
-                args=((most_recent_log_timestamp, midpoint),),
-            )
-            second_half_thread = threading.Thread(
-                target=self.recursive_query, args=((midpoint, date_range[1]),)
-            )
+    def _query_bucket(self, executor, bucket):
+        """
+        Queries one bucket. When the bucket returns the maximum number of logs, the
+        rest of the bucket is split in two and the halves are submitted to the
+        executor.
 
-            first_half_thread.start()
-            second_half_thread.start()
+        :param executor: The executor that runs the queries.
+        :param bucket: The start and end of the bucket in UNIX milliseconds.
+        :return: The logs of the bucket sorted by timestamp, and the futures of the
+                 queries for the rest of the bucket, in order.
+        """
+        logs = self.perform_query(bucket)
+        logs.sort(key=self._timestamp)
+        child_futures = []
+        if len(logs) == self.limit and not self._stop.is_set():
+            logging.info(f"Fetched {self.limit}, checking for more...")
+            most_recent_ms = round(
+                self.date_utilities.convert_iso8601_to_unix_timestamp(
+                    self._timestamp(logs[-1])
+                )
+            )
+            # Logs that share the most recent timestamp can be split across the
+            # limit, so the rest of the range starts at that timestamp. When more
+            # than the limit share one timestamp, move on to avoid an endless loop.
+            rest_start = max(most_recent_ms, bucket[0] + 1)
+            if rest_start <= bucket[1]:
+                child_futures = [
+                    executor.submit(self._query_bucket, executor, child)
+                    for child in self.split_range((rest_start, bucket[1]), 2)
+                ]
+        return logs, child_futures
 
-            first_half_thread.join()
-            second_half_thread.join()
+    @staticmethod
+    def _timestamp(log):
+        """
+        Gets the @timestamp value of a log. Timestamps have a fixed-width format, so
+        they sort correctly as strings.
+        """
+        for item in log:
+            if item["field"] == "@timestamp":
+                return item["value"]
+        return ""
 
     def find_most_recent_log(self, logs):
         """
@@ -108,23 +259,10 @@ class CloudWatchQuery:
         :return: log
         :type :return List containing log item details
         """
-        most_recent_log = None
-        most_recent_date = "1970-01-01 00:00:00.000"
-
-        for log in logs:
-            for item in log:
-                if item["field"] == "@timestamp":
-                    logging.debug(f"Compared: {item['value']} to {most_recent_date}")
-                    if (
-                        self.date_utilities.compare_dates(
-                            item["value"], most_recent_date
-                        )
-                        == item["value"]
-                    ):
-                        logging.debug(f"New most recent: {item['value']}")
-                        most_recent_date = item["value"]
-                        most_recent_log = log
-        logging.info(f"Most recent log date of batch: {most_recent_date}")
+        most_recent_log = max(logs, key=self._timestamp, default=None)
+        logging.info(
+            f"Most recent log date of batch: {self._timestamp(most_recent_log or [])}"
+        )
         return most_recent_log
 
     # snippet-start:[python.example_code.cloudwatch_logs.start_query]
@@ -132,95 +270,70 @@ class CloudWatchQuery:
         """
         Performs the actual CloudWatch log query.
 
-        :param date_range: A tuple representing the start and end datetime for the query.
+        :param date_range: A tuple of the start and end of the query in UNIX
+                           milliseconds.
         :type date_range: tuple
         :return: A list containing the query results.
         :rtype: list
         """
-        client = boto3.client("logs")
         try:
-            try:
-                start_time = round(
-                    self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])
-                )
-                end_time = round(
-                    self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
-                )
-                response = client.start_query(
-                    logGroupName=self.log_group,
-                    startTime=start_time,
-                    endTime=end_time,
-                    queryString=self.query_string,
-                    limit=self.limit,
-                )
-                query_id = response["queryId"]
-            except client.exceptions.ResourceNotFoundException as e:
-                raise DateOutOfBoundsError(f"Resource not found: {e}")
-            while True:
-                time.sleep(1)
-                results = client.get_query_results(queryId=query_id)
-                if results["status"] in [
-                    "Complete",
-                    "Failed",
-                    "Cancelled",
-                    "Timeout",
-                    "Unknown",
-                ]:
-                    return results.get("results", [])
+            query_id = self._initiate_query(self.client, date_range, self.limit)
         except DateOutOfBoundsError:
             return []
+        return self._wait_for_query_results(self.client, query_id)
 
     def _initiate_query(self, client, date_range, max_logs):
         """
-        Initiates the CloudWatch logs query.
+        Initiates the CloudWatch logs query. When the account is already running the
+        maximum number of concurrent queries, waits and tries again.
 
-        :param date_range: A tuple representing the start and end datetime for the query.
+        :param date_range: A tuple of the start and end of the query in UNIX
+                           milliseconds.
         :type date_range: tuple
         :param max_logs: The maximum number of logs to retrieve.
         :type max_logs: int
         :return: The query ID as a string.
         :rtype: str
         """
-        try:
-            start_time = round(
-                self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])
-            )
-            end_time = round(
-                self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
-            )
-            response = client.start_query(
-                logGroupName=self.log_group,
-                startTime=start_time,
-                endTime=end_time,
-                queryString=self.query_string,
-                limit=max_logs,
-            )
-            return response["queryId"]
-        except client.exceptions.ResourceNotFoundException as e:
-            raise DateOutOfBoundsError(f"Resource not found: {e}")
+        delay = self.min_poll_delay
+        while True:
+            try:
+                response = client.start_query(
+                    logGroupName=self.log_group,
+                    startTime=date_range[0],
+                    endTime=date_range[1],
+                    queryString=self.query_string,
+                    limit=max_logs,
+                )
+                return response["queryId"]
+            except client.exceptions.ResourceNotFoundException as e:
+                raise DateOutOfBoundsError(f"Resource not found: {e}")
+            except client.exceptions.LimitExceededException:
+                logging.info(f"Concurrent query limit reached, waiting {delay}s...")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_poll_delay)
 
     # snippet-end:[python.example_code.cloudwatch_logs.start_query]
 
     # snippet-start:[python.example_code.cloudwatch_logs.get_query_results]
     def _wait_for_query_results(self, client, query_id):
         """
-        Waits for the query to complete and retrieves the results.
+        Waits for the query to complete and retrieves the results. The polling
+        interval starts short and grows while the query is still running.
 
         :param query_id: The ID of the initiated query.
         :type query_id: str
         :return: A list containing the results of the query.
         :rtype: list
         """
+        delay = self.min_poll_delay
         while True:
-            time.sleep(1)
+            time.sleep(delay)
             results = client.get_query_results(queryId=query_id)
-            if results["status"] in [
-                "Complete",
-                "Failed",
-                "Cancelled",
-                "Timeout",
-                "Unknown",
-            ]:
+            if results["status"] in TERMINAL_QUERY_STATUSES:
+                if results["status"] != "Complete":
+                    logging.warning(f"Query {query_id} ended as {results['status']}.")
                 return results.get("results", [])
+            delay = min(delay * 1.5, self.max_poll_delay)
 
     # snippet-end:[python.example_code.cloudwatch_logs.get_query_results]
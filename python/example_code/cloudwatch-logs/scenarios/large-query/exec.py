@@ -9,6 +9,7 @@ from botocore.config import Config
 
 from cloudwatch_query import CloudWatchQuery
 from date_utilities import DateUtilities
+from result_sinks import NdjsonSink, ParquetSink
 
 # Configure logging at the module level.
 logging.basicConfig(
@@ -62,11 +63,13 @@ class CloudWatchLogsQueryRunner:
         except ValueError as e:
             logging.error(f"Error parsing date environment variables: {e}")
             sys.exit(1)
-        
+
         try:
             log_group = os.environ["QUERY_LOG_GROUP"]
         except KeyError:
-            logging.warning("No QUERY_LOG_GROUP environment variable, using default value")
+            logging.warning(
+                "No QUERY_LOG_GROUP environment variable, using default value"
+            )
             log_group = DEFAULT_QUERY_LOG_GROUP
 
         return query_start_date, query_end_date, log_group
@@ -95,7 +98,8 @@ class CloudWatchLogsQueryRunner:
         start_date_iso8601,
         end_date_iso8601,
         log_group="/workflows/cloudwatch-logs/large-query",
-        query="fields @timestamp, @message | sort @timestamp asc"
+        query="fields @timestamp, @message | sort @timestamp asc",
+        output_file=None,
     ):
         """
         Creates a CloudWatchQuery instance and executes the query with provided date range.
@@ -108,15 +112,32 @@ class CloudWatchLogsQueryRunner:
         :type log_group: str
         :param query: Query string to pass to the CloudWatchQuery instance
         :type query: str
+        :param output_file: Optional file to export the logs to. Files that end in
+                            '.parquet' are written as Parquet, all others as
+                            newline-delimited JSON.
+        :type output_file: str
         """
         cloudwatch_query = CloudWatchQuery(
             log_group=log_group,
-            query_string=query
+            query_string=query,
+            client=self.cloudwatch_logs_client,
         )
-        cloudwatch_query.query_logs((start_date_iso8601, end_date_iso8601))
+        date_range = (start_date_iso8601, end_date_iso8601)
+        if output_file is not None:
+            sink = (
+                ParquetSink(output_file)
+                if output_file.endswith(".parquet")
+                else NdjsonSink(output_file)
+            )
+            cloudwatch_query.export_logs(date_range, sink)
+        else:
+            # Logs are streamed in timestamp order, so they can be processed one at
+            # a time without holding the whole result set in memory.
+            for _ in cloudwatch_query.iter_logs(date_range):
+                pass
         logging.info("Query executed successfully.")
         logging.info(
-            f"Queries completed in {cloudwatch_query.query_duration} seconds. Total logs found: {len(cloudwatch_query.query_results)}"
+            f"Queries completed in {cloudwatch_query.query_duration} seconds. Total logs found: {cloudwatch_query.result_count}"
         )
 
 
@@ -132,7 +153,12 @@ def main():
         query_start_date
     )
     end_date_iso8601 = DateUtilities.convert_unix_timestamp_to_iso8601(query_end_date)
-    runner.execute_query(start_date_iso8601, end_date_iso8601, log_group=log_group)
+    runner.execute_query(
+        start_date_iso8601,
+        end_date_iso8601,
+        log_group=log_group,
+        output_file=os.environ.get("QUERY_OUTPUT_FILE"),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+import json
+import logging
+from abc import ABC, abstractmethod
+
+
+class ResultSink(ABC):
+    """
+    Receives batches of CloudWatch Logs query results and writes them somewhere,
+    one batch at a time. Use a sink as a context manager so it is closed when the
+    export finishes.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def to_row(log):
+        """
+        Converts a log from a list of {"field", "value"} dicts to a single dict.
+
+        :param log: A log returned by a CloudWatch Logs query.
+        :type log: list
+        :return: A dict of field names to values.
+        :rtype: dict
+        """
+        return {item["field"]: item["value"] for item in log}
+
+    @abstractmethod
+    def write(self, logs):
+        """
+        Writes a batch of logs.
+
+        :param logs: A list of logs returned by a CloudWatch Logs query.
+        :type logs: list
+        """
+
+    def close(self):
+        """Flushes and closes the sink."""
+
+
+class NdjsonSink(ResultSink):
+    """Writes logs to a newline-delimited JSON file, one log per line."""
+
+    def __init__(self, path):
+        """
+        :param path: The path of the output file.
+        :type path: str
+        """
+        super().__init__()
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, logs):
+        self._file.writelines(json.dumps(self.to_row(log)) + "\n" for log in logs)
+        self.row_count += len(logs)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logging.info(f"Wrote {self.row_count} logs to {self.path}.")
+
+
+class ParquetSink(ResultSink):
+    """
+    Writes logs to a columnar Apache Parquet file, one row group per batch. All
+    values are stored as strings. The columns are the fields of the first batch.
+
+    This sink requires the pyarrow package.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the output file.
+        :type path: str
+        """
+        super().__init__()
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "ParquetSink requires pyarrow. Install it with "
+                "'python -m pip install pyarrow'."
+            ) from e
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, logs):
+        if not logs:
+            return
+        rows = [self.to_row(log) for log in logs]
+        if self._writer is None:
+            fields = list(dict.fromkeys(field for row in rows for field in row))
+            self._schema = self._pyarrow.schema(
+                [(field, self._pyarrow.string()) for field in fields]
+            )
+            self._writer = self._parquet.ParquetWriter(self.path, self._schema)
+        columns = {
+            field: [row.get(field) for row in rows] for field in self._schema.names
+        }
+        self._writer.write_table(self._pyarrow.table(columns, schema=self._schema))
+        self.row_count += len(rows)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            logging.info(f"Wrote {self.row_count} logs to {self.path}.")
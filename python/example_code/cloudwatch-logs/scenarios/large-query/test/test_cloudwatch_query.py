@@ -0,0 +1,115 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for cloudwatch_query.py.
+"""
+
+import time
+import boto3
+import pytest
+
+from cloudwatch_query import CloudWatchQuery, DEFAULT_LOG_GROUP, DEFAULT_QUERY
+
+START_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+
+
+def make_log(timestamp):
+    return [
+        {"field": "@timestamp", "value": f"2024-01-01 {timestamp}"},
+        {"field": "@message", "value": f"message at {timestamp}"},
+    ]
+
+
+def test_split_range():
+    assert CloudWatchQuery.split_range((0, 9), 2) == [(0, 4), (5, 9)]
+    assert CloudWatchQuery.split_range((0, 2), 5) == [(0, 0), (1, 1), (2, 2)]
+
+
+def test_iter_logs_splits_full_buckets(make_stubber, monkeypatch):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    query = CloudWatchQuery(
+        client=logs_client, max_concurrent_queries=1, initial_buckets=1
+    )
+    query.limit = 3
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    pages = [
+        (
+            (START_MS, START_MS + 9000),
+            [
+                make_log("00:00:03.000"),
+                make_log("00:00:01.000"),
+                make_log("00:00:01.000"),
+            ],
+        ),
+        (
+            (START_MS + 3000, START_MS + 5999),
+            [make_log("00:00:03.000"), make_log("00:00:04.000")],
+        ),
+        ((START_MS + 6000, START_MS + 9000), [make_log("00:00:07.000")]),
+    ]
+    for index, (bucket, logs) in enumerate(pages):
+        logs_stubber.stub_start_query(
+            DEFAULT_LOG_GROUP, *bucket, DEFAULT_QUERY, 3, f"query-{index}"
+        )
+        logs_stubber.stub_get_query_results(f"query-{index}", "Running", [])
+        logs_stubber.stub_get_query_results(f"query-{index}", "Complete", logs)
+
+    got_logs = list(query.iter_logs(("2024-01-01 00:00:00", "2024-01-01 00:00:09")))
+
+    # Identical logs in one batch are kept, but the log at the boundary between a
+    # full bucket and the rest of that bucket is returned only once.
+    assert [log[0]["value"][11:] for log in got_logs] == [
+        "00:00:01.000",
+        "00:00:01.000",
+        "00:00:03.000",
+        "00:00:04.000",
+        "00:00:07.000",
+    ]
+    assert query.result_count == 5
+    assert query.duplicate_count == 1
+
+
+def test_perform_query_waits_for_query_slot(make_stubber, monkeypatch):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    query = CloudWatchQuery(client=logs_client)
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+    bucket = (START_MS, START_MS + 1000)
+
+    logs_stubber.stub_start_query(
+        DEFAULT_LOG_GROUP,
+        *bucket,
+        DEFAULT_QUERY,
+        query.limit,
+        "query-id",
+        error_code="LimitExceededException",
+    )
+    logs_stubber.stub_start_query(
+        DEFAULT_LOG_GROUP, *bucket, DEFAULT_QUERY, query.limit, "query-id"
+    )
+    logs_stubber.stub_get_query_results(
+        "query-id", "Complete", [make_log("00:00:00.500")]
+    )
+
+    assert query.perform_query(bucket) == [make_log("00:00:00.500")]
+
+
+def test_perform_query_out_of_bounds(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    query = CloudWatchQuery(client=logs_client)
+    bucket = (START_MS, START_MS + 1000)
+
+    logs_stubber.stub_start_query(
+        DEFAULT_LOG_GROUP,
+        *bucket,
+        DEFAULT_QUERY,
+        query.limit,
+        "query-id",
+        error_code="ResourceNotFoundException",
+    )
+
+    assert query.perform_query(bucket) == []
@@ -0,0 +1,79 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for result_sinks.py.
+"""
+
+import json
+import time
+import boto3
+import pytest
+
+from cloudwatch_query import CloudWatchQuery, DEFAULT_LOG_GROUP, DEFAULT_QUERY
+from result_sinks import NdjsonSink, ParquetSink
+
+START_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+
+LOGS = [
+    [
+        {"field": "@timestamp", "value": f"2024-01-01 00:00:0{index}.000"},
+        {"field": "@message", "value": f"message {index}"},
+    ]
+    for index in range(3)
+]
+
+
+def test_ndjson_sink(tmp_path):
+    path = tmp_path / "logs.ndjson"
+
+    with NdjsonSink(str(path)) as sink:
+        sink.write(LOGS[:2])
+        sink.write(LOGS[2:])
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"@timestamp": f"2024-01-01 00:00:0{index}.000", "@message": f"message {index}"}
+        for index in range(3)
+    ]
+    assert sink.row_count == 3
+
+
+def test_parquet_sink(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "logs.parquet"
+
+    with ParquetSink(str(path)) as sink:
+        sink.write(LOGS[:2])
+        sink.write(LOGS[2:])
+
+    table = parquet.read_table(str(path))
+    assert table.column_names == ["@timestamp", "@message"]
+    assert table.column("@message").to_pylist() == [
+        f"message {index}" for index in range(3)
+    ]
+
+
+def test_export_logs(make_stubber, monkeypatch, tmp_path):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    query = CloudWatchQuery(client=logs_client, initial_buckets=1)
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+    path = tmp_path / "logs.ndjson"
+
+    logs_stubber.stub_start_query(
+        DEFAULT_LOG_GROUP,
+        START_MS,
+        START_MS + 9000,
+        DEFAULT_QUERY,
+        query.limit,
+        "query-id",
+    )
+    logs_stubber.stub_get_query_results("query-id", "Complete", LOGS)
+
+    query.export_logs(
+        ("2024-01-01 00:00:00", "2024-01-01 00:00:09"), NdjsonSink(str(path))
+    )
+
+    assert len(path.read_text().splitlines()) == 3
+    assert query.result_count == 3
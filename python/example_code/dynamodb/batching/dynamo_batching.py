@@ -18,10 +18,15 @@ import json
 import logging
 import os
 import pprint
+import sys
 import time
 import boto3
 from botocore.exceptions import ClientError
 
+# Add relative path to include demo_tools in this code example without need for setup.
+sys.path.append("../../..")
+from demo_tools.retries import MaxRetriesExceededError, Retrier, RetryBudget
+
 logger = logging.getLogger(__name__)
 dynamodb = boto3.resource("dynamodb")
 
@@ -62,7 +67,23 @@ def create_table(table_name, schema):
 
 
 # snippet-start:[python.example_code.dynamodb.BatchGetItem]
-def do_batch_get(batch_keys):
+def make_batch_get_retrier(budget=None):
+    """
+    Makes a Retrier that retries unprocessed keys up to five times.
+
+    :param budget: A RetryBudget to share with other retriers, so that when DynamoDB
+                   is throttling many batches at once, they stop retrying instead of
+                   adding to the load. By default, the retrier gets its own budget.
+    :return: The Retrier.
+    """
+    return Retrier(
+        retry_on_result=lambda unprocessed: len(unprocessed) > 0,
+        max_attempts=5,
+        budget=RetryBudget() if budget is None else budget,
+    )
+
+
+def do_batch_get(batch_keys, retrier=None):
     """
     Gets a batch of items from Amazon DynamoDB. Batches can contain keys from
     more than one table.
@@ -70,38 +91,41 @@ def do_batch_get(batch_keys):
     When Amazon DynamoDB cannot process all items in a batch, a set of unprocessed
     keys is returned. This function uses an exponential backoff algorithm to retry
     getting the unprocessed keys until all are retrieved or the specified
-    number of tries is reached.
+    number of tries is reached. Waits between tries are jittered, so that many
+    callers don't all retry at the same moment.
 
     :param batch_keys: The set of keys to retrieve. A batch can contain at most 100
                        keys. Otherwise, Amazon DynamoDB returns an error.
+    :param retrier: The Retrier that retries unprocessed keys. By default, each
+                    call gets a Retrier with its own budget. See
+                    `make_batch_get_retrier`.
     :return: The dictionary of retrieved items grouped under their respective
              table names.
     """
-    tries = 0
-    max_tries = 5
-    sleepy_time = 1  # Start with 1 second of sleep, then exponentially increase.
     retrieved = {key: [] for key in batch_keys}
-    while tries < max_tries:
+
+    def get_batch():
+        nonlocal batch_keys
         response = dynamodb.batch_get_item(RequestItems=batch_keys)
         # Collect any retrieved items and retry unprocessed keys.
         for key in response.get("Responses", []):
             retrieved[key] += response["Responses"][key]
-        unprocessed = response["UnprocessedKeys"]
-        if len(unprocessed) > 0:
-            batch_keys = unprocessed
+        batch_keys = response["UnprocessedKeys"]
+        if len(batch_keys) > 0:
             unprocessed_count = sum(
                 [len(batch_key["Keys"]) for batch_key in batch_keys.values()]
             )
             logger.info(
                 "%s unprocessed keys returned. Sleep, then retry.", unprocessed_count
             )
-            tries += 1
-            if tries < max_tries:
-                logger.info("Sleeping for %s seconds.", sleepy_time)
-                time.sleep(sleepy_time)
-                sleepy_time = min(sleepy_time * 2, 32)
-        else:
-            break
+        return batch_keys
+
+    if retrier is None:
+        retrier = make_batch_get_retrier()
+    try:
+        retrier.run(get_batch)
+    except MaxRetriesExceededError as error:
+        logger.warning("Gave up on unprocessed keys: %s", error)
 
     return retrieved
 
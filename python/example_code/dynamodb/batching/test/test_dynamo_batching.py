@@ -70,6 +70,57 @@ def test_do_batch_get(make_stubber, monkeypatch):
         assert got_data[key] == response_items[key]
 
 
+def test_do_batch_get_retries_after_many_calls(make_stubber, monkeypatch):
+    """Each call gets its own retry budget, so the retries of earlier calls don't
+    make later calls give up and return partial items."""
+    dyn_stubber = make_stubber(dynamo_batching.dynamodb.meta.client)
+
+    def make_keys():
+        return {"test-table": {"Keys": [{"test": "test-0"}]}}
+
+    call_count = 15  # More retries than a RetryBudget has tokens.
+
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    for _ in range(call_count):
+        dyn_stubber.stub_batch_get_item(
+            make_keys(),
+            unprocessed_keys={"test-table": {"Keys": [{"test": {"S": "test-0"}}]}},
+        )
+        dyn_stubber.stub_batch_get_item(
+            make_keys(), response_items={"test-table": [{"test": {"S": "test-0"}}]}
+        )
+
+    for _ in range(call_count):
+        got_data = dynamo_batching.do_batch_get(make_keys())
+        assert got_data == {"test-table": [{"test": "test-0"}]}
+
+
+def test_do_batch_get_with_shared_budget(make_stubber, monkeypatch):
+    """A retrier with a shared budget that is used up gives up on the first
+    unprocessed response, and the caller gets only the items that were retrieved."""
+    dyn_stubber = make_stubber(dynamo_batching.dynamodb.meta.client)
+
+    def make_keys():
+        return {"test-table": {"Keys": [{"test": "test-0"}, {"test": "test-1"}]}}
+
+    budget = dynamo_batching.RetryBudget(max_tokens=1)
+    assert budget.try_acquire()
+    retrier = dynamo_batching.make_batch_get_retrier(budget)
+
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    dyn_stubber.stub_batch_get_item(
+        make_keys(),
+        response_items={"test-table": [{"test": {"S": "test-0"}}]},
+        unprocessed_keys={"test-table": {"Keys": [{"test": {"S": "test-1"}}]}},
+    )
+
+    got_data = dynamo_batching.do_batch_get(make_keys(), retrier)
+    assert got_data == {"test-table": [{"test": "test-0"}]}
+    assert budget.tokens == 0
+
+
 @pytest.mark.parametrize(
     "item_count,error_code",
     [(0, None), (10, None), (25, None), (100, None), (13, "TestException")],
@@ -3,13 +3,24 @@
 import json
 import logging
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import backoff
 import boto3
+from botocore.exceptions import ClientError
 
 from config import get_config
 
+# Service limits for PutRecordBatch.
+MAX_BATCH_RECORDS = 500
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+MAX_RECORD_BYTES = 1000 * 1024
+# Error codes that mean the delivery stream is throttling requests.
+THROTTLING_ERROR_CODES = ("ServiceUnavailableException", "ThrottlingException")
+
 
 def load_sample_data(path: str) -> dict:
     """
@@ -30,6 +41,171 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class FirehoseBatchProducer:
+    """
+    Sends records to a Firehose delivery stream with PutRecordBatch.
+
+    Records are packed into batches by both count and size, several batches are kept
+    in flight on a thread pool, and only the entries that fail are sent again.
+
+    Attributes:
+        delivered_count (int): Number of records delivered.
+        failed_count (int): Number of records that were given up on.
+        throttled_count (int): Number of times records were throttled.
+        failed_records (list): Entries that were given up on.
+    """
+
+    def __init__(
+        self,
+        firehose_client,
+        delivery_stream_name: str,
+        max_batch_records: int = MAX_BATCH_RECORDS,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_in_flight: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 0.1,
+        max_delay: float = 5,
+    ):
+        """
+        Initialize the FirehoseBatchProducer.
+
+        Args:
+            firehose_client (boto3.client): Boto3 Firehose client.
+            delivery_stream_name (str): Name of the Firehose delivery stream.
+            max_batch_records (int): Maximum number of records in a batch, up to 500.
+            max_batch_bytes (int): Maximum number of bytes in a batch, up to 4 MiB.
+            max_in_flight (int): Maximum number of batches to send at the same time.
+            max_attempts (int): Number of times a record is sent before it is given up on.
+            base_delay (float): Base number of seconds to wait before a retry.
+            max_delay (float): Maximum number of seconds to wait before a retry.
+        """
+        if not 0 < max_batch_records <= MAX_BATCH_RECORDS:
+            raise ValueError(
+                f"max_batch_records must be between 1 and {MAX_BATCH_RECORDS}."
+            )
+        if not 0 < max_batch_bytes <= MAX_BATCH_BYTES:
+            raise ValueError(
+                f"max_batch_bytes must be between 1 and {MAX_BATCH_BYTES}."
+            )
+        self.firehose = firehose_client
+        self.delivery_stream_name = delivery_stream_name
+        self.max_batch_records = max_batch_records
+        self.max_batch_bytes = max_batch_bytes
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delivered_count = 0
+        self.failed_count = 0
+        self.throttled_count = 0
+        self.failed_records = []
+        self._lock = threading.Lock()
+
+    def put_records(self, records):
+        """
+        Send records to the delivery stream and wait until they are all delivered or
+        given up on.
+
+        Args:
+            records (iterable): Data records to send. Each record is sent as JSON.
+        """
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for batch in self._pack(records):
+                # Wait for a free slot so that only max_in_flight batches are held
+                # in memory at once.
+                in_flight.acquire()
+                future = executor.submit(self._send_batch, batch)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append(future)
+        for future in futures:
+            future.result()
+
+    def _pack(self, records):
+        """
+        Pack records into batches that are within the count and size limits.
+
+        Args:
+            records (iterable): Data records to pack.
+
+        Yields:
+            list: Batches of record entries.
+        """
+        batch = []
+        batch_bytes = 0
+        for record in records:
+            data = json.dumps(record).encode()
+            if len(data) > MAX_RECORD_BYTES:
+                logger.info(f"Record of {len(data)} bytes is over the size limit.")
+                self._add_failed([{"Data": data}])
+                continue
+            if batch and (
+                len(batch) >= self.max_batch_records
+                or batch_bytes + len(data) > self.max_batch_bytes
+            ):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append({"Data": data})
+            batch_bytes += len(data)
+        if batch:
+            yield batch
+
+    def _send_batch(self, entries: list):
+        """
+        Send a batch of entries. Entries that fail are sent again with exponential
+        backoff and full jitter until they are delivered or max_attempts is reached.
+
+        Args:
+            entries (list): Record entries to send.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.firehose.put_record_batch(
+                    DeliveryStreamName=self.delivery_stream_name, Records=entries
+                )
+                results = response["RequestResponses"]
+                retry_entries = [
+                    entry
+                    for entry, result in zip(entries, results)
+                    if "ErrorCode" in result
+                ]
+                throttled = sum(
+                    1
+                    for result in results
+                    if result.get("ErrorCode") in THROTTLING_ERROR_CODES
+                )
+            except ClientError as err:
+                if err.response["Error"]["Code"] not in THROTTLING_ERROR_CODES:
+                    logger.info(
+                        f"Failed to send batch of {len(entries)} records: {err}"
+                    )
+                    self._add_failed(entries)
+                    return
+                retry_entries = entries
+                throttled = len(entries)
+            with self._lock:
+                self.delivered_count += len(entries) - len(retry_entries)
+                self.throttled_count += throttled
+            if not retry_entries:
+                return
+            entries = retry_entries
+            if attempt < self.max_attempts:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                logger.info(f"Retrying {len(entries)} failed records.")
+                time.sleep(random.uniform(0, delay))
+        logger.info(
+            f"Gave up on {len(entries)} records after {self.max_attempts} attempts."
+        )
+        self._add_failed(entries)
+
+    def _add_failed(self, entries: list):
+        with self._lock:
+            self.failed_count += len(entries)
+            self.failed_records.extend(entries)
+
+
 # snippet-start:[python.example_code.firehose.init]
 class FirehoseClient:
     """
@@ -85,30 +261,37 @@ class FirehoseClient:
     # snippet-end:[python.example_code.firehose.put_record]
 
     # snippet-start:[python.example_code.firehose.put_record_batch]
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, jitter=backoff.full_jitter
-    )
-    def put_record_batch(self, data: list, batch_size: int = 500):
+    def put_record_batch(
+        self, data: list, batch_size: int = MAX_BATCH_RECORDS, max_in_flight: int = 4
+    ):
         """
-        Put records in batches to Firehose with backoff and retry.
+        Put records in batches to Firehose, with several batches in flight at once.
 
         Args:
             data (list): List of data records to be sent to Firehose.
-            batch_size (int): Number of records to send in each batch. Default is 500.
+            batch_size (int): Maximum number of records to send in each batch. Default is 500.
+            max_in_flight (int): Maximum number of batches to send at the same time.
 
-        This method attempts to send records in batches to the Firehose delivery stream.
-        It retries with exponential backoff in case of exceptions.
+        Returns:
+            FirehoseBatchProducer: The producer, with counts of the delivered, failed,
+            and throttled records.
+
+        Batches are packed by both record count and size. Only the records that fail
+        are sent again, with exponential backoff and jitter, so records that were
+        already delivered are not duplicated.
         """
-        for i in range(0, len(data), batch_size):
-            batch = data[i : i + batch_size]
-            record_dicts = [{"Data": json.dumps(record)} for record in batch]
-            try:
-                response = self.firehose.put_record_batch(
-                    DeliveryStreamName=self.delivery_stream_name, Records=record_dicts
-                )
-                self._log_batch_response(response, len(batch))
-            except Exception as e:
-                logger.info(f"Failed to send batch of {len(batch)} records. Error: {e}")
+        producer = FirehoseBatchProducer(
+            self.firehose,
+            self.delivery_stream_name,
+            max_batch_records=batch_size,
+            max_in_flight=max_in_flight,
+        )
+        producer.put_records(data)
+        logger.info(
+            f"Delivered {producer.delivered_count} records, failed "
+            f"{producer.failed_count}, throttled {producer.throttled_count} times."
+        )
+        return producer
 
     # snippet-end:[python.example_code.firehose.put_record_batch]
 
@@ -217,21 +400,6 @@ class FirehoseClient:
         else:
             logger.info(f"Fail record: {entry}")
 
-    def _log_batch_response(self, response: dict, batch_size: int):
-        """
-        Log the batch response from Firehose.
-
-        Args:
-            response (dict): The response from the Firehose put_record_batch API call.
-            batch_size (int): The number of records in the batch.
-        """
-        if response.get("FailedPutCount", 0) > 0:
-            logger.info(
-                f'Failed to send {response["FailedPutCount"]} records in batch of {batch_size}'
-            )
-        else:
-            logger.info(f"Successfully sent batch of {batch_size} records")
-
 
 if __name__ == "__main__":
     config = get_config()
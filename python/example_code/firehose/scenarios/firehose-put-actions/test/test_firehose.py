@@ -9,7 +9,7 @@ from botocore.exceptions import NoCredentialsError
 from moto import mock_cloudwatch, mock_firehose
 
 sys.path.append("../../firehose-put-actions")
-from firehose import FirehoseClient, load_sample_data
+from firehose import FirehoseBatchProducer, FirehoseClient, load_sample_data
 
 
 # Sample configuration mock
@@ -69,6 +69,74 @@ def test_put_record_batch(firehose_client):
         assert "Firehose PutRecord(Batch to S3 destination failed" in str(e)
 
 
+def test_batch_producer_packs_by_count_and_size():
+    firehose = mock.MagicMock()
+    firehose.put_record_batch.side_effect = lambda **kwargs: {
+        "FailedPutCount": 0,
+        "RequestResponses": [{"RecordId": "id"} for _ in kwargs["Records"]],
+    }
+    producer = FirehoseBatchProducer(
+        firehose, "test_stream", max_batch_records=3, max_batch_bytes=25
+    )
+    # Three 1-byte records fill a batch by count. 10-byte records fill a batch by
+    # size after two records.
+    records = [1, 2, 3] + ["x" * 8 for _ in range(3)]
+
+    producer.put_records(records)
+
+    batch_sizes = [
+        len(call.kwargs["Records"]) for call in firehose.put_record_batch.call_args_list
+    ]
+    assert sorted(batch_sizes) == [1, 2, 3]
+    assert producer.delivered_count == len(records)
+    assert producer.failed_count == 0
+
+
+def test_batch_producer_retries_only_failed_entries():
+    firehose = mock.MagicMock()
+    firehose.put_record_batch.side_effect = [
+        {
+            "FailedPutCount": 2,
+            "RequestResponses": [
+                {"RecordId": "id-0"},
+                {"ErrorCode": "ServiceUnavailableException", "ErrorMessage": "Slow"},
+                {"ErrorCode": "InternalFailure", "ErrorMessage": "Oops"},
+            ],
+        },
+        {
+            "FailedPutCount": 0,
+            "RequestResponses": [{"RecordId": "id-1"}, {"RecordId": "id-2"}],
+        },
+    ]
+    producer = FirehoseBatchProducer(firehose, "test_stream", base_delay=0)
+
+    producer.put_records([{"index": index} for index in range(3)])
+
+    retried = firehose.put_record_batch.call_args_list[1].kwargs["Records"]
+    assert retried == [{"Data": b'{"index": 1}'}, {"Data": b'{"index": 2}'}]
+    assert producer.delivered_count == 3
+    assert producer.throttled_count == 1
+    assert producer.failed_count == 0
+
+
+def test_batch_producer_gives_up_after_max_attempts():
+    firehose = mock.MagicMock()
+    firehose.put_record_batch.return_value = {
+        "FailedPutCount": 1,
+        "RequestResponses": [{"ErrorCode": "InternalFailure", "ErrorMessage": "Oops"}],
+    }
+    producer = FirehoseBatchProducer(
+        firehose, "test_stream", max_attempts=2, base_delay=0
+    )
+
+    producer.put_records([{"index": 0}])
+
+    assert firehose.put_record_batch.call_count == 2
+    assert producer.delivered_count == 0
+    assert producer.failed_count == 1
+    assert producer.failed_records == [{"Data": b'{"index": 0}'}]
+
+
 def test_monitor_metrics(firehose_client):
     firehose_client.monitor_metrics()
 
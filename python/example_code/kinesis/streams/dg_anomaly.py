@@ -12,10 +12,15 @@ on a Stream_ example in the Amazon Kinesis Data Analytics SQL Developer Guide.
 # snippet-start:[kinesisanalytics.python.datagenerator.anomaly]
 
 from enum import Enum
-import json
 import random
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "ExampleInputStream"
 
 
@@ -35,17 +40,14 @@ def get_heart_rate(rate_type):
 
 
 def generate(stream_name, kinesis_client, output=True):
-    while True:
-        rnd = random.random()
-        rate_type = RateType.high if rnd < 0.01 else RateType.normal
-        heart_rate = get_heart_rate(rate_type)
-        if output:
-            print(heart_rate)
-        kinesis_client.put_record(
-            StreamName=stream_name,
-            Data=json.dumps(heart_rate),
-            PartitionKey="partitionkey",
-        )
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            rnd = random.random()
+            rate_type = RateType.high if rnd < 0.01 else RateType.normal
+            heart_rate = get_heart_rate(rate_type)
+            if output:
+                print(heart_rate)
+            producer.put(heart_rate)
 
 
 if __name__ == "__main__":
@@ -13,10 +13,15 @@ Developer Guide.
 # snippet-start:[kinesisanalytics.python.datagenerator.anomalyex]
 
 from enum import Enum
-import json
 import random
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "ExampleInputStream"
 
 
@@ -43,22 +48,19 @@ def get_blood_pressure(pressure_type):
 
 
 def generate(stream_name, kinesis_client):
-    while True:
-        rnd = random.random()
-        pressure_type = (
-            PressureType.low
-            if rnd < 0.005
-            else PressureType.high
-            if rnd > 0.995
-            else PressureType.normal
-        )
-        blood_pressure = get_blood_pressure(pressure_type)
-        print(blood_pressure)
-        kinesis_client.put_record(
-            StreamName=stream_name,
-            Data=json.dumps(blood_pressure),
-            PartitionKey="partitionkey",
-        )
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            rnd = random.random()
+            pressure_type = (
+                PressureType.low
+                if rnd < 0.005
+                else PressureType.high
+                if rnd > 0.995
+                else PressureType.normal
+            )
+            blood_pressure = get_blood_pressure(pressure_type)
+            print(blood_pressure)
+            producer.put(blood_pressure)
 
 
 if __name__ == "__main__":
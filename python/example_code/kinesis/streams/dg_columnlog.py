@@ -11,9 +11,14 @@ Multiple Fields_ example in the Amazon Kinesis Data Analytics SQL Developer Guid
 
 # snippet-start:[kinesisanalytics.python.datagenerator.columnlog]
 
-import json
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "ExampleInputStream"
 
 
@@ -22,12 +27,11 @@ def get_data():
 
 
 def generate(stream_name, kinesis_client):
-    while True:
-        data = get_data()
-        print(data)
-        kinesis_client.put_record(
-            StreamName=stream_name, Data=json.dumps(data), PartitionKey="partitionkey"
-        )
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            data = get_data()
+            print(data)
+            producer.put(data)
 
 
 if __name__ == "__main__":
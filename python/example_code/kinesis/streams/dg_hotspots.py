@@ -11,12 +11,17 @@ a Stream_ example in the Amazon Kinesis Data Analytics SQL Developer Guide.
 
 # snippet-start:[kinesisanalytics.python.datagenerator.hotspots]
 
-import json
 from pprint import pprint
 import random
 import time
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "ExampleInputStream"
 
 
@@ -30,14 +35,14 @@ def get_hotspot(field, spot_size):
     return hotspot
 
 
-def get_record(field, hotspot, hotspot_weight):
+def get_point(field, hotspot, hotspot_weight):
     rectangle = hotspot if random.random() < hotspot_weight else field
     point = {
         "x": rectangle["left"] + random.random() * rectangle["width"],
         "y": rectangle["top"] + random.random() * rectangle["height"],
         "is_hot": "Y" if rectangle is hotspot else "N",
     }
-    return {"Data": json.dumps(point), "PartitionKey": "partition_key"}
+    return point
 
 
 def generate(
@@ -51,17 +56,19 @@ def generate(
     """
     points_generated = 0
     hotspot = None
-    while True:
-        if points_generated % 1000 == 0:
-            hotspot = get_hotspot(field, hotspot_size)
-        records = [
-            get_record(field, hotspot, hotspot_weight) for _ in range(batch_size)
-        ]
-        points_generated += len(records)
-        pprint(records)
-        kinesis_client.put_records(StreamName=stream_name, Records=records)
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            if points_generated % 1000 == 0:
+                hotspot = get_hotspot(field, hotspot_size)
+            points = [
+                get_point(field, hotspot, hotspot_weight) for _ in range(batch_size)
+            ]
+            points_generated += len(points)
+            pprint(points)
+            for point in points:
+                producer.put(point)
 
-        time.sleep(0.1)
+            time.sleep(0.1)
 
 
 if __name__ == "__main__":
@@ -11,11 +11,16 @@ example in the Amazon Kinesis Data Analytics SQL Developer Guide.
 # snippet-start:[kinesisanalytics.python.datagenerator.stagger]
 
 import datetime
-import json
 import random
 import time
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "ExampleInputStream"
 
 
@@ -28,17 +33,16 @@ def get_data():
 
 
 def generate(stream_name, kinesis_client):
-    while True:
-        data = get_data()
-        # Send six records, ten seconds apart, with the same event time and ticker
-        for _ in range(6):
-            print(data)
-            kinesis_client.put_record(
-                StreamName=stream_name,
-                Data=json.dumps(data),
-                PartitionKey="partitionkey",
-            )
-            time.sleep(10)
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            data = get_data()
+            # Send six records, ten seconds apart, with the same event time and ticker
+            for _ in range(6):
+                print(data)
+                producer.put(data)
+                # Flush right away so the records arrive ten seconds apart.
+                producer.flush()
+                time.sleep(10)
 
 
 if __name__ == "__main__":
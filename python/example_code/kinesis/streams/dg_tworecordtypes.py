@@ -10,12 +10,16 @@ Data Types_ example in the Amazon Kinesis Data Analytics SQL Developer Guide.
 """
 # snippet-start:[kinesisanalytics.python.datagenerator.tworecordtypes]
 
-import json
 import random
 import boto3
 
+try:
+    from streams.kinesis_producer import KinesisProducer
+except ImportError:
+    # Run as a script from the streams folder.
+    from kinesis_producer import KinesisProducer
+
 STREAM_NAME = "OrdersAndTradesStream"
-PARTITION_KEY = "partition_key"
 
 
 def get_order(order_id, ticker):
@@ -40,22 +44,19 @@ def get_trade(order_id, trade_id, ticker):
 
 def generate(stream_name, kinesis_client):
     order_id = 1
-    while True:
-        ticker = random.choice(["AAAA", "BBBB", "CCCC"])
-        order = get_order(order_id, ticker)
-        print(order)
-        kinesis_client.put_record(
-            StreamName=stream_name, Data=json.dumps(order), PartitionKey=PARTITION_KEY
-        )
-        for trade_id in range(1, random.randint(0, 6)):
-            trade = get_trade(order_id, trade_id, ticker)
-            print(trade)
-            kinesis_client.put_record(
-                StreamName=stream_name,
-                Data=json.dumps(trade),
-                PartitionKey=PARTITION_KEY,
-            )
-        order_id += 1
+    with KinesisProducer(kinesis_client, stream_name) as producer:
+        while True:
+            ticker = random.choice(["AAAA", "BBBB", "CCCC"])
+            order = get_order(order_id, ticker)
+            print(order)
+            # Use the order ID as the partition key so that an order and its trades
+            # go to the same shard and stay in order.
+            producer.put(order, partition_key=str(order_id))
+            for trade_id in range(1, random.randint(0, 6)):
+                trade = get_trade(order_id, trade_id, ticker)
+                print(trade)
+                producer.put(trade, partition_key=str(order_id))
+            order_id += 1
 
 
 if __name__ == "__main__":
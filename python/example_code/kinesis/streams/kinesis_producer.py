@@ -0,0 +1,156 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Shows how to use the AWS SDK for Python (Boto3) with Amazon Kinesis to put records
+in a stream at high throughput. Records are buffered and sent in PutRecords batches,
+partition keys are spread across shards, and only the entries that fail are retried.
+"""
+
+import itertools
+import json
+import logging
+import random
+import time
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Service limits for a single PutRecords request.
+MAX_BATCH_RECORDS = 500
+MAX_BATCH_BYTES = 5 * 1024 * 1024
+MAX_RECORD_BYTES = 1024 * 1024
+
+
+class KinesisProducer:
+    """
+    Buffers records and puts them in a Kinesis stream in batches.
+
+    Use the producer as a context manager so that buffered records are flushed when
+    the block exits, even when it exits because of an error.
+    """
+
+    def __init__(
+        self,
+        kinesis_client,
+        stream_name,
+        max_records=MAX_BATCH_RECORDS,
+        max_bytes=MAX_BATCH_BYTES,
+        linger_time=0.5,
+        max_attempts=5,
+        base_delay=0.1,
+    ):
+        """
+        :param kinesis_client: A Boto3 Kinesis client.
+        :param stream_name: The name of the stream.
+        :param max_records: The number of buffered records that triggers a flush,
+                            up to 500.
+        :param max_bytes: The number of buffered bytes that triggers a flush,
+                          up to 5 MiB.
+        :param linger_time: The number of seconds a record can wait in the buffer
+                            before the next put flushes it.
+        :param max_attempts: The number of times a failed record is sent before it
+                             is given up on.
+        :param base_delay: The base number of seconds to wait before a retry. The
+                           delay doubles with each attempt and is jittered.
+        """
+        if not 0 < max_records <= MAX_BATCH_RECORDS:
+            raise ValueError(f"max_records must be between 1 and {MAX_BATCH_RECORDS}.")
+        if not 0 < max_bytes <= MAX_BATCH_BYTES:
+            raise ValueError(f"max_bytes must be between 1 and {MAX_BATCH_BYTES}.")
+        self.kinesis_client = kinesis_client
+        self.stream_name = stream_name
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.linger_time = linger_time
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.put_count = 0
+        self.failed_records = []
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._buffer_start = None
+        self._keys = itertools.count()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def put(self, data, partition_key=None):
+        """
+        Adds a record to the buffer. The data is formatted as JSON. The buffer is
+        flushed when it is full or when its oldest record has waited longer than the
+        linger time.
+
+        :param data: The data to put in the stream.
+        :param partition_key: The partition key of the record. When not specified,
+                              a sequential key is used. Kinesis hashes the key, so
+                              sequential keys spread records evenly across shards.
+        """
+        if partition_key is None:
+            partition_key = str(next(self._keys))
+        record = {"Data": json.dumps(data), "PartitionKey": partition_key}
+        size = len(record["Data"].encode()) + len(partition_key.encode())
+        if size > MAX_RECORD_BYTES:
+            raise ValueError(f"Record of {size} bytes is larger than the 1 MiB limit.")
+        if (
+            len(self._buffer) >= self.max_records
+            or self._buffer_bytes + size > self.max_bytes
+        ):
+            self.flush()
+        if not self._buffer:
+            self._buffer_start = time.monotonic()
+        self._buffer.append(record)
+        self._buffer_bytes += size
+        if (
+            len(self._buffer) >= self.max_records
+            or time.monotonic() - self._buffer_start >= self.linger_time
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Puts all buffered records in the stream. Records that fail are sent again
+        with exponential backoff, and the records that still fail after the last
+        attempt are added to the failed_records list.
+        """
+        records = self._buffer
+        self._buffer = []
+        self._buffer_bytes = 0
+        attempt = 0
+        while records:
+            attempt += 1
+            try:
+                response = self.kinesis_client.put_records(
+                    StreamName=self.stream_name, Records=records
+                )
+            except ClientError:
+                logger.exception("Couldn't put records in stream %s.", self.stream_name)
+                raise
+            self.put_count += len(records) - response.get("FailedRecordCount", 0)
+            records = [
+                record
+                for record, result in zip(records, response["Records"])
+                if "ErrorCode" in result
+            ]
+            if records:
+                if attempt >= self.max_attempts:
+                    logger.error(
+                        "Gave up on %s records for stream %s after %s attempts.",
+                        len(records),
+                        self.stream_name,
+                        attempt,
+                    )
+                    self.failed_records += records
+                    break
+                logger.info(
+                    "Retrying %s failed records for stream %s.",
+                    len(records),
+                    self.stream_name,
+                )
+                time.sleep(random.uniform(0, self.base_delay * 2 ** (attempt - 1)))
@@ -87,6 +87,25 @@ class KinesisStream:
 
     # snippet-end:[python.example_code.kinesis.DescribeStream]
 
+    def list_shards(self):
+        """
+        Lists all shards of the stream, including closed parent shards and the
+        child shards that replaced them after a resharding operation.
+
+        :return: The list of shards.
+        """
+        try:
+            paginator = self.kinesis_client.get_paginator("list_shards")
+            shards = []
+            for page in paginator.paginate(StreamName=self.name):
+                shards += page["Shards"]
+            logger.info("Got %s shards for stream %s.", len(shards), self.name)
+        except ClientError:
+            logger.exception("Couldn't list shards for stream %s.", self.name)
+            raise
+        else:
+            return shards
+
     # snippet-start:[python.example_code.kinesis.DeleteStream]
     def delete(self):
         """
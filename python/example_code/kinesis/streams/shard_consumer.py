@@ -0,0 +1,352 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Shows how to use the AWS SDK for Python (Boto3) with Amazon Kinesis to read records
+from every shard of a stream in parallel. Shards are polled in turn on a thread pool,
+child shards are picked up after their parents are fully read, and the position of
+each shard is checkpointed to a local file so a consumer can resume where it left off.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of records that a single GetRecords call can return.
+MAX_GET_RECORDS_LIMIT = 10000
+
+
+class ShardCheckpoints:
+    """
+    Stores the last processed sequence number of each shard, and the set of shards
+    that have been read to the end, in a local JSON file.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the checkpoint file. The file is created on the
+                     first save when it does not exist.
+        """
+        self.path = path
+        self.sequence_numbers = {}
+        self.finished = set()
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                data = json.load(checkpoint_file)
+            self.sequence_numbers = data.get("sequence_numbers", {})
+            self.finished = set(data.get("finished", []))
+
+    def get(self, shard_id):
+        """
+        :param shard_id: The ID of the shard.
+        :return: The last processed sequence number of the shard, or None when the
+                 shard has no checkpoint.
+        """
+        return self.sequence_numbers.get(shard_id)
+
+    def set(self, shard_id, sequence_number):
+        """
+        Records the last processed sequence number of a shard.
+
+        :param shard_id: The ID of the shard.
+        :param sequence_number: The sequence number of the last processed record.
+        """
+        self.sequence_numbers[shard_id] = sequence_number
+
+    def mark_finished(self, shard_id):
+        """
+        Records that a closed shard has been read to the end.
+
+        :param shard_id: The ID of the shard.
+        """
+        self.finished.add(shard_id)
+        self.sequence_numbers.pop(shard_id, None)
+
+    def save(self):
+        """
+        Writes the checkpoints to the checkpoint file. The file is replaced
+        atomically so a crash during the write does not corrupt it.
+        """
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(
+                {
+                    "sequence_numbers": self.sequence_numbers,
+                    "finished": sorted(self.finished),
+                },
+                checkpoint_file,
+            )
+        os.replace(temp_path, self.path)
+
+
+class ShardConsumer:
+    """
+    Reads records from all shards of a Kinesis stream in parallel.
+    """
+
+    def __init__(
+        self,
+        stream,
+        iterator_type="LATEST",
+        limit=MAX_GET_RECORDS_LIMIT,
+        max_workers=None,
+        checkpoints=None,
+        idle_time=1,
+        checkpoint_interval=5,
+    ):
+        """
+        :param stream: A KinesisStream object that has a name.
+        :param iterator_type: Where to start reading shards that have no checkpoint,
+                              either 'LATEST' or 'TRIM_HORIZON'. Child shards that
+                              appear after resharding are always read from
+                              'TRIM_HORIZON' so no records are skipped.
+        :param limit: The maximum number of records to get in each GetRecords call,
+                      up to 10,000.
+        :param max_workers: The maximum number of GetRecords calls to make at the
+                            same time. Shards take turns, so every open shard is
+                            read even when there are more shards than workers.
+                            Defaults to the number of shards in the stream.
+        :param checkpoints: An optional ShardCheckpoints object. When a shard has a
+                            checkpoint, reading resumes after the checkpointed
+                            sequence number.
+        :param idle_time: The number of seconds to wait before polling a shard
+                          again after getting an empty batch.
+        :param checkpoint_interval: The minimum number of seconds between saves of
+                                    the checkpoint file.
+        """
+        if iterator_type not in ("LATEST", "TRIM_HORIZON"):
+            raise ValueError(f"Unsupported iterator type {iterator_type}.")
+        if not 0 < limit <= MAX_GET_RECORDS_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {MAX_GET_RECORDS_LIMIT}.")
+        self.stream = stream
+        self.kinesis_client = stream.kinesis_client
+        self.iterator_type = iterator_type
+        self.limit = limit
+        self.max_workers = max_workers
+        self.checkpoints = checkpoints
+        self.idle_time = idle_time
+        self.checkpoint_interval = checkpoint_interval
+
+    def _get_shard_iterator(self, shard_id, iterator_type):
+        """
+        Gets a shard iterator that starts after the checkpoint of the shard, or at
+        the specified position when the shard has no checkpoint.
+        """
+        kwargs = {"StreamName": self.stream.name, "ShardId": shard_id}
+        sequence_number = (
+            self.checkpoints.get(shard_id) if self.checkpoints is not None else None
+        )
+        if sequence_number is not None:
+            kwargs["ShardIteratorType"] = "AFTER_SEQUENCE_NUMBER"
+            kwargs["StartingSequenceNumber"] = sequence_number
+        else:
+            kwargs["ShardIteratorType"] = iterator_type
+        response = self.kinesis_client.get_shard_iterator(**kwargs)
+        return response["ShardIterator"]
+
+    def _poll_shard(self, shard_id, shard_iter, iterator_type):
+        """
+        Gets one batch of records from a shard. The shard iterator is fetched first
+        when the shard has not been polled yet.
+
+        :return: The records and the next shard iterator, which is None when the
+                 shard is closed and read to the end. When throughput is exceeded,
+                 the records are None and the same shard iterator is returned.
+        """
+        if shard_iter is None:
+            shard_iter = self._get_shard_iterator(shard_id, iterator_type)
+        try:
+            response = self.kinesis_client.get_records(
+                ShardIterator=shard_iter, Limit=self.limit
+            )
+        except ClientError as err:
+            if (
+                err.response["Error"]["Code"]
+                != "ProvisionedThroughputExceededException"
+            ):
+                raise
+            logger.info("Throughput exceeded on shard %s, backing off.", shard_id)
+            return None, shard_iter
+        return response["Records"], response.get("NextShardIterator")
+
+    @staticmethod
+    def _ready_shards(shards, started, finished):
+        """
+        Finds the shards that can be read now. A shard is ready when it has not been
+        started and each of its parents is finished or no longer in the stream.
+        """
+        shard_ids = {shard["ShardId"] for shard in shards}
+        ready = []
+        for shard in shards:
+            if shard["ShardId"] in started or shard["ShardId"] in finished:
+                continue
+            parents = (shard.get("ParentShardId"), shard.get("AdjacentParentShardId"))
+            if all(
+                parent is None or parent not in shard_ids or parent in finished
+                for parent in parents
+            ):
+                ready.append(shard)
+        return ready
+
+    def get_records(self, max_records=None):
+        """
+        Gets records from all shards of the stream. This function is a generator that
+        polls the open shards in turn on a thread pool, one GetRecords call per shard
+        at a time, and yields each batch of records as soon as it arrives. When a
+        closed shard is read to the end, its child shards are read next, so records
+        for each partition key are yielded in order.
+
+        A batch is checkpointed when the caller asks for the next batch, so records
+        that were yielded but not processed are read again after a restart.
+
+        :param max_records: The number of records after which to stop reading. When
+                            None, reading continues until all shards are closed and
+                            read to the end.
+        :return: Yields batches of records. Each batch comes from a single shard.
+        """
+        try:
+            shards = self.stream.list_shards()
+        except ClientError:
+            logger.exception("Couldn't get records from stream %s.", self.stream.name)
+            raise
+        finished = (
+            set(self.checkpoints.finished) if self.checkpoints is not None else set()
+        )
+        if self.iterator_type == "LATEST":
+            # Closed shards hold only records written before the consumer started.
+            finished |= {
+                shard["ShardId"]
+                for shard in shards
+                if "EndingSequenceNumber" in shard["SequenceNumberRange"]
+                and (
+                    self.checkpoints is None
+                    or self.checkpoints.get(shard["ShardId"]) is None
+                )
+            }
+        max_workers = self.max_workers or max(len(shards), 1)
+        started = set()
+        # Shards that wait for their next poll, keyed by shard ID, with the time
+        # when they can be polled, the order they were queued in, the shard
+        # iterator, the iterator type, and the backoff after throttling.
+        waiting = {}
+        in_flight = {}
+        turn = 0
+        record_count = 0
+        last_save = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        def queue_shard(shard_id, delay, shard_iter, iterator_type, backoff):
+            nonlocal turn
+            turn += 1
+            waiting[shard_id] = (
+                time.monotonic() + delay,
+                turn,
+                shard_iter,
+                iterator_type,
+                backoff,
+            )
+
+        def start_ready_shards(iterator_type):
+            for shard in self._ready_shards(shards, started, finished):
+                started.add(shard["ShardId"])
+                logger.info("Starting to read shard %s.", shard["ShardId"])
+                queue_shard(shard["ShardId"], 0, None, iterator_type, self.idle_time)
+
+        try:
+            start_ready_shards(self.iterator_type)
+            while (waiting or in_flight) and (
+                max_records is None or record_count < max_records
+            ):
+                now = time.monotonic()
+                for shard_id in sorted(waiting, key=lambda s: waiting[s][:2]):
+                    if len(in_flight) >= max_workers or waiting[shard_id][0] > now:
+                        break
+                    _, _, shard_iter, iterator_type, backoff = waiting.pop(shard_id)
+                    future = executor.submit(
+                        self._poll_shard, shard_id, shard_iter, iterator_type
+                    )
+                    in_flight[future] = (shard_id, iterator_type, backoff)
+                next_due = min((due for due, *_ in waiting.values()), default=None)
+                if not in_flight:
+                    time.sleep(max(next_due - now, 0))
+                    continue
+                timeout = (
+                    max(next_due - now, 0)
+                    if next_due is not None and len(in_flight) < max_workers
+                    else None
+                )
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard_id, iterator_type, backoff = in_flight.pop(future)
+                    try:
+                        records, shard_iter = future.result()
+                    except Exception:
+                        logger.error(
+                            "Couldn't get records from shard %s of stream %s.",
+                            shard_id,
+                            self.stream.name,
+                        )
+                        raise
+                    if records is None:
+                        queue_shard(
+                            shard_id,
+                            backoff,
+                            shard_iter,
+                            iterator_type,
+                            min(backoff * 2, 30),
+                        )
+                        continue
+                    if records:
+                        logger.info(
+                            "Got %s records from shard %s.", len(records), shard_id
+                        )
+                        record_count += len(records)
+                        yield records
+                        if self.checkpoints is not None:
+                            self.checkpoints.set(
+                                shard_id, records[-1]["SequenceNumber"]
+                            )
+                    if shard_iter is not None:
+                        queue_shard(
+                            shard_id,
+                            0 if records else self.idle_time,
+                            shard_iter,
+                            iterator_type,
+                            self.idle_time,
+                        )
+                        continue
+                    logger.info("Reached the end of closed shard %s.", shard_id)
+                    finished.add(shard_id)
+                    if self.checkpoints is not None:
+                        self.checkpoints.mark_finished(shard_id)
+                    has_children = any(
+                        shard_id
+                        in (
+                            shard.get("ParentShardId"),
+                            shard.get("AdjacentParentShardId"),
+                        )
+                        for shard in shards
+                    )
+                    if not has_children:
+                        # The shard was closed after the shards were listed, so
+                        # list them again to find its children.
+                        shards = self.stream.list_shards()
+                    start_ready_shards("TRIM_HORIZON")
+                if (
+                    self.checkpoints is not None
+                    and time.monotonic() - last_save >= self.checkpoint_interval
+                ):
+                    self.checkpoints.save()
+                    last_save = time.monotonic()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.checkpoints is not None:
+                self.checkpoints.save()
@@ -29,14 +29,13 @@ def test_static_generator(make_stubber, monkeypatch, module_name, repeat):
     module = importlib.import_module(module_name)
     stream = module.STREAM_NAME
     data = module.get_data()
-    partition_key = "partitionkey"
 
     data_list = [data]
     monkeypatch.setattr(module, "get_data", data_list.pop)
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
-    for _ in range(repeat):
-        kinesis_stubber.stub_put_record(stream, data, partition_key)
+    for index in range(repeat):
+        kinesis_stubber.stub_put_records(stream, [data], [str(index)])
 
     with pytest.raises(IndexError):
         module.generate(stream, kinesis_client)
@@ -71,13 +70,13 @@ def test_random_generator(make_stubber, monkeypatch, module_name, data, rands, r
     kinesis_stubber = make_stubber(kinesis_client)
     module = importlib.import_module(module_name)
     stream = module.STREAM_NAME
-    partition_key = "partitionkey"
 
     monkeypatch.setattr(random, "random", lambda: rands.pop(0))
     monkeypatch.setattr(random, "randint", lambda x, y: rates.pop(0))
 
-    for item in data:
-        kinesis_stubber.stub_put_record(stream, item, partition_key)
+    kinesis_stubber.stub_put_records(
+        stream, data, [str(index) for index in range(len(data))]
+    )
 
     with pytest.raises(IndexError):
         module.generate(stream, kinesis_client)
@@ -114,17 +113,15 @@ def test_hotspot_generator(make_stubber, monkeypatch):
         0.5,
         0.5,  # 3 hotspot points
     ]
-    data = [
-        [{"x": 5.0, "y": 5.0, "is_hot": "N"} for _ in range(3)],
-        [{"x": 1.4, "y": 1.4, "is_hot": "Y"} for _ in range(3)],
-    ]
-    partition_key = "partition_key"
+    data = [{"x": 5.0, "y": 5.0, "is_hot": "N"} for _ in range(3)]
+    data += [{"x": 1.4, "y": 1.4, "is_hot": "Y"} for _ in range(3)]
 
     monkeypatch.setattr(random, "random", lambda: rands.pop(0))
     monkeypatch.setattr(time, "sleep", lambda x: None)
 
-    for batch in data:
-        kinesis_stubber.stub_put_records(stream, batch, partition_key)
+    kinesis_stubber.stub_put_records(
+        stream, data, [str(index) for index in range(len(data))]
+    )
 
     with pytest.raises(IndexError):
         module.generate(
@@ -137,7 +134,6 @@ def test_tworecordtypes_generator(make_stubber, monkeypatch):
     kinesis_stubber = make_stubber(kinesis_client)
     module = importlib.import_module("streams.dg_tworecordtypes")
     stream = module.STREAM_NAME
-    partition_key = module.PARTITION_KEY
     order_id = 1
     choices = ["AAAA", "BBBB"]
     stub_prices = [750, 1000, 1000, 600]
@@ -153,8 +149,7 @@ def test_tworecordtypes_generator(make_stubber, monkeypatch):
     ]
     data.append(module.get_order(order_id + 1, choices[1]))
 
-    for item in data:
-        kinesis_stubber.stub_put_record(stream, item, partition_key)
+    kinesis_stubber.stub_put_records(stream, data, ["1", "1", "1", "2"])
 
     with pytest.raises(IndexError):
         module.generate(stream, kinesis_client)
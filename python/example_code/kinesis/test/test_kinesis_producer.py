@@ -0,0 +1,111 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for kinesis_producer.py.
+"""
+
+import time
+import boto3
+from botocore.exceptions import ClientError
+import pytest
+
+from streams.kinesis_producer import KinesisProducer
+
+
+def test_put_flushes_full_batches(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream_name = "test-stream"
+    data = [{"index": index} for index in range(5)]
+
+    kinesis_stubber.stub_put_records(stream_name, data[:2], ["0", "1"])
+    kinesis_stubber.stub_put_records(stream_name, data[2:4], ["2", "3"])
+    kinesis_stubber.stub_put_records(stream_name, data[4:], ["4"])
+
+    with KinesisProducer(
+        kinesis_client, stream_name, max_records=2, linger_time=60
+    ) as producer:
+        for item in data:
+            producer.put(item)
+
+    assert producer.put_count == len(data)
+    assert producer.failed_records == []
+
+
+def test_flush_flushes_by_size(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream_name = "test-stream"
+    data = ["x" * 10, "y" * 10]
+
+    kinesis_stubber.stub_put_records(stream_name, data[:1], ["key"])
+    kinesis_stubber.stub_put_records(stream_name, data[1:], ["key"])
+
+    with KinesisProducer(
+        kinesis_client, stream_name, max_bytes=20, linger_time=60
+    ) as producer:
+        for item in data:
+            producer.put(item, partition_key="key")
+
+    assert producer.put_count == len(data)
+
+
+def test_flush_retries_failed_records(make_stubber, monkeypatch):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream_name = "test-stream"
+    data = [{"index": index} for index in range(3)]
+
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    kinesis_stubber.stub_put_records(
+        stream_name, data, ["0", "1", "2"], failed_indexes=[1]
+    )
+    kinesis_stubber.stub_put_records(stream_name, data[1:2], ["1"])
+
+    producer = KinesisProducer(kinesis_client, stream_name, linger_time=60)
+    for item in data:
+        producer.put(item)
+    producer.flush()
+
+    assert producer.put_count == len(data)
+    assert producer.failed_records == []
+
+
+def test_flush_gives_up_after_max_attempts(make_stubber, monkeypatch):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream_name = "test-stream"
+    data = {"index": 0}
+
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    for _ in range(2):
+        kinesis_stubber.stub_put_records(stream_name, [data], ["0"], failed_indexes=[0])
+
+    producer = KinesisProducer(
+        kinesis_client, stream_name, linger_time=60, max_attempts=2
+    )
+    producer.put(data)
+    producer.flush()
+
+    assert producer.put_count == 0
+    assert [record["PartitionKey"] for record in producer.failed_records] == ["0"]
+
+
+def test_flush_error(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream_name = "test-stream"
+    data = {"index": 0}
+
+    kinesis_stubber.stub_put_records(
+        stream_name, [data], ["0"], error_code="TestException"
+    )
+
+    producer = KinesisProducer(kinesis_client, stream_name, linger_time=60)
+    producer.put(data)
+    with pytest.raises(ClientError) as exc_info:
+        producer.flush()
+    assert exc_info.value.response["Error"]["Code"] == "TestException"
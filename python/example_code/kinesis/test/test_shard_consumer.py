@@ -0,0 +1,217 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for shard_consumer.py.
+"""
+
+import json
+import boto3
+from botocore.exceptions import ClientError
+import pytest
+
+from streams.kinesis_stream import KinesisStream
+from streams.shard_consumer import ShardCheckpoints, ShardConsumer
+
+
+def make_shard(shard_id, parent_id=None, closed=False):
+    shard = {
+        "ShardId": shard_id,
+        "HashKeyRange": {"StartingHashKey": "0", "EndingHashKey": "100"},
+        "SequenceNumberRange": {"StartingSequenceNumber": "0"},
+    }
+    if parent_id is not None:
+        shard["ParentShardId"] = parent_id
+    if closed:
+        shard["SequenceNumberRange"]["EndingSequenceNumber"] = "10"
+    return shard
+
+
+@pytest.mark.parametrize("error_code", [None, "TestException"])
+def test_list_shards(make_stubber, error_code):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    shards = [make_shard("shard-1"), make_shard("shard-2")]
+
+    kinesis_stubber.stub_list_shards(stream.name, shards, error_code=error_code)
+
+    if error_code is None:
+        got_shards = stream.list_shards()
+        assert [shard["ShardId"] for shard in got_shards] == ["shard-1", "shard-2"]
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            stream.list_shards()
+        assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+def test_get_records_follows_child_shards(make_stubber, tmp_path):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    shards = [
+        make_shard("parent", closed=True),
+        make_shard("child", parent_id="parent", closed=True),
+    ]
+    checkpoints = ShardCheckpoints(str(tmp_path / "checkpoints.json"))
+    consumer = ShardConsumer(
+        stream,
+        iterator_type="TRIM_HORIZON",
+        limit=100,
+        max_workers=1,
+        checkpoints=checkpoints,
+    )
+
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "parent", "parent-iter", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records("parent-iter", 100, ["p1", "p2"], closed=True)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "child", "child-iter", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records("child-iter", 100, ["c1"], closed=True)
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+
+    got_batches = [
+        [record["Data"] for record in records] for records in consumer.get_records()
+    ]
+
+    assert got_batches == [["p1", "p2"], ["c1"]]
+    with open(checkpoints.path) as checkpoint_file:
+        saved = json.load(checkpoint_file)
+    assert saved == {"sequence_numbers": {}, "finished": ["child", "parent"]}
+
+
+def test_get_records_resumes_from_checkpoint(make_stubber, tmp_path):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    shards = [
+        make_shard("parent", closed=True),
+        make_shard("child", parent_id="parent", closed=True),
+    ]
+    checkpoint_path = tmp_path / "checkpoints.json"
+    checkpoint_path.write_text(
+        json.dumps({"sequence_numbers": {"child": "5"}, "finished": ["parent"]})
+    )
+    consumer = ShardConsumer(
+        stream,
+        limit=100,
+        max_workers=1,
+        checkpoints=ShardCheckpoints(str(checkpoint_path)),
+    )
+
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name,
+        "child",
+        "child-iter",
+        iterator_type="AFTER_SEQUENCE_NUMBER",
+        sequence_number="5",
+    )
+    kinesis_stubber.stub_get_records("child-iter", 100, ["c2"], closed=True)
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+
+    got_batches = list(consumer.get_records())
+
+    assert [[record["Data"] for record in batch] for batch in got_batches] == [["c2"]]
+
+
+def test_get_records_more_shards_than_workers(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    shards = [make_shard("shard-1"), make_shard("shard-2")]
+    consumer = ShardConsumer(
+        stream, iterator_type="TRIM_HORIZON", limit=100, max_workers=1
+    )
+
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "shard-1", "iter-1", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records("iter-1", 100, ["a1"])
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "shard-2", "iter-2", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records("iter-2", 100, ["b1"], closed=True)
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_records("iter-1", 100, ["a2"], closed=True)
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+
+    got_batches = [
+        [record["Data"] for record in records] for records in consumer.get_records()
+    ]
+
+    assert got_batches == [["a1"], ["b1"], ["a2"]]
+
+
+def test_get_records_after_split(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    split_shards = [
+        make_shard("parent", closed=True),
+        make_shard("child-1", parent_id="parent"),
+        make_shard("child-2", parent_id="parent"),
+    ]
+    consumer = ShardConsumer(stream, iterator_type="TRIM_HORIZON", limit=100)
+
+    kinesis_stubber.stub_list_shards(stream.name, [make_shard("parent")])
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "parent", "parent-iter", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records("parent-iter", 100, ["p1"], closed=True)
+    kinesis_stubber.stub_list_shards(stream.name, split_shards)
+    for child in ("child-1", "child-2"):
+        kinesis_stubber.stub_get_shard_iterator(
+            stream.name, child, f"{child}-iter", iterator_type="TRIM_HORIZON"
+        )
+        kinesis_stubber.stub_get_records(f"{child}-iter", 100, [f"{child}-a"])
+    for child in ("child-1", "child-2"):
+        kinesis_stubber.stub_get_records(
+            f"{child}-iter", 100, [f"{child}-b"], closed=True
+        )
+        kinesis_stubber.stub_list_shards(stream.name, split_shards)
+
+    got_batches = [
+        [record["Data"] for record in records] for records in consumer.get_records()
+    ]
+
+    assert got_batches == [
+        ["p1"],
+        ["child-1-a"],
+        ["child-2-a"],
+        ["child-1-b"],
+        ["child-2-b"],
+    ]
+
+
+def test_get_records_error(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    consumer = ShardConsumer(stream, limit=100)
+
+    kinesis_stubber.stub_list_shards(stream.name, [make_shard("shard-1")])
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "shard-1", "shard-iter", error_code="TestException"
+    )
+
+    with pytest.raises(ClientError) as exc_info:
+        for _ in consumer.get_records():
+            pass
+    assert exc_info.value.response["Error"]["Code"] == "TestException"
+
+
+def test_consumer_rejects_large_limit():
+    stream = KinesisStream(boto3.client("kinesis"))
+    with pytest.raises(ValueError):
+        ShardConsumer(stream, limit=10001)
@@ -0,0 +1,170 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Compares two ways of getting the image frames from AWS HealthImaging image set
+metadata:
+
+* Load: save the gzipped metadata to a file, load the whole JSON document, and
+  search it with JMESPath.
+* Stream: parse the gzipped metadata as it is read and yield each image frame.
+
+The metadata is generated locally, so this benchmark does not call AWS.
+
+Run it with, for example:
+
+    python benchmark_metadata_parsing.py --instances 2000 --frames 2
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import jmespath
+
+from medicalimaging import iter_image_frame_descriptors
+
+
+def make_metadata(instance_count, frames_per_instance):
+    """
+    Makes gzipped image set metadata with one series. Each instance has a set of
+    DICOM attributes and image frames with a checksum for each resolution level.
+
+    :param instance_count: The number of instances in the series.
+    :param frames_per_instance: The number of image frames in each instance.
+    :return: The gzipped metadata.
+    """
+    series_uid = "1.2.840.113619.2.55.3.604688119"
+    instances = {}
+    for instance in range(instance_count):
+        instances[f"{series_uid}.{instance}"] = {
+            "DICOM": {
+                "SOPInstanceUID": f"{series_uid}.{instance}",
+                "InstanceNumber": instance,
+                "RescaleSlope": 1,
+                "RescaleIntercept": -1024,
+                "ImageComments": "x" * 200,
+            },
+            "ImageFrames": [
+                {
+                    "ID": f"{instance:016x}{frame:016x}",
+                    "MinPixelValue": 0,
+                    "MaxPixelValue": 4095,
+                    "PixelDataChecksumFromBaseToFullResolution": [
+                        {
+                            "Width": 512 >> level,
+                            "Height": 512 >> level,
+                            "Checksum": level,
+                        }
+                        for level in reversed(range(5))
+                    ],
+                }
+                for frame in range(frames_per_instance)
+            ],
+        }
+    metadata = {
+        "SchemaVersion": "1.1",
+        "Patient": {"DICOM": {"PatientID": "benchmark"}},
+        "Study": {
+            "DICOM": {"StudyInstanceUID": "1.2.3"},
+            "Series": {
+                series_uid: {"DICOM": {"Modality": "CT"}, "Instances": instances}
+            },
+        },
+    }
+    return gzip.compress(json.dumps(metadata).encode())
+
+
+def load_image_frames(metadata, image_set_id, out_directory):
+    """
+    Gets the image frames by saving the metadata to a file, loading the whole
+    document, and searching it with JMESPath.
+    """
+    file_name = os.path.join(out_directory, f"{image_set_id}_metadata.json.gzip")
+    with open(file_name, "wb") as f:
+        f.write(metadata)
+    with gzip.open(file_name, "rb") as f_in:
+        doc = json.load(f_in)
+    image_frames = []
+    for instance in jmespath.search("Study.Series.*.Instances[].*[]", doc):
+        rescale_slope = jmespath.search("DICOM.RescaleSlope", instance)
+        rescale_intercept = jmespath.search("DICOM.RescaleIntercept", instance)
+        for image_frame in jmespath.search("ImageFrames[][]", instance):
+            checksum_json = jmespath.search(
+                "max_by(PixelDataChecksumFromBaseToFullResolution, &Width)",
+                image_frame,
+            )
+            image_frames.append(
+                {
+                    "imageSetId": image_set_id,
+                    "imageFrameId": image_frame["ID"],
+                    "rescaleIntercept": rescale_intercept,
+                    "rescaleSlope": rescale_slope,
+                    "minPixelValue": image_frame["MinPixelValue"],
+                    "maxPixelValue": image_frame["MaxPixelValue"],
+                    "fullResolutionChecksum": checksum_json["Checksum"],
+                }
+            )
+    return image_frames
+
+
+def stream_image_frames(metadata, image_set_id):
+    """Gets the image frames by parsing the metadata as it is read."""
+    return list(iter_image_frame_descriptors(io.BytesIO(metadata), image_set_id))
+
+
+def measure(func, *args):
+    """
+    Runs a function and measures its duration and the peak memory that Python
+    allocates while it runs.
+
+    :return: The result of the function, the duration in seconds, and the peak
+             memory in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--instances", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=1)
+    args = parser.parse_args()
+
+    image_set_id = "benchmark"
+    metadata = make_metadata(args.instances, args.frames)
+    print(
+        f"Metadata: {args.instances} instances, {args.instances * args.frames} "
+        f"frames, {len(metadata) / 1024:.0f} KiB gzipped."
+    )
+    with tempfile.TemporaryDirectory() as out_directory:
+        loaded, load_duration, load_peak = measure(
+            load_image_frames, metadata, image_set_id, out_directory
+        )
+    streamed, stream_duration, stream_peak = measure(
+        stream_image_frames, metadata, image_set_id
+    )
+    assert loaded == streamed, "The two methods found different image frames."
+
+    print(f"{'Method':<8}{'Seconds':>10}{'Peak MiB':>12}")
+    for name, duration, peak in (
+        ("Load", load_duration, load_peak),
+        ("Stream", stream_duration, stream_peak),
+    ):
+        print(f"{name:<8}{duration:>10.3f}{peak / 1024 / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,9 @@ import sys
 import os
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Thread
 
 # Import the wrapper for the service functionality.
@@ -55,6 +57,9 @@ IDC_IMAGE_CHOICES = [
 
 IMPORT_JOB_MANIFEST_FILE_NAME = "job-output-manifest.json"
 
+DEFAULT_COPY_WORKERS = 16
+MULTIPART_COPY_THRESHOLD = 100 * 1024 * 1024
+
 
 class MedicalImagingWorkflowScenario:
     input_bucket_name = ""
@@ -203,7 +208,7 @@ class MedicalImagingWorkflowScenario:
         all_image_frame_ids = []
         for image_set in image_sets:
             image_frames = self.medical_imaging_wrapper.get_image_frames_for_image_set(
-                self.data_store_id, image_set, out_dir
+                self.data_store_id, image_set
             )
 
             all_image_frame_ids.extend(image_frames)
@@ -248,46 +253,129 @@ class MedicalImagingWorkflowScenario:
         print("-" * 88)
 
     # snippet-start:[python.example_code.medical-imaging.workflow.copy]
-    def copy_single_object(self, key, source_bucket, target_bucket, target_directory):
+    def copy_single_object(
+        self, key, source_bucket, target_bucket, target_directory, size=0
+    ):
         """
-        Copies a single object from a source to a target bucket.
+        Copies a single object from a source to a target bucket. Objects larger than
+        the multipart threshold are copied in parallel parts by the managed transfer
+        copy, which also handles objects larger than the 5 GB CopyObject limit.
 
         :param key: The key of the object to copy.
         :param source_bucket: The source bucket for the copy.
         :param target_bucket: The target bucket for the copy.
         :param target_directory: The target directory for the copy.
+        :param size: The size of the object in bytes.
         """
         new_key = target_directory + "/" + key
         copy_source = {"Bucket": source_bucket, "Key": key}
-        self.s3_client.copy_object(
-            CopySource=copy_source, Bucket=target_bucket, Key=new_key
-        )
-        print(f"\n\t\tCopying {key}.")
+        if size >= MULTIPART_COPY_THRESHOLD:
+            self.s3_client.copy(
+                copy_source,
+                target_bucket,
+                new_key,
+                Config=TransferConfig(multipart_threshold=MULTIPART_COPY_THRESHOLD),
+            )
+        else:
+            self.s3_client.copy_object(
+                CopySource=copy_source, Bucket=target_bucket, Key=new_key
+            )
+        logger.info("Copied %s.", key)
+
+    def list_objects(self, bucket, prefix):
+        """
+        Lists all objects under a prefix, following continuation tokens so that
+        prefixes with more than 1,000 objects are fully listed.
+
+        :param bucket: The bucket to list.
+        :param prefix: The prefix of the objects to list.
+        :return: The objects, each a dict with 'Key', 'ETag', and 'Size' keys.
+        """
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        objects = []
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            objects.extend(page.get("Contents", []))
+        return objects
+
+    @staticmethod
+    def is_copied(source_obj, target_obj):
+        """
+        Checks whether a target object is a complete copy of a source object.
+        Objects copied in parts have a different ETag than their source, so their
+        sizes are compared instead.
+        """
+        if target_obj is None:
+            return False
+        if "-" in source_obj.get("ETag", "") or "-" in target_obj.get("ETag", ""):
+            return source_obj.get("Size") == target_obj.get("Size")
+        return source_obj.get("ETag") == target_obj.get("ETag")
 
     def copy_images(
-        self, source_bucket, source_directory, target_bucket, target_directory
+        self,
+        source_bucket,
+        source_directory,
+        target_bucket,
+        target_directory,
+        max_workers=DEFAULT_COPY_WORKERS,
     ):
         """
         Copies the images from the source to the target bucket using multiple threads.
+        Objects that already exist in the target bucket with a matching ETag are
+        skipped, so an interrupted copy can be run again to resume it.
 
         :param source_bucket: The source bucket for the images.
         :param source_directory: Directory within the source bucket.
         :param target_bucket: The target bucket for the images.
         :param target_directory: Directory within the target bucket.
+        :param max_workers: The maximum number of objects to copy at the same time.
+        :return: The number of objects copied and the number skipped.
         """
 
-        # Get list of all objects in source bucket.
-        list_response = self.s3_client.list_objects_v2(
-            Bucket=source_bucket, Prefix=source_directory
-        )
-        objs = list_response["Contents"]
-        keys = [obj["Key"] for obj in objs]
+        # Get list of all objects in the source and target locations.
+        source_objs = self.list_objects(source_bucket, source_directory)
+        target_objs = {
+            obj["Key"]: obj
+            for obj in self.list_objects(
+                target_bucket, f"{target_directory}/{source_directory}"
+            )
+        }
+        to_copy = [
+            obj
+            for obj in source_objs
+            if not self.is_copied(
+                obj, target_objs.get(f"{target_directory}/{obj['Key']}")
+            )
+        ]
+        skipped = len(source_objs) - len(to_copy)
+        if skipped:
+            print(f"\t\tSkipping {skipped} objects that were already copied.")
 
         # Copy the objects in the bucket.
-        for key in keys:
-            self.copy_single_object(key, source_bucket, target_bucket, target_directory)
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.copy_single_object,
+                    obj["Key"],
+                    source_bucket,
+                    target_bucket,
+                    target_directory,
+                    obj.get("Size", 0),
+                )
+                for obj in to_copy
+            ]
+            for future in as_completed(futures):
+                future.result()
+        elapsed = max(time.perf_counter() - start_time, 1e-6)
+        copied_bytes = sum(obj.get("Size", 0) for obj in to_copy)
 
-        print("\t\tDone copying all objects.")
+        print(
+            f"\t\tDone copying all objects. Copied {len(to_copy)} objects "
+            f"({copied_bytes / 1024 / 1024:.1f} MB) in {elapsed:.1f} seconds, "
+            f"{len(to_copy) / elapsed:.1f} objects/s, "
+            f"{copied_bytes / 1024 / 1024 / elapsed:.1f} MB/s."
+        )
+        return len(to_copy), skipped
 
     # snippet-end:[python.example_code.medical-imaging.workflow.copy]
 
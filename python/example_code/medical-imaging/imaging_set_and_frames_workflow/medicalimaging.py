@@ -3,17 +3,185 @@
 
 import logging
 import boto3
-import os
 import gzip
 import zlib
 import openjpeg
 import json
+import ijson
 import jmespath
+import threading
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_DOWNLOADS = 8
+DEFAULT_MAX_BUFFERED_BYTES = 256 * 1024 * 1024
+# The keys of the containers that hold an instance in image set metadata:
+# the root, Study, Series, the series UID, Instances, and the instance UID.
+INSTANCE_DEPTH = 6
+SCALAR_EVENTS = ("null", "boolean", "integer", "double", "number", "string")
+
+
+def decode_frame_checksum(frame_data):
+    """
+    Decodes an HTJ2K image frame to a bitmap and calculates the CRC32 checksum of the
+    bitmap. This function runs in a worker process, so only the checksum is sent
+    back instead of the decoded bitmap.
+
+    :param frame_data: The HTJ2K encoded image frame.
+    :return: The CRC32 checksum of the decoded bitmap.
+    """
+    # Use format 2 for the JPH data.
+    image_array = openjpeg.utils.decode(frame_data, 2)
+    return zlib.crc32(image_array)
+
+
+def iter_image_frame_descriptors(metadata_stream, image_set_id):
+    """
+    Parses gzipped image set metadata as it is read and yields a compact descriptor
+    for each image frame. Only one instance at a time is held in memory, so the size
+    of the metadata document is not limited by available memory.
+
+    DICOM UIDs contain dots, so instances are found by tracking the keys of the
+    open containers instead of by matching the dotted prefixes reported by ijson.
+
+    :param metadata_stream: A file-like object that contains the gzipped metadata,
+                            such as the imageSetMetadataBlob of a
+                            GetImageSetMetadata response.
+    :param image_set_id: The ID of the image set.
+    :return: Yields a dict for each image frame, in the order of the metadata.
+    """
+    with gzip.GzipFile(fileobj=metadata_stream, mode="rb") as f_in:
+        keys = []
+        key = None
+        instance_prefix = None
+        for prefix, event, value in ijson.parse(f_in, use_float=True):
+            if event == "map_key":
+                key = value
+            elif event in ("start_map", "start_array"):
+                keys.append(key)
+                key = None
+                if (
+                    event == "start_map"
+                    and len(keys) == INSTANCE_DEPTH
+                    and keys[1:3] == ["Study", "Series"]
+                    and keys[4] == "Instances"
+                ):
+                    instance_prefix = prefix
+                    slope_prefix = f"{prefix}.DICOM.RescaleSlope"
+                    intercept_prefix = f"{prefix}.DICOM.RescaleIntercept"
+                    frame_prefixes = (
+                        f"{prefix}.ImageFrames.item",
+                        f"{prefix}.ImageFrames.item.item",
+                    )
+                    rescale_slope = None
+                    rescale_intercept = None
+                    frames = []
+                    frame_builder = None
+            elif event in ("end_map", "end_array"):
+                keys.pop()
+                key = None
+            if instance_prefix is None:
+                continue
+
+            if frame_builder is not None:
+                frame_builder.event(event, value)
+                if event == "end_map" and prefix == frame_prefix:
+                    frames.append(frame_builder.value)
+                    frame_builder = None
+            elif event == "start_map" and prefix in frame_prefixes:
+                frame_prefix = prefix
+                frame_builder = ijson.ObjectBuilder()
+                frame_builder.event(event, value)
+            elif prefix == slope_prefix and event in SCALAR_EVENTS:
+                rescale_slope = value
+            elif prefix == intercept_prefix and event in SCALAR_EVENTS:
+                rescale_intercept = value
+            elif (
+                event == "end_map"
+                and prefix == instance_prefix
+                and len(keys) == INSTANCE_DEPTH - 1
+            ):
+                # The DICOM attributes can follow the frames, so the frames of an
+                # instance are yielded when the whole instance has been read.
+                for frame in frames:
+                    checksum = max(
+                        frame["PixelDataChecksumFromBaseToFullResolution"],
+                        key=lambda level: level["Width"],
+                    )
+                    yield {
+                        "imageSetId": image_set_id,
+                        "imageFrameId": frame["ID"],
+                        "rescaleIntercept": rescale_intercept,
+                        "rescaleSlope": rescale_slope,
+                        "minPixelValue": frame["MinPixelValue"],
+                        "maxPixelValue": frame["MaxPixelValue"],
+                        "fullResolutionChecksum": checksum["Checksum"],
+                    }
+                instance_prefix = None
+
+
+class BufferBudget:
+    """
+    Limits the number of downloaded bytes that are held in memory while they wait
+    to be decoded. Room is reserved before each download starts, so downloads that
+    are in flight count against the budget. Frame sizes aren't known before they
+    are downloaded, so each reservation is the size of the largest frame so far.
+    """
+
+    def __init__(self, max_bytes, initial_estimate):
+        """
+        :param max_bytes: The most bytes that downloads in flight and frames that
+                          wait to be decoded can hold.
+        :param initial_estimate: The number of bytes to reserve for a frame before
+                                 any frame has been downloaded.
+        """
+        self.max_bytes = max_bytes
+        self.estimate = initial_estimate
+        self.buffered_bytes = 0
+        self._condition = threading.Condition()
+
+    def reserve(self):
+        """
+        Blocks until there is room for a frame of the estimated size and reserves
+        it. When nothing is buffered, a frame is always let through, so a frame that
+        is larger than the budget can't block downloads forever.
+
+        :return: The number of bytes that were reserved.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.buffered_bytes == 0
+                or self.buffered_bytes + self.estimate <= self.max_bytes
+            )
+            reserved = self.estimate
+            self.buffered_bytes += reserved
+            return reserved
+
+    def settle(self, reserved, size):
+        """
+        Replaces a reservation with the actual size of the downloaded frame.
+
+        :param reserved: The number of bytes that were reserved.
+        :param size: The size of the frame.
+        """
+        with self._condition:
+            self.buffered_bytes += size - reserved
+            self.estimate = max(self.estimate, size)
+            self._condition.notify_all()
+
+    def release(self, size):
+        with self._condition:
+            self.buffered_bytes -= size
+            self._condition.notify_all()
+
 
 # snippet-start:[python.example_code.medical-imaging.MedicalImagingWorkflowWrapper.class]
 # snippet-start:[python.example_code.medical-imaging.MedicalImagingWorkflowWrapper.decl]
@@ -194,45 +362,33 @@ class MedicalImagingWrapper:
     # snippet-end:[python.example_code.medical-imaging.workflow.SearchImageSets]
 
     # snippet-start:[python.example_code.medical-imaging.workflow.GetImageFrames]
-    def get_image_frames_for_image_set(self, datastore_id, image_set_id, out_directory):
+    def get_image_frames_for_image_set(
+        self, datastore_id, image_set_id, out_directory=None
+    ):
         """
         Get the image frames for an image set.
 
         :param datastore_id: The ID of the data store.
         :param image_set_id: The ID of the image set.
-        :param out_directory: The directory to save the file.
+        :param out_directory: Not used. The metadata is parsed as it is downloaded
+                              instead of being saved to a file.
         :return: The image frames.
         """
-        image_frames = []
-        file_name = os.path.join(out_directory, f"{image_set_id}_metadata.json.gzip")
-        file_name = file_name.replace("/", "\\\\")
-        self.get_image_set_metadata(file_name, datastore_id, image_set_id)
+        return list(self.iter_image_frames(datastore_id, image_set_id))
+
+    def iter_image_frames(self, datastore_id, image_set_id):
+        """
+        Streams the metadata of an image set and yields the image frames as they are
+        parsed, without saving the metadata to a file or loading the whole document.
+
+        :param datastore_id: The ID of the data store.
+        :param image_set_id: The ID of the image set.
+        :return: Yields a dict for each image frame.
+        """
         try:
-            with gzip.open(file_name, "rb") as f_in:
-                doc = json.load(f_in)
-            instances = jmespath.search("Study.Series.*.Instances[].*[]", doc)
-            for instance in instances:
-                rescale_slope = jmespath.search("DICOM.RescaleSlope", instance)
-                rescale_intercept = jmespath.search("DICOM.RescaleIntercept", instance)
-                image_frames_json = jmespath.search("ImageFrames[][]", instance)
-                for image_frame in image_frames_json:
-                    checksum_json = jmespath.search(
-                        "max_by(PixelDataChecksumFromBaseToFullResolution, &Width)",
-                        image_frame,
-                    )
-                    image_frame_info = {
-                        "imageSetId": image_set_id,
-                        "imageFrameId": image_frame["ID"],
-                        "rescaleIntercept": rescale_intercept,
-                        "rescaleSlope": rescale_slope,
-                        "minPixelValue": image_frame["MinPixelValue"],
-                        "maxPixelValue": image_frame["MaxPixelValue"],
-                        "fullResolutionChecksum": checksum_json["Checksum"],
-                    }
-                    image_frames.append(image_frame_info)
-            return image_frames
-        except TypeError:
-            return {}
+            image_set_metadata = self.medical_imaging_client.get_image_set_metadata(
+                imageSetId=image_set_id, datastoreId=datastore_id
+            )
         except ClientError as err:
             logger.error(
                 "Couldn't get image frames for image set. Here's why: %s: %s",
@@ -240,7 +396,11 @@ class MedicalImagingWrapper:
                 err.response["Error"]["Message"],
             )
             raise
-        return image_frames
+        metadata_blob = image_set_metadata["imageSetMetadataBlob"]
+        try:
+            yield from iter_image_frame_descriptors(metadata_blob, image_set_id)
+        finally:
+            metadata_blob.close()
 
     # snippet-end:[python.example_code.medical-imaging.workflow.GetImageFrames]
 
@@ -311,6 +471,74 @@ class MedicalImagingWrapper:
             total_result = total_result and image_result
         return total_result
 
+    def download_decode_and_check_image_frames_concurrently(
+        self,
+        data_store_id,
+        image_frames,
+        max_downloads=DEFAULT_MAX_DOWNLOADS,
+        max_decoders=None,
+        max_buffered_bytes=DEFAULT_MAX_BUFFERED_BYTES,
+    ):
+        """
+        Downloads image frames concurrently into memory, decodes them on a pool of
+        processes so that decoding uses all CPU cores, and verifies each checksum as
+        soon as its frame is decoded. No files are written.
+
+        :param data_store_id: The HealthImaging data store ID.
+        :param image_frames: A list of dicts containing image frame information.
+        :param max_downloads: The maximum number of frames to download at the same time.
+        :param max_decoders: The number of decoding processes. Defaults to the number
+                             of CPU cores.
+        :param max_buffered_bytes: The number of downloaded bytes waiting to be
+                                   decoded at which new downloads wait.
+        :return: True if all checksums are verified; otherwise, False.
+        """
+        budget = BufferBudget(
+            max_buffered_bytes, max_buffered_bytes // max(max_downloads, 1)
+        )
+        results = {}
+
+        def download(decoders, image_frame):
+            reserved = budget.reserve()
+            try:
+                frame_data = self.get_pixel_data_bytes(
+                    data_store_id,
+                    image_frame["imageSetId"],
+                    image_frame["imageFrameId"],
+                )
+            except Exception:
+                budget.release(reserved)
+                raise
+            budget.settle(reserved, len(frame_data))
+            decode_future = decoders.submit(decode_frame_checksum, frame_data)
+            decode_future.add_done_callback(lambda _: budget.release(len(frame_data)))
+            return image_frame, decode_future
+
+        with ProcessPoolExecutor(max_workers=max_decoders) as decoders:
+            with ThreadPoolExecutor(max_workers=max_downloads) as downloaders:
+                # Maps download futures to None and decode futures to their frame,
+                # so checksums are verified while other frames are still downloading.
+                pending = {
+                    downloaders.submit(download, decoders, image_frame): None
+                    for image_frame in image_frames
+                }
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        image_frame = pending.pop(future)
+                        if image_frame is None:
+                            image_frame, decode_future = future.result()
+                            pending[decode_future] = image_frame
+                            continue
+                        image_result = (
+                            image_frame["fullResolutionChecksum"] == future.result()
+                        )
+                        results[image_frame["imageFrameId"]] = image_result
+                        print(
+                            f"\t\tImage checksum verified for {image_frame['imageFrameId']}: {image_result}"
+                        )
+        return all(results.values())
+
     @staticmethod
     def jph_image_to_opj_bitmap(jph_file):
         """
@@ -359,6 +587,30 @@ class MedicalImagingWrapper:
 
     # snippet-end:[python.example_code.medical-imaging.workflow.GetPixelData]
 
+    def get_pixel_data_bytes(self, datastore_id, image_set_id, image_frame_id):
+        """
+        Get an image frame's HTJ2K encoded pixel data in memory.
+
+        :param datastore_id: The ID of the data store.
+        :param image_set_id: The ID of the image set.
+        :param image_frame_id: The ID of the image frame.
+        :return: The encoded pixel data.
+        """
+        try:
+            image_frame = self.medical_imaging_client.get_image_frame(
+                datastoreId=datastore_id,
+                imageSetId=image_set_id,
+                imageFrameInformation={"imageFrameId": image_frame_id},
+            )
+            return image_frame["imageFrameBlob"].read()
+        except ClientError as err:
+            logger.error(
+                "Couldn't get image frame. Here's why: %s: %s",
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            raise
+
     # snippet-start:[python.example_code.medical-imaging.workflow.DeleteImageSet]
     def delete_image_set(self, datastore_id, image_set_id):
         """
@@ -7,9 +7,14 @@ Tests for imaging_set_and_frames workflow.
 
 import boto3
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+import openjpeg
 import pytest
 import os
+import threading
+import zlib
 
+import medicalimaging
 from medicalimaging import MedicalImagingWrapper
 from imaging_set_and_frames import MedicalImagingWorkflowScenario
 
@@ -192,7 +197,78 @@ def test_get_image_frames_for_image_set(make_stubber, error_code):
         medical_imaging_stubber.stub_get_image_set_metadata(
             datastore_id, image_set_id, error_code=error_code
         )
-        wrapper.get_image_frames_for_image_set(datastore_id, image_set_id, directory)
+        image_frames = wrapper.get_image_frames_for_image_set(
+            datastore_id, image_set_id, directory
+        )
+        assert image_frames == []
+
+
+def test_get_image_frames_for_image_set_streams_metadata(make_stubber):
+    medical_imaging_client = boto3.client("medical-imaging")
+    medical_imaging_stubber = make_stubber(medical_imaging_client)
+    s3_client = boto3.client("s3")
+    wrapper = MedicalImagingWrapper(medical_imaging_client, s3_client)
+    datastore_id = "abcdedf1234567890abcdef123456789"
+    image_set_id = "cccccc1234567890abcdef123456789"
+    series_uid = "1.2.840.10008.1"
+
+    def make_frame(frame_id):
+        return {
+            "ID": frame_id,
+            "MinPixelValue": 0,
+            "MaxPixelValue": 4095,
+            "PixelDataChecksumFromBaseToFullResolution": [
+                {"Width": 256, "Height": 256, "Checksum": 1},
+                {"Width": 512, "Height": 512, "Checksum": 2},
+            ],
+        }
+
+    metadata = {
+        "Study": {
+            "DICOM": {"StudyInstanceUID": "1.2.3"},
+            "Series": {
+                series_uid: {
+                    "Instances": {
+                        f"{series_uid}.1": {
+                            "DICOM": {"RescaleSlope": 1, "RescaleIntercept": -1024},
+                            "ImageFrames": [make_frame("frame-1")],
+                        },
+                        # DICOM attributes after the image frames, and nested frames.
+                        f"{series_uid}.2": {
+                            "ImageFrames": [[make_frame("frame-2")]],
+                            "DICOM": {"RescaleSlope": 2.5},
+                        },
+                    }
+                }
+            },
+        }
+    }
+    medical_imaging_stubber.stub_get_image_set_metadata(
+        datastore_id, image_set_id, metadata=metadata
+    )
+
+    image_frames = wrapper.get_image_frames_for_image_set(datastore_id, image_set_id)
+
+    assert image_frames == [
+        {
+            "imageSetId": image_set_id,
+            "imageFrameId": "frame-1",
+            "rescaleIntercept": -1024,
+            "rescaleSlope": 1,
+            "minPixelValue": 0,
+            "maxPixelValue": 4095,
+            "fullResolutionChecksum": 2,
+        },
+        {
+            "imageSetId": image_set_id,
+            "imageFrameId": "frame-2",
+            "rescaleIntercept": None,
+            "rescaleSlope": 2.5,
+            "minPixelValue": 0,
+            "maxPixelValue": 4095,
+            "fullResolutionChecksum": 2,
+        },
+    ]
 
 
 @pytest.mark.parametrize("error_code", [None, "TestException"])
@@ -222,6 +298,64 @@ def test_get_pixel_data(make_stubber, error_code):
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+@pytest.mark.parametrize(
+    "checksums,expected", [((True, True), True), ((True, False), False)]
+)
+def test_download_decode_and_check_image_frames_concurrently(
+    make_stubber, monkeypatch, checksums, expected
+):
+    medical_imaging_client = boto3.client("medical-imaging")
+    medical_imaging_stubber = make_stubber(medical_imaging_client)
+    s3_client = boto3.client("s3")
+    wrapper = MedicalImagingWrapper(medical_imaging_client, s3_client)
+    datastore_id = "abcdedf1234567890abcdef123456789"
+    image_set_id = "cccccc1234567890abcdef123456789"
+    frame_ids = ["aaaaaa1234567890abcdef123456789", "bbbbbb1234567890abcdef123456789"]
+    # The stubbed frame data is not a real image, so decoding returns it unchanged.
+    frame_crc = zlib.crc32(b"akdelfaldkflakdflkajs")
+    image_frames = [
+        {
+            "imageSetId": image_set_id,
+            "imageFrameId": frame_id,
+            "fullResolutionChecksum": frame_crc if good else frame_crc + 1,
+        }
+        for frame_id, good in zip(frame_ids, checksums)
+    ]
+
+    monkeypatch.setattr(medicalimaging, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(openjpeg.utils, "decode", lambda data, j2k_format: data)
+    for frame_id in frame_ids:
+        medical_imaging_stubber.stub_get_pixel_data(
+            datastore_id, image_set_id, frame_id
+        )
+
+    result = wrapper.download_decode_and_check_image_frames_concurrently(
+        datastore_id, image_frames, max_downloads=1, max_buffered_bytes=10
+    )
+
+    assert result == expected
+
+
+def test_buffer_budget_counts_downloads_in_flight():
+    budget = medicalimaging.BufferBudget(max_bytes=100, initial_estimate=40)
+    first = budget.reserve()
+    second = budget.reserve()
+    assert budget.buffered_bytes == 80
+
+    reserved = []
+    waiter = threading.Thread(target=lambda: reserved.append(budget.reserve()))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    budget.settle(first, 50)
+    budget.settle(second, 10)
+    budget.release(50)
+    waiter.join(1)
+    assert reserved == [50]
+    assert budget.buffered_bytes == 60
+
+
 @pytest.mark.parametrize("error_code", [None, "TestException"])
 def test_delete_image_set(make_stubber, error_code):
     medical_imaging_client = boto3.client("medical-imaging")
@@ -242,3 +376,71 @@ def test_delete_image_set(make_stubber, error_code):
         with pytest.raises(ClientError) as exc_info:
             wrapper.delete_image_set(datastore_id, image_set_id)
         assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+@pytest.mark.parametrize("error_code", [None, "TestException"])
+def test_copy_images(make_stubber, error_code):
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
+    scenario = MedicalImagingWorkflowScenario(None, s3_client, None)
+    source_bucket = "idc-open-data"
+    source_directory = "study"
+    target_bucket = "healthimaging-source"
+    target_directory = "input"
+    keys = [f"{source_directory}/image-{index}.dcm" for index in range(3)]
+    e_tags = [f'"etag{index}"' for index in range(3)]
+
+    s3_stubber.stub_list_objects_v2(
+        source_bucket,
+        keys[:2],
+        prefix=source_directory,
+        e_tags=e_tags[:2],
+        sizes=[100, 100],
+        next_continuation_token="token",
+    )
+    s3_stubber.stub_list_objects_v2(
+        source_bucket,
+        keys[2:],
+        prefix=source_directory,
+        e_tags=e_tags[2:],
+        sizes=[100],
+        continuation_token="token",
+    )
+    # The first object was already copied, and the second one was changed since.
+    s3_stubber.stub_list_objects_v2(
+        target_bucket,
+        [f"{target_directory}/{key}" for key in keys[:2]],
+        prefix=f"{target_directory}/{source_directory}",
+        e_tags=[e_tags[0], '"stale"'],
+        sizes=[100, 100],
+    )
+    s3_stubber.stub_copy_object(
+        source_bucket, keys[1], target_bucket, f"{target_directory}/{keys[1]}"
+    )
+    s3_stubber.stub_copy_object(
+        source_bucket,
+        keys[2],
+        target_bucket,
+        f"{target_directory}/{keys[2]}",
+        error_code=error_code,
+    )
+
+    if error_code is None:
+        copied, skipped = scenario.copy_images(
+            source_bucket,
+            source_directory,
+            target_bucket,
+            target_directory,
+            max_workers=1,
+        )
+        assert (copied, skipped) == (2, 1)
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            scenario.copy_images(
+                source_bucket,
+                source_directory,
+                target_bucket,
+                target_directory,
+                max_workers=1,
+            )
+        assert exc_info.value.response["Error"]["Code"] == error_code
@@ -288,16 +288,19 @@ class PollyMouth:
                     parent=self.app,
                 )
                 if bucket_name:
-                    audio_stream, visemes = self.polly_wrapper.do_synthesis_task(
-                        self.sayit_txt.get(1.0, tkinter.END),
-                        self.engine_var.get(),
-                        self.voice_choices[self.voice_var.get()],
-                        "mp3",
-                        bucket_name,
-                        self.language_choices[self.language_var.get()],
-                        True,
-                        self.long_text_wait_callback,
-                    )
+                    try:
+                        audio_stream, visemes = self.polly_wrapper.do_synthesis_task(
+                            self.sayit_txt.get(1.0, tkinter.END),
+                            self.engine_var.get(),
+                            self.voice_choices[self.voice_var.get()],
+                            "mp3",
+                            bucket_name,
+                            self.language_choices[self.language_var.get()],
+                            True,
+                            self.long_text_wait_callback,
+                        )
+                    except TimeoutError:
+                        logger.error("The synthesis task didn't finish in time.")
 
         logger.debug("Visemes: %s.", json.dumps(visemes))
 
@@ -11,9 +11,14 @@ speech and manage custom lexicons.
 import io
 import json
 import logging
-import time
+import queue
+import sys
 from botocore.exceptions import ClientError
 
+# Add relative path to include demo_tools in this code example without need for setup.
+sys.path.append("../..")
+from demo_tools.job_notifier import JobNotifier
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +33,7 @@ class PollyWrapper:
         """
         self.polly_client = polly_client
         self.s3_resource = s3_resource
+        self.notifier = JobNotifier(initial_delay=1, max_delay=10)
         self.voice_metadata = None
 
     # snippet-end:[python.example_code.polly.helper.PollyWrapper]
@@ -105,9 +111,10 @@ class PollyWrapper:
 
     def _wait_for_task(self, tries, task_id, task_type, wait_callback, output_bucket):
         """
-        Waits for an asynchronous speech synthesis task to complete. This function
-        polls Amazon Polly for data about the specified task until a completion
-        status is returned or the number of tries is exceeded.
+        Waits for an asynchronous speech synthesis task to complete. The task is
+        polled by a notifier that is shared by all tasks of this wrapper, which waits
+        longer between each poll while the task runs, until a completion status is
+        returned or the number of tries is exceeded.
 
         When the task successfully completes, the task output is retrieved from the
         output Amazon S3 bucket and the output object is deleted.
@@ -118,21 +125,30 @@ class PollyWrapper:
                           function to display status.
         :param wait_callback: A callback function that is called after each poll,
                               to give the caller an opportunity to take action, such
-                              as to display status.
+                              as to display status. It is called on the thread that
+                              waits for the task.
         :param output_bucket: The Amazon S3 bucket where task output is located.
         :return: The output from the task in a byte stream.
+        :raises TimeoutError: When the task is still running after the last poll.
         """
-        task = None
-        while tries > 0:
-            task = self.get_speech_synthesis_task(task_id)
-            task_status = task["TaskStatus"]
-            logger.info("Task %s status %s.", task_id, task_status)
+        statuses = queue.Queue()
+
+        def poll(poll_task_id):
+            polled_task = self.get_speech_synthesis_task(poll_task_id)
+            task_status = polled_task["TaskStatus"]
+            logger.info("Task %s status %s.", poll_task_id, task_status)
+            statuses.put(task_status)
+            return polled_task if task_status in ("completed", "failed") else None
+
+        future = self.notifier.watch(task_id, poll, max_polls=tries)
+        while not future.done() or not statuses.empty():
+            try:
+                task_status = statuses.get(timeout=0.1)
+            except queue.Empty:
+                continue
             if wait_callback is not None:
                 wait_callback(task_type, task_status)
-            if task_status in ("completed", "failed"):
-                break
-            time.sleep(5)
-            tries -= 1
+        task = future.result()
 
         output_stream = io.BytesIO()
         if task is not None:
@@ -182,6 +198,8 @@ class PollyWrapper:
                               take action, such as to display status.
         :return: The audio stream that contains the synthesized speech and a list
                  of visemes that are associated with the speech audio.
+        :raises TimeoutError: When a task is still running after it was polled ten
+                              times.
         """
         try:
             kwargs = {
@@ -12,6 +12,7 @@ import boto3
 from botocore.exceptions import ClientError
 import pytest
 
+from demo_tools.job_notifier import JobNotifier
 from polly_wrapper import PollyWrapper
 
 
@@ -199,6 +200,48 @@ def test_do_synthesis_task(
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+@pytest.mark.parametrize("tries", [3, 2])
+def test_wait_for_task_backs_off(make_stubber, monkeypatch, tries):
+    polly_client = boto3.client("polly")
+    s3_resource = boto3.resource("s3")
+    polly_stubber = make_stubber(polly_client)
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    polly_wrapper = PollyWrapper(polly_client, s3_resource)
+    polly_wrapper.notifier = JobNotifier(initial_delay=0.01, max_delay=0.05)
+    task_id = "speech"
+    bucket = "test-bucket"
+    key = "test-key"
+    statuses = ["scheduled", "inProgress", "completed"]
+    got_statuses = []
+
+    def mock_download_fileobj(Fileobj, **kwargs):
+        Fileobj.write(b"test-stream")
+
+    monkeypatch.setattr(
+        s3_resource.meta.client, "download_fileobj", mock_download_fileobj
+    )
+
+    for status in statuses[:tries]:
+        polly_stubber.stub_get_speech_synthesis_task(task_id, bucket, key, status)
+    if tries == len(statuses):
+        s3_stubber.stub_delete_object(bucket, key)
+
+    def wait_callback(task_type, task_status):
+        got_statuses.append(task_status)
+
+    if tries == len(statuses):
+        got_stream = polly_wrapper._wait_for_task(
+            tries, task_id, "speech", wait_callback, s3_resource.Bucket(bucket)
+        )
+        assert got_stream.read() == b"test-stream"
+    else:
+        with pytest.raises(TimeoutError):
+            polly_wrapper._wait_for_task(
+                tries, task_id, "speech", wait_callback, s3_resource.Bucket(bucket)
+            )
+    assert got_statuses == statuses[:tries]
+
+
 @pytest.mark.parametrize("error_code", [None, "TestException"])
 def test_create_lexicon(make_stubber, error_code):
     polly_client = boto3.client("polly")
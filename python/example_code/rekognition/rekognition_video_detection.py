@@ -11,11 +11,15 @@ recognize people and objects in videos.
 import logging
 import json
 from pprint import pprint
+import sys
 import time
 import boto3
 from botocore.exceptions import ClientError
 import requests
 
+# Add relative path to include demo_tools in this code example without need for setup.
+sys.path.append("../..")
+from demo_tools.job_notifier import JobNotifier
 from rekognition_objects import (
     RekognitionFace,
     RekognitionCelebrity,
@@ -47,6 +51,7 @@ class RekognitionVideo:
         self.topic = None
         self.queue = None
         self.role = None
+        self.notifier = None
 
     @classmethod
     def from_bucket(cls, s3_object, rekognition_client):
@@ -165,6 +170,9 @@ class RekognitionVideo:
         self.role.delete()
         logger.info("Deleted role %s.", self.role.role_name)
         self.role = None
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
         self.queue.delete()
         logger.info("Deleted queue %s.", self.queue.url)
         self.queue = None
@@ -174,28 +182,17 @@ class RekognitionVideo:
 
     def poll_notification(self, job_id):
         """
-        Polls the notification queue for messages that indicate a job has completed.
+        Waits for a message in the notification queue that indicates a job has
+        completed. The queue is read by a notifier that is shared by all jobs on this
+        video, so several jobs can be waited for at the same time, and messages about
+        other jobs are kept for them.
 
         :param job_id: The ID of the job to wait for.
         :return: The completion status of the job.
         """
-        status = None
-        job_done = False
-        while not job_done:
-            messages = self.queue.receive_messages(
-                MaxNumberOfMessages=1, WaitTimeSeconds=5
-            )
-            logger.info("Polled queue for messages, got %s.", len(messages))
-            if messages:
-                body = json.loads(messages[0].body)
-                message = json.loads(body["Message"])
-                if job_id != message["JobId"]:
-                    raise RuntimeError
-                status = message["Status"]
-                logger.info("Got message %s with status %s.", message["JobId"], status)
-                messages[0].delete()
-                job_done = True
-        return status
+        if self.notifier is None:
+            self.notifier = JobNotifier(self.queue, wait_time=5)
+        return self.notifier.wait(job_id)
 
     def _start_rekognition_job(self, job_description, start_job_func):
         """
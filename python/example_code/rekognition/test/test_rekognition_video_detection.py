@@ -182,7 +182,7 @@ def test_poll_notification(make_stubber, stub_runner, error_code, stop_on_method
     message = {
         "body": json.dumps({"Message": json.dumps({"JobId": job_id, "Status": status})})
     }
-    message_count = 1
+    message_count = 10
 
     with stub_runner(error_code, stop_on_method) as runner:
         runner.add(
@@ -210,6 +210,35 @@ def test_poll_notification(make_stubber, stub_runner, error_code, stop_on_method
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+def test_poll_notification_several_jobs(make_stubber):
+    sqs_resource = boto3.resource("sqs")
+    sqs_stubber = make_stubber(sqs_resource.meta.client)
+    queue_url = "https://sqs.us-west-2.amazonaws.com/123456789012/test-queue"
+    job_ids = ["test-job-1", "test-job-2"]
+    messages = [
+        {
+            "body": json.dumps(
+                {"Message": json.dumps({"JobId": job_id, "Status": f"DONE-{job_id}"})}
+            )
+        }
+        for job_id in reversed(job_ids)
+    ]
+
+    sqs_stubber.stub_receive_messages(queue_url, messages, 10, message_attributes=None)
+    # The message about the second job is left in the queue and is deleted only
+    # when that job is waited for.
+    for index in reversed(range(len(messages))):
+        sqs_stubber.stub_delete_message(
+            queue_url, MagicMock(receipt_handle=f"Receipt-{index}")
+        )
+
+    video = RekognitionVideo(None, None, None)
+    video.queue = sqs_resource.Queue(queue_url)
+
+    assert video.poll_notification(job_ids[0]) == f"DONE-{job_ids[0]}"
+    assert video.poll_notification(job_ids[1]) == f"DONE-{job_ids[1]}"
+
+
 @pytest.mark.parametrize(
     "poll_status,error_code,stop_on_method",
     [
@@ -15,6 +15,7 @@ import json
 import logging
 import random
 from shutil import get_terminal_size
+import sys
 from sys import stdout
 import time
 from urllib import parse
@@ -26,6 +27,10 @@ from botocore.exceptions import ClientError
 
 import versioning
 
+# Add relative path to include demo_tools in this code example without need for setup.
+sys.path.append("../../..")
+from demo_tools.retries import MaxRetriesExceededError, Retrier, retry_on_error_codes
+
 logging.basicConfig(
     format="%(levelname)s:%(message)s", level=logging.INFO, stream=stdout
 )
@@ -49,7 +54,7 @@ def header():
 
 def custom_retry(callback, error_code, max_tries):
     """
-    Retries the callback function with an exponential backoff algorithm until
+    Retries the callback function with exponential backoff and jitter until
     the callback succeeds, raises a different error than the expected error,
     or exceeds the maximum number of tries.
 
@@ -57,28 +62,17 @@ def custom_retry(callback, error_code, max_tries):
     :param error_code: The expected error. When this error is raised, the callback is
                        retried. Otherwise, the error is raised.
     :param max_tries: The maximum number of times to try the callback function.
-    :return: The response from the callback function when the callback function
-             succeeds. Otherwise, None.
+    :return: The response from the callback function.
     """
-    sleepy_time = 1
-    tries = 1
-    response = None
-    while tries <= max_tries:
-        try:
-            response = callback()
-            logger.debug("Successfully ran on try %s.", tries)
-            break
-        except ClientError as error:
-            if error.response["Error"]["Code"] == error_code:
-                logger.debug("Got retryable error %s.", error_code)
-                time.sleep(sleepy_time)
-                sleepy_time = min(sleepy_time * 2, 32)
-                tries += 1
-                if tries == max_tries:
-                    logger.error("Call never succeeded after %s tries.", tries)
-                    raise
-            else:
-                raise
+    retrier = Retrier(
+        should_retry=retry_on_error_codes(error_code), max_attempts=max_tries
+    )
+    try:
+        response, stats = retrier.run_with_stats(callback)
+    except MaxRetriesExceededError as error:
+        logger.error("Call never succeeded after %s tries.", error.stats.attempts)
+        raise error.last_error
+    logger.debug("Successfully ran on try %s.", stats.attempts)
     return response
 
 
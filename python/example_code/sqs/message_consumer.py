@@ -0,0 +1,424 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Shows how to use the AWS SDK for Python (Boto3) with Amazon Simple Queue Service
+(Amazon SQS) to drain a queue at high throughput. Several long-polling receivers feed
+a bounded pool of workers, handled messages are deleted in batches, and the visibility
+timeout of messages that take a long time to handle is extended.
+"""
+
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+import message_wrapper
+import queue_wrapper
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of entries in a single SQS batch request.
+MAX_BATCH_SIZE = 10
+
+
+class MessageConsumer:
+    """
+    Receives messages from a queue and hands them to a handler function on a pool
+    of worker threads.
+
+    * Each receiver long polls the queue for up to 10 messages at a time, but only
+      as many as there is room for, so at most max_in_flight messages are received
+      and not yet handled.
+    * A message is deleted after the handler returns. Deletes from all workers are
+      sent together in DeleteMessageBatch requests.
+    * When the handler raises an exception, the message is not deleted, so it is
+      received again after its visibility timeout expires.
+    * While a message is being handled, its visibility timeout is extended before
+      it expires, so long-running handlers don't cause duplicate deliveries.
+
+    The low-level SQS client is used instead of the Queue resource because the
+    client can be shared by threads. Threads suit handlers that wait on I/O. For
+    CPU-bound handlers, run a consumer in each of several processes.
+    """
+
+    def __init__(
+        self,
+        queue,
+        handler,
+        receivers=4,
+        workers=16,
+        max_in_flight=None,
+        wait_time=20,
+        visibility_timeout=30,
+        delete_interval=1,
+        report_interval=None,
+    ):
+        """
+        :param queue: The queue to receive messages from.
+        :param handler: A function that handles one message. The message is a dict
+                        as returned by the ReceiveMessage action.
+        :param receivers: The number of threads that receive messages.
+        :param workers: The number of threads that run the handler.
+        :param max_in_flight: The maximum number of messages that are received and
+                              not yet handled. Defaults to twice the number of
+                              workers.
+        :param wait_time: The number of seconds a receive request long polls.
+        :param visibility_timeout: The visibility timeout, in seconds, of received
+                                   messages. Timeouts are extended by this amount.
+        :param delete_interval: The maximum number of seconds a handled message
+                                waits to be deleted with other messages.
+        :param report_interval: When specified, the number of seconds between
+                                progress reports in the log.
+        """
+        self.client = queue.meta.client
+        self.queue_url = queue.url
+        self.handler = handler
+        self.receivers = receivers
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        self.wait_time = wait_time
+        self.visibility_timeout = visibility_timeout
+        self.delete_interval = delete_interval
+        self.report_interval = report_interval
+        self.received_count = 0
+        self.processed_count = 0
+        self.failed_count = 0
+        self.deleted_count = 0
+        self.extended_count = 0
+        self.max_lag = 0
+        self._total_lag = 0
+        self._lock = threading.Lock()
+        self._capacity = threading.BoundedSemaphore(self.max_in_flight)
+        # The receipt handles of messages being handled, mapped to the time their
+        # visibility timeouts expire.
+        self._in_flight = {}
+        self._to_delete = []
+        self._stop = threading.Event()
+        self._handled = threading.Event()
+        self._flush = threading.Event()
+        self._executor = None
+        self._start_time = None
+        self._last_receive_time = None
+
+    def run(self, idle_timeout=None):
+        """
+        Receives and handles messages until stop is called or, when idle_timeout is
+        specified, until no messages are received for that many seconds. Messages
+        that are already received are handled and deleted before this returns.
+
+        :param idle_timeout: The number of seconds without any received messages
+                             after which the consumer stops.
+        :return: The consumer statistics.
+        """
+        self._stop.clear()
+        self._handled.clear()
+        self._start_time = self._last_receive_time = time.monotonic()
+        maintainer = threading.Thread(target=self._maintain, daemon=True)
+        receivers = [
+            threading.Thread(target=self._receive, daemon=True)
+            for _ in range(self.receivers)
+        ]
+        with ThreadPoolExecutor(max_workers=self.workers) as self._executor:
+            maintainer.start()
+            for receiver in receivers:
+                receiver.start()
+            while not self._stop.wait(0.1):
+                if idle_timeout is not None and self._is_idle(idle_timeout):
+                    logger.info("No messages for %s seconds, stopping.", idle_timeout)
+                    self._stop.set()
+            for receiver in receivers:
+                receiver.join()
+        self._handled.set()
+        maintainer.join()
+        return self.stats()
+
+    def stop(self):
+        """Stops receiving messages. Messages already received are still handled."""
+        self._stop.set()
+
+    def stats(self):
+        """
+        Gets the consumer statistics.
+
+        :return: A dict of message counts, the number of messages handled per
+                 second, and the average and maximum number of seconds between
+                 when a message was sent and when it was received.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._start_time if self._start_time else 0
+            return {
+                "received": self.received_count,
+                "processed": self.processed_count,
+                "failed": self.failed_count,
+                "deleted": self.deleted_count,
+                "extended": self.extended_count,
+                "in_flight": len(self._in_flight),
+                "elapsed": elapsed,
+                "throughput": self.processed_count / elapsed if elapsed else 0,
+                "average_lag": self._total_lag / self.received_count
+                if self.received_count
+                else 0,
+                "max_lag": self.max_lag,
+            }
+
+    def get_backlog(self):
+        """
+        Gets the approximate number of messages waiting in the queue.
+
+        :return: The approximate number of visible messages in the queue.
+        """
+        response = self.client.get_queue_attributes(
+            QueueUrl=self.queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+        )
+        return int(response["Attributes"]["ApproximateNumberOfMessages"])
+
+    def report(self):
+        """Logs the consumer statistics and the backlog of the queue."""
+        stats = self.stats()
+        try:
+            backlog = self.get_backlog()
+        except ClientError:
+            logger.exception("Couldn't get the backlog of queue %s.", self.queue_url)
+            backlog = "unknown"
+        logger.info(
+            "Queue %s: %s processed (%.1f/s), %s failed, %s in flight, backlog %s, "
+            "lag %.1fs average, %.1fs max.",
+            self.queue_url,
+            stats["processed"],
+            stats["throughput"],
+            stats["failed"],
+            stats["in_flight"],
+            backlog,
+            stats["average_lag"],
+            stats["max_lag"],
+        )
+
+    def _is_idle(self, idle_timeout):
+        with self._lock:
+            return (
+                not self._in_flight
+                and time.monotonic() - self._last_receive_time > idle_timeout
+            )
+
+    def _reserve(self):
+        """
+        Waits until there is room for at least one more message, then reserves room
+        for up to a full batch.
+
+        :return: The number of messages there is room for, or 0 when stopped.
+        """
+        while not self._capacity.acquire(timeout=0.1):
+            if self._stop.is_set():
+                return 0
+        count = 1
+        while count < MAX_BATCH_SIZE and self._capacity.acquire(blocking=False):
+            count += 1
+        return count
+
+    def _release(self, count):
+        for _ in range(count):
+            self._capacity.release()
+
+    def _receive(self):
+        """Receives messages and submits them to the workers until stopped."""
+        while not self._stop.is_set():
+            count = self._reserve()
+            if count == 0:
+                break
+            try:
+                response = self.client.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=count,
+                    WaitTimeSeconds=self.wait_time,
+                    VisibilityTimeout=self.visibility_timeout,
+                    AttributeNames=["SentTimestamp"],
+                    MessageAttributeNames=["All"],
+                )
+            except ClientError:
+                logger.exception("Couldn't receive messages from %s.", self.queue_url)
+                self._release(count)
+                self._stop.wait(1)
+                continue
+            messages = response.get("Messages", [])
+            self._release(count - len(messages))
+            if not messages:
+                continue
+            now = time.time()
+            deadline = time.monotonic() + self.visibility_timeout
+            with self._lock:
+                self._last_receive_time = time.monotonic()
+                self.received_count += len(messages)
+                for message in messages:
+                    self._in_flight[message["ReceiptHandle"]] = deadline
+                    sent = message.get("Attributes", {}).get("SentTimestamp")
+                    if sent is not None:
+                        lag = max(now - int(sent) / 1000, 0)
+                        self._total_lag += lag
+                        self.max_lag = max(self.max_lag, lag)
+            for message in messages:
+                self._executor.submit(self._handle, message)
+
+    def _handle(self, message):
+        """Runs the handler for one message and queues the message for deletion."""
+        try:
+            self.handler(message)
+            succeeded = True
+        except Exception:
+            logger.exception("Couldn't handle message %s.", message["MessageId"])
+            succeeded = False
+        with self._lock:
+            self._in_flight.pop(message["ReceiptHandle"], None)
+            if succeeded:
+                self.processed_count += 1
+                self._to_delete.append(message["ReceiptHandle"])
+                if len(self._to_delete) >= MAX_BATCH_SIZE:
+                    self._flush.set()
+            else:
+                self.failed_count += 1
+        self._capacity.release()
+
+    def _maintain(self):
+        """
+        Deletes handled messages in batches and extends the visibility timeout of
+        messages that are still being handled. Runs until all received messages are
+        handled and deleted.
+        """
+        last_report = time.monotonic()
+        while True:
+            finished = self._handled.is_set()
+            self._flush.wait(self.delete_interval)
+            self._flush.clear()
+            self._delete_handled()
+            self._extend_visibility()
+            if (
+                self.report_interval is not None
+                and time.monotonic() - last_report >= self.report_interval
+            ):
+                self.report()
+                last_report = time.monotonic()
+            if finished:
+                break
+
+    def _delete_handled(self):
+        with self._lock:
+            handles, self._to_delete = self._to_delete, []
+        for start in range(0, len(handles), MAX_BATCH_SIZE):
+            batch = handles[start : start + MAX_BATCH_SIZE]
+            try:
+                response = self.client.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {"Id": str(index), "ReceiptHandle": handle}
+                        for index, handle in enumerate(batch)
+                    ],
+                )
+            except ClientError:
+                logger.exception("Couldn't delete messages from %s.", self.queue_url)
+                continue
+            for failed in response.get("Failed", []):
+                logger.warning(
+                    "Couldn't delete message %s: %s",
+                    batch[int(failed["Id"])],
+                    failed.get("Message", failed["Code"]),
+                )
+            with self._lock:
+                self.deleted_count += len(response.get("Successful", []))
+
+    def _extend_visibility(self):
+        """
+        Extends the visibility timeout of messages that are being handled and whose
+        timeout expires within half a timeout.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expiring = [
+                handle
+                for handle, deadline in self._in_flight.items()
+                if deadline - now < self.visibility_timeout / 2
+            ]
+        for start in range(0, len(expiring), MAX_BATCH_SIZE):
+            batch = expiring[start : start + MAX_BATCH_SIZE]
+            try:
+                response = self.client.change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {
+                            "Id": str(index),
+                            "ReceiptHandle": handle,
+                            "VisibilityTimeout": self.visibility_timeout,
+                        }
+                        for index, handle in enumerate(batch)
+                    ],
+                )
+            except ClientError:
+                logger.exception("Couldn't extend visibility in %s.", self.queue_url)
+                continue
+            deadline = time.monotonic() + self.visibility_timeout
+            with self._lock:
+                for success in response.get("Successful", []):
+                    handle = batch[int(success["Id"])]
+                    if handle in self._in_flight:
+                        self._in_flight[handle] = deadline
+                        self.extended_count += 1
+
+
+def usage_demo():
+    """
+    Shows how to send the lines of this file as messages to a queue, then drain the
+    queue with a MessageConsumer that reassembles the lines.
+    """
+    print("-" * 88)
+    print("Welcome to the Amazon SQS message consumer demo!")
+    print("-" * 88)
+
+    queue = queue_wrapper.create_queue("sqs-usage-demo-message-consumer")
+
+    with open(__file__) as file:
+        lines = file.readlines()
+
+    print(f"Sending {len(lines)} file lines as messages.")
+    messages = [
+        {
+            "body": line,
+            "attributes": {"line": {"StringValue": str(index), "DataType": "Number"}},
+        }
+        for index, line in enumerate(lines)
+    ]
+    sent = message_wrapper.send_all_messages(queue, messages)
+    if sent["Failed"]:
+        print(f"{len(sent['Failed'])} messages could not be sent.")
+
+    received_lines = [None] * len(lines)
+
+    def handle(message):
+        line = int(message["MessageAttributes"]["line"]["StringValue"])
+        received_lines[line] = message["Body"]
+
+    print("Receiving, handling, and deleting messages with a pool of workers.")
+    consumer = MessageConsumer(queue, handle, receivers=2, workers=4, wait_time=2)
+    stats = consumer.run(idle_timeout=5)
+    print(
+        f"Done. Handled {stats['processed']} messages in {stats['elapsed']:.1f} "
+        f"seconds ({stats['throughput']:.1f}/s)."
+    )
+
+    if received_lines == lines:
+        print("Successfully reassembled all file lines!")
+    else:
+        print("Uh oh, some lines were missed!")
+
+    queue.delete()
+
+    print("Thanks for watching!")
+    print("-" * 88)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    usage_demo()
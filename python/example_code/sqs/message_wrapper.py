@@ -9,7 +9,10 @@ Demonstrate basic message operations in Amazon Simple Queue Service (Amazon SQS)
 
 # snippet-start:[python.example_code.sqs.message_wrapper_imports]
 import logging
+import random
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import boto3
 from botocore.exceptions import ClientError
@@ -20,6 +23,20 @@ logger = logging.getLogger(__name__)
 sqs = boto3.resource("sqs")
 # snippet-end:[python.example_code.sqs.message_wrapper_imports]
 
+# The maximum number of messages and the maximum total payload size of a single
+# SendMessageBatch request.
+MAX_BATCH_MESSAGES = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+# Error codes of a whole SendMessageBatch request that mean the request can succeed
+# if it is sent again. Errors with a 5xx HTTP status code are also sent again.
+RETRYABLE_ERROR_CODES = {
+    "InternalError",
+    "RequestThrottled",
+    "ServiceUnavailable",
+    "ThrottlingException",
+}
+
 
 # snippet-start:[python.example_code.sqs.SendMessage]
 def send_message(queue, message_body, message_attributes=None):
@@ -84,7 +101,7 @@ def send_messages(queue, messages):
             for msg_meta in response["Failed"]:
                 logger.warning(
                     "Failed to send: %s: %s",
-                    msg_meta["MessageId"],
+                    msg_meta["Code"],
                     messages[int(msg_meta["Id"])]["body"],
                 )
     except ClientError as error:
@@ -97,6 +114,167 @@ def send_messages(queue, messages):
 # snippet-end:[python.example_code.sqs.SendMessageBatch]
 
 
+def message_size(message):
+    """
+    Calculate the payload size of a message, which is the size of its body plus the
+    names, types, and values of its attributes.
+
+    :param message: A message that contains a body and attributes.
+    :return: The payload size in bytes.
+    """
+    size = len(message["body"].encode())
+    for name, attribute in message.get("attributes", {}).items():
+        size += len(name.encode()) + len(attribute["DataType"].encode())
+        if "StringValue" in attribute:
+            size += len(attribute["StringValue"].encode())
+        else:
+            size += len(attribute.get("BinaryValue", b""))
+    return size
+
+
+def pack_batches(messages):
+    """
+    Pack messages into batches that are within the count and payload size limits
+    of a SendMessageBatch request.
+
+    :param messages: An iterable of messages that contain a body and attributes.
+    :return: Yields lists of (index, message) tuples, where index is the position
+             of the message in the iterable.
+    """
+    batch = []
+    batch_bytes = 0
+    for index, message in enumerate(messages):
+        size = message_size(message)
+        if batch and (
+            len(batch) >= MAX_BATCH_MESSAGES or batch_bytes + size > MAX_BATCH_BYTES
+        ):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append((index, message))
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def is_retryable(error):
+    """
+    Decides whether a request that failed with a ClientError can be sent again,
+    because it was throttled or failed because of a service error.
+    """
+    return (
+        error.response["Error"]["Code"] in RETRYABLE_ERROR_CODES
+        or error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500
+    )
+
+
+def send_all_messages(queue, messages, max_in_flight=4, max_attempts=5, base_delay=0.1):
+    """
+    Send any number of messages to an SQS queue. Messages are packed into batches,
+    several batches are sent at the same time, and messages that fail because of a
+    service error are sent again with exponential backoff. Messages that fail
+    because of a sender error, such as a message that is too large, are not sent
+    again, and neither are batches whose whole request fails with an error that
+    isn't caused by throttling or by the service. Messages are read from the
+    iterable only as fast as batches are sent, so it can be a generator of any
+    length.
+
+    :param queue: The queue to receive the messages.
+    :param messages: An iterable of messages that contain a body and attributes.
+    :param max_in_flight: The maximum number of batches to send at the same time.
+    :param max_attempts: The number of times a message is sent before it is given
+                         up on.
+    :param base_delay: The base number of seconds to wait before a retry. The delay
+                       doubles with each attempt and is jittered.
+    :return: A dict with a list of Successful messages, which contain the Index of
+             the message and its MessageId, and a list of Failed messages, which
+             contain the Index of the message and the error Code and Message.
+    """
+    client = queue.meta.client
+
+    def send_batch(batch):
+        successful = []
+        failed = []
+        pending = dict(batch)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                response = client.send_message_batch(
+                    QueueUrl=queue.url,
+                    Entries=[
+                        {
+                            "Id": str(index),
+                            "MessageBody": msg["body"],
+                            "MessageAttributes": msg.get("attributes", {}),
+                        }
+                        for index, msg in pending.items()
+                    ],
+                )
+            except ClientError as error:
+                if attempt == max_attempts or not is_retryable(error):
+                    logger.exception(
+                        "Send messages failed to queue %s after %s attempts.",
+                        queue.url,
+                        attempt,
+                    )
+                    failed += [
+                        {"Index": index, **error.response["Error"]} for index in pending
+                    ]
+                    break
+            else:
+                for msg_meta in response.get("Successful", []):
+                    index = int(msg_meta["Id"])
+                    successful.append(
+                        {"Index": index, "MessageId": msg_meta["MessageId"]}
+                    )
+                    del pending[index]
+                for msg_meta in response.get("Failed", []):
+                    if msg_meta["SenderFault"] or attempt == max_attempts:
+                        index = int(msg_meta["Id"])
+                        logger.warning(
+                            "Failed to send: %s: %s",
+                            msg_meta["Code"],
+                            pending[index]["body"],
+                        )
+                        failed.append(
+                            {
+                                "Index": index,
+                                "Code": msg_meta["Code"],
+                                "Message": msg_meta.get("Message", ""),
+                            }
+                        )
+                        del pending[index]
+            if not pending:
+                break
+            time.sleep(random.uniform(0, base_delay * 2 ** (attempt - 1)))
+        return successful, failed
+
+    result = {"Successful": [], "Failed": []}
+
+    def add_results(futures):
+        for future in futures:
+            successful, failed = future.result()
+            result["Successful"] += successful
+            result["Failed"] += failed
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = set()
+        for batch in pack_batches(messages):
+            if len(pending) >= max_in_flight * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                add_results(done)
+            pending.add(executor.submit(send_batch, batch))
+        add_results(pending)
+    result["Successful"].sort(key=lambda msg: msg["Index"])
+    result["Failed"].sort(key=lambda msg: msg["Index"])
+    logger.info(
+        "Sent %s messages to %s, %s failed.",
+        len(result["Successful"]),
+        queue.url,
+        len(result["Failed"]),
+    )
+    return result
+
+
 # snippet-start:[python.example_code.sqs.ReceiveMessage]
 def receive_messages(queue, max_number, wait_time):
     """
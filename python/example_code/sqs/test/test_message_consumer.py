@@ -0,0 +1,147 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for message_consumer.py.
+
+The consumer calls SQS from several threads at once, so these tests use a
+thread-safe fake client instead of a stubber, which expects calls in a set order.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from message_consumer import MessageConsumer
+
+
+class FakeSqsClient:
+    def __init__(self, bodies):
+        self.lock = threading.Lock()
+        self.waiting = [
+            {
+                "MessageId": f"msg-{index}",
+                "ReceiptHandle": f"handle-{index}",
+                "Body": body,
+                "Attributes": {"SentTimestamp": str(int(time.time() * 1000) - 2000)},
+            }
+            for index, body in enumerate(bodies)
+        ]
+        self.receive_sizes = []
+        self.delete_batches = []
+        self.extended = []
+
+    def receive_message(self, **kwargs):
+        assert kwargs["MaxNumberOfMessages"] <= 10
+        with self.lock:
+            count = kwargs["MaxNumberOfMessages"]
+            messages, self.waiting = self.waiting[:count], self.waiting[count:]
+            self.receive_sizes.append(len(messages))
+        if not messages:
+            time.sleep(0.01)
+        return {"Messages": messages}
+
+    def delete_message_batch(self, **kwargs):
+        assert len(kwargs["Entries"]) <= 10
+        with self.lock:
+            self.delete_batches.append(
+                [entry["ReceiptHandle"] for entry in kwargs["Entries"]]
+            )
+        return {"Successful": [{"Id": entry["Id"]} for entry in kwargs["Entries"]]}
+
+    def change_message_visibility_batch(self, **kwargs):
+        with self.lock:
+            self.extended += [entry["ReceiptHandle"] for entry in kwargs["Entries"]]
+        return {"Successful": [{"Id": entry["Id"]} for entry in kwargs["Entries"]]}
+
+    def get_queue_attributes(self, **kwargs):
+        with self.lock:
+            return {
+                "Attributes": {"ApproximateNumberOfMessages": str(len(self.waiting))}
+            }
+
+
+def make_queue(client):
+    return SimpleNamespace(meta=SimpleNamespace(client=client), url="test-url")
+
+
+@pytest.mark.parametrize("receivers,workers", [(1, 1), (3, 8)])
+def test_run_drains_queue(receivers, workers):
+    client = FakeSqsClient([f"body-{index}" for index in range(95)])
+    handled = []
+    lock = threading.Lock()
+
+    def handler(message):
+        with lock:
+            handled.append(message["Body"])
+
+    consumer = MessageConsumer(
+        make_queue(client),
+        handler,
+        receivers=receivers,
+        workers=workers,
+        delete_interval=0.05,
+    )
+    stats = consumer.run(idle_timeout=0.3)
+
+    assert sorted(handled) == sorted(f"body-{index}" for index in range(95))
+    assert stats["processed"] == stats["deleted"] == 95
+    assert stats["failed"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_lag"] >= 2
+    assert sum(len(batch) for batch in client.delete_batches) == 95
+    assert consumer.get_backlog() == 0
+
+
+def test_run_bounds_messages_in_flight():
+    client = FakeSqsClient([f"body-{index}" for index in range(30)])
+    release = threading.Event()
+
+    def handler(message):
+        release.wait()
+
+    consumer = MessageConsumer(
+        make_queue(client), handler, receivers=2, workers=2, max_in_flight=4
+    )
+    runner = threading.Thread(target=consumer.run, kwargs={"idle_timeout": 0.2})
+    runner.start()
+    time.sleep(0.3)
+    assert consumer.stats()["received"] == 4
+    release.set()
+    runner.join()
+
+    assert consumer.processed_count == 30
+
+
+def test_run_keeps_failed_messages():
+    client = FakeSqsClient(["good", "bad", "good"])
+
+    def handler(message):
+        if message["Body"] == "bad":
+            raise ValueError("Test error")
+
+    consumer = MessageConsumer(make_queue(client), handler, delete_interval=0.05)
+    stats = consumer.run(idle_timeout=0.2)
+
+    assert stats["processed"] == 2
+    assert stats["failed"] == 1
+    deleted = [handle for batch in client.delete_batches for handle in batch]
+    assert sorted(deleted) == ["handle-0", "handle-2"]
+
+
+def test_run_extends_visibility_of_slow_messages():
+    client = FakeSqsClient(["slow"])
+
+    def handler(message):
+        time.sleep(0.5)
+
+    consumer = MessageConsumer(
+        make_queue(client), handler, visibility_timeout=0.2, delete_interval=0.05
+    )
+    stats = consumer.run(idle_timeout=0.1)
+
+    assert stats["processed"] == 1
+    assert stats["extended"] >= 1
+    assert set(client.extended) == {"handle-0"}
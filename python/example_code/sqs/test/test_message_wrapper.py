@@ -117,6 +117,163 @@ def test_send_messages_wrong_size(make_stubber, make_queue, count):
         )
 
 
+def test_pack_batches():
+    """Test that messages are packed by count and by payload size."""
+    small = {"body": "x" * 100, "attributes": {}}
+    large = {
+        "body": "x" * 100 * 1024,
+        "attributes": {"size": {"StringValue": "large", "DataType": "String"}},
+    }
+    messages = [small] * 25 + [large] * 3
+
+    batches = list(message_wrapper.pack_batches(messages))
+
+    assert [len(batch) for batch in batches] == [10, 10, 7, 1]
+    assert [index for batch in batches for index, _ in batch] == list(range(28))
+    for batch in batches:
+        assert (
+            sum(message_wrapper.message_size(msg) for _, msg in batch)
+            <= message_wrapper.MAX_BATCH_BYTES
+        )
+
+
+@pytest.mark.parametrize("count", [0, 1, 25])
+def test_send_all_messages(make_stubber, make_queue, count):
+    """Test that any number of messages is sent in batches of ten."""
+    sqs_stubber = make_stubber(message_wrapper.sqs.meta.client)
+    queue = make_queue(sqs_stubber, message_wrapper.sqs)
+
+    messages = [{"body": f"Message {ind}", "attributes": {}} for ind in range(0, count)]
+
+    for start in range(0, count, 10):
+        sqs_stubber.stub_send_message_batch(
+            queue.url,
+            messages[start : start + 10],
+            indexes=range(start, min(start + 10, count)),
+        )
+
+    result = message_wrapper.send_all_messages(queue, iter(messages), max_in_flight=1)
+    assert sorted(msg["Index"] for msg in result["Successful"]) == list(range(count))
+    assert result["Failed"] == []
+
+
+def test_send_all_messages_retries_failed(make_stubber, make_queue):
+    """Test that only messages that fail because of a service error are resent,
+    and that messages that fail because of a sender error are not."""
+    sqs_stubber = make_stubber(message_wrapper.sqs.meta.client)
+    queue = make_queue(sqs_stubber, message_wrapper.sqs)
+
+    messages = [{"body": f"Message {ind}", "attributes": {}} for ind in range(0, 5)]
+
+    sqs_stubber.stub_send_message_batch(
+        queue.url,
+        messages,
+        failed={
+            1: ("InternalError", False),
+            3: ("InvalidMessageContents", True),
+            4: ("InternalError", False),
+        },
+    )
+    sqs_stubber.stub_send_message_batch(
+        queue.url, [messages[1], messages[4]], indexes=[1, 4]
+    )
+
+    result = message_wrapper.send_all_messages(
+        queue, messages, max_in_flight=1, max_attempts=3, base_delay=0
+    )
+    assert sorted(msg["Index"] for msg in result["Successful"]) == [0, 1, 2, 4]
+    assert result["Failed"] == [
+        {"Index": 3, "Code": "InvalidMessageContents", "Message": "Test error"}
+    ]
+
+
+def test_send_all_messages_gives_up(make_stubber, make_queue):
+    """Test that messages are reported as failed after the last attempt."""
+    sqs_stubber = make_stubber(message_wrapper.sqs.meta.client)
+    queue = make_queue(sqs_stubber, message_wrapper.sqs)
+
+    messages = [{"body": f"Message {ind}", "attributes": {}} for ind in range(0, 3)]
+
+    sqs_stubber.stub_send_message_batch(
+        queue.url, messages, failed={2: ("InternalError", False)}
+    )
+    sqs_stubber.stub_send_message_batch(
+        queue.url, messages[2:], error_code="ServiceUnavailable", indexes=[2]
+    )
+
+    result = message_wrapper.send_all_messages(
+        queue, messages, max_in_flight=1, max_attempts=2, base_delay=0
+    )
+    assert sorted(msg["Index"] for msg in result["Successful"]) == [0, 1]
+    assert [(msg["Index"], msg["Code"]) for msg in result["Failed"]] == [
+        (2, "ServiceUnavailable")
+    ]
+
+
+def test_send_all_messages_does_not_retry_client_faults(make_stubber, make_queue):
+    """Test that a request that fails with an error that isn't caused by throttling
+    or by the service is not sent again."""
+    sqs_stubber = make_stubber(message_wrapper.sqs.meta.client)
+    queue = make_queue(sqs_stubber, message_wrapper.sqs)
+
+    messages = [{"body": f"Message {ind}", "attributes": {}} for ind in range(0, 3)]
+
+    sqs_stubber.stub_send_message_batch(queue.url, messages, error_code="AccessDenied")
+
+    result = message_wrapper.send_all_messages(
+        queue, messages, max_in_flight=1, max_attempts=3, base_delay=0
+    )
+    assert result["Successful"] == []
+    assert [(msg["Index"], msg["Code"]) for msg in result["Failed"]] == [
+        (0, "AccessDenied"),
+        (1, "AccessDenied"),
+        (2, "AccessDenied"),
+    ]
+
+
+def test_send_all_messages_reads_messages_as_sent(
+    make_stubber, make_queue, monkeypatch
+):
+    """Test that messages are read from the iterable only a few batches ahead of
+    the batches that are sent."""
+    client = message_wrapper.sqs.meta.client
+    sqs_stubber = make_stubber(client)
+    queue = make_queue(sqs_stubber, message_wrapper.sqs)
+
+    count = 100
+    messages = [{"body": f"Message {ind}", "attributes": {}} for ind in range(0, count)]
+    for start in range(0, count, 10):
+        sqs_stubber.stub_send_message_batch(
+            queue.url,
+            messages[start : start + 10],
+            indexes=range(start, start + 10),
+        )
+
+    read = []
+    read_at_send = []
+
+    def read_messages():
+        for message in messages:
+            read.append(message)
+            yield message
+
+    send_message_batch = client.send_message_batch
+
+    def counting_send_message_batch(**kwargs):
+        read_at_send.append(len(read))
+        return send_message_batch(**kwargs)
+
+    monkeypatch.setattr(client, "send_message_batch", counting_send_message_batch)
+
+    result = message_wrapper.send_all_messages(queue, read_messages(), max_in_flight=1)
+    assert [msg["Index"] for msg in result["Successful"]] == list(range(count))
+    # One batch is sent, two wait in the window, and one is being packed.
+    assert all(
+        read_count <= (sent + 3) * 10 + 1
+        for sent, read_count in enumerate(read_at_send)
+    )
+
+
 @pytest.mark.parametrize(
     "send_count,receive_count,wait_time", [(5, 3, 5), (2, 10, 0), (1, 1, 1), (0, 5, 0)]
 )
@@ -0,0 +1,76 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares how long a new Python process takes to get a stubber class when every
+stubber module is imported up front, the way stubber_factory.py used to, and when
+only the stubber module of the requested service is imported on first use.
+
+Each measurement starts a fresh interpreter, so it includes the same startup cost
+that every PyTest session pays before its first test runs.
+
+Run it from the `python` folder of the repo with, for example:
+
+    python -m test_tools.benchmark_stubber_factory --service sqs --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+EAGER_CODE = """
+import importlib
+from test_tools.stubber_factory import STUBBERS
+classes = {{
+    name: getattr(importlib.import_module(f"test_tools.{{module}}"), cls)
+    for name, (module, cls) in STUBBERS.items()
+}}
+classes[{service!r}]
+"""
+
+LAZY_CODE = """
+from test_tools.stubber_factory import stubber_factory
+stubber_factory({service!r})
+"""
+
+
+def time_process(code, cwd):
+    """
+    Runs code in a new Python process.
+
+    :return: The number of seconds the process ran.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--service", default="sqs", help="The Boto 3 name of the service to stub."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="The number of processes to time."
+    )
+    args = parser.parse_args()
+
+    python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    baseline = statistics.median(
+        time_process("pass", python_dir) for _ in range(args.repeat)
+    )
+    print(f"Empty interpreter: {baseline * 1000:.0f} ms (median of {args.repeat}).")
+    print(f"{'Loading':<8}{'Median ms':>11}{'Minus empty':>13}")
+    for name, code in (("Eager", EAGER_CODE), ("Lazy", LAZY_CODE)):
+        code = code.format(service=args.service)
+        median = statistics.median(
+            time_process(code, python_dir) for _ in range(args.repeat)
+        )
+        print(f"{name:<8}{median * 1000:>11.0f}{(median - baseline) * 1000:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Records the requests that Boto 3 clients send to AWS and the responses they get
+back to a cassette file, and replays them later through the botocore Stubber, so
+that a scenario can run again offline, quickly, and with the same results.
+
+A cassette is recorded once against AWS:
+
+    with cassette.recording("cassettes/sqs_scenario.json.gz"):
+        run_scenario()
+
+and then replayed without network access, optionally with simulated latency:
+
+    with cassette.replaying("cassettes/sqs_scenario.json.gz", latency=0.05):
+        run_scenario()
+
+A scenario script can also be recorded or replayed from the `python` folder:
+
+    python -m test_tools.cassette record run.json.gz path/to/scenario.py
+    python -m test_tools.cassette replay run.json.gz path/to/scenario.py
+
+Both context managers hook the events of a Boto 3 session, so they apply to every
+client that is created from that session while they are active. By default this
+is the default session that `boto3.client` and `boto3.resource` use.
+"""
+
+import argparse
+import base64
+import contextlib
+import datetime
+import gzip
+import io
+import json
+import logging
+import os
+import runpy
+import sys
+import time
+from collections import defaultdict
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import ANY
+
+from test_tools.example_stubber import ExampleStubber
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+_CASSETTE_EVENT_ID = "test_tools-cassette"
+_PARAMS_CONTEXT_KEY = "test_tools_cassette_params"
+
+
+def encode(value):
+    """
+    Converts request parameters or a parsed response to plain JSON values. Dates and
+    bytes are tagged so they can be decoded to the same types. Values that can't be
+    saved, such as file objects, are saved as placeholders that match any value.
+    """
+    if isinstance(value, dict):
+        return {key: encode(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(val) for val in value]
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return {"__any__": type(value).__name__}
+
+
+def decode(value):
+    """Converts values that were encoded by `encode` back to their original types."""
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.datetime.fromisoformat(value["__datetime__"])
+        if "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        if "__any__" in value:
+            return ANY
+        return {key: decode(val) for key, val in value.items()}
+    if isinstance(value, list):
+        return [decode(val) for val in value]
+    return value
+
+
+class Cassette:
+    """
+    The requests that clients sent and the responses they received, in the order
+    that they were sent.
+    """
+
+    def __init__(self, interactions=None):
+        """
+        :param interactions: A list of dicts with the service and operation names,
+                             the encoded request parameters, the HTTP status code,
+                             and either the encoded response or the error.
+        """
+        self.interactions = [] if interactions is None else interactions
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a cassette from a JSON file. When the file name ends with .gz, the
+        file is decompressed.
+        """
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as cassette_file:
+            saved = json.load(cassette_file)
+        if saved.get("version") != CASSETTE_VERSION:
+            raise ValueError(
+                f"Cassette {path} has version {saved.get('version')}, but only "
+                f"version {CASSETTE_VERSION} can be replayed."
+            )
+        return cls(saved["interactions"])
+
+    def save(self, path):
+        """
+        Saves the cassette as compact JSON. When the file name ends with .gz, the
+        file is compressed.
+        """
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as cassette_file:
+            json.dump(
+                {"version": CASSETTE_VERSION, "interactions": self.interactions},
+                cassette_file,
+                separators=(",", ":"),
+            )
+        logger.info("Saved %s interactions to %s.", len(self.interactions), path)
+
+    def record(self, events):
+        """
+        Starts recording the calls made by a client or by all clients that are
+        created from a session.
+
+        :param events: The event system of a client (`client.meta.events`) or of a
+                       Boto 3 session (`session.events`).
+        """
+        events.register_first(
+            "before-parameter-build.*.*",
+            self._save_params,
+            unique_id=f"{_CASSETTE_EVENT_ID}-params",
+        )
+        events.register(
+            "after-call.*.*",
+            self._save_interaction,
+            unique_id=f"{_CASSETTE_EVENT_ID}-call",
+        )
+
+    def stop_recording(self, events):
+        events.unregister(
+            "before-parameter-build.*.*", unique_id=f"{_CASSETTE_EVENT_ID}-params"
+        )
+        events.unregister("after-call.*.*", unique_id=f"{_CASSETTE_EVENT_ID}-call")
+
+    def _save_params(self, params, context, **kwargs):
+        # Parameters are encoded before other handlers can change them, such as
+        # the handlers that add idempotency tokens, so that they match what the
+        # Stubber compares when they are replayed.
+        if not context.get("is_presign_request"):
+            context[_PARAMS_CONTEXT_KEY] = encode(params)
+
+    def _save_interaction(self, http_response, parsed, model, context, **kwargs):
+        if _PARAMS_CONTEXT_KEY not in context:
+            return
+        interaction = {
+            "service": model.service_model.service_name,
+            "operation": model.name,
+            "params": context.pop(_PARAMS_CONTEXT_KEY),
+            "status": http_response.status_code,
+        }
+        if http_response.status_code >= 300:
+            interaction["error"] = parsed.get("Error", {})
+        else:
+            response = {
+                key: val for key, val in parsed.items() if key != "ResponseMetadata"
+            }
+            for key, val in response.items():
+                # A streaming body can be read only once, so it is read here and
+                # replaced in the response with a copy that the caller can read.
+                if isinstance(val, StreamingBody):
+                    data = val.read()
+                    parsed[key] = StreamingBody(io.BytesIO(data), len(data))
+                    response[key] = data
+            interaction["response"] = encode(response)
+        self.interactions.append(interaction)
+
+    def add_to_stubber(self, stubber, match_params=True):
+        """
+        Adds the recorded responses of the stubber's service to its queue, in the
+        order they were recorded.
+
+        :param stubber: An ExampleStubber that uses stubs.
+        :param match_params: When True, the Stubber verifies that each request has
+                             the same parameters as the recorded request. Turn this
+                             off for scenarios that generate names or other values
+                             that differ on each run.
+        :return: The number of responses that were added.
+        """
+        service = stubber.client.meta.service_model.service_name
+        api_to_method = {
+            api: method
+            for method, api in stubber.client.meta.method_to_api_mapping.items()
+        }
+        count = 0
+        for interaction in self.interactions:
+            if interaction["service"] != service:
+                continue
+            method = api_to_method[interaction["operation"]]
+            expected_params = decode(interaction["params"]) if match_params else None
+            if "error" in interaction:
+                stubber.add_client_error(
+                    method,
+                    service_error_code=interaction["error"].get("Code", ""),
+                    service_message=interaction["error"].get("Message", ""),
+                    http_status_code=interaction["status"],
+                    expected_params=expected_params,
+                )
+            else:
+                response = decode(interaction["response"])
+                output_shape = stubber.client.meta.service_model.operation_model(
+                    interaction["operation"]
+                ).output_shape
+                payload = output_shape and output_shape.serialization.get("payload")
+                if payload and isinstance(response.get(payload), bytes):
+                    data = response[payload]
+                    response[payload] = StreamingBody(io.BytesIO(data), len(data))
+                stubber.add_response(method, response, expected_params)
+            count += 1
+        return count
+
+
+def _default_session(session):
+    return session if session is not None else boto3._get_default_session()
+
+
+@contextlib.contextmanager
+def recording(path, session=None):
+    """
+    Records the calls made by every client that is created from a session while
+    the context is active, and saves them to a cassette file when it exits.
+
+    :param path: The cassette file to save.
+    :param session: The Boto 3 session. Defaults to the default session.
+    :return: The cassette that is being recorded.
+    """
+    session = _default_session(session)
+    cassette = Cassette()
+    cassette.record(session.events)
+    try:
+        yield cassette
+    finally:
+        cassette.stop_recording(session.events)
+        cassette.save(path)
+
+
+@contextlib.contextmanager
+def replaying(path, session=None, latency=0, match_params=True):
+    """
+    Replays a cassette to every client that is created from a session while the
+    context is active. Each client is stubbed by an ExampleStubber, and clients of
+    the same service take their responses from one queue, so calls can be spread
+    across several clients just as they were when the cassette was recorded.
+
+    When the context exits without an error, it verifies that every recorded
+    response was used.
+
+    :param path: The cassette file to replay, or a Cassette.
+    :param session: The Boto 3 session. Defaults to the default session.
+    :param latency: The number of seconds each stubbed call waits before it
+                    returns, to simulate the time a request takes.
+    :param match_params: When True, requests must have the recorded parameters.
+    :return: The stubbers that were created, keyed by service name.
+    """
+    session = _default_session(session)
+    cassette = path if isinstance(path, Cassette) else Cassette.load(path)
+    stubbers = defaultdict(list)
+
+    def stub_client(client):
+        stubber = ExampleStubber(client)
+        stubber.latency = latency
+        service = client.meta.service_model.service_name
+        if stubbers[service]:
+            stubber.share_queue(stubbers[service][0])
+        else:
+            cassette.add_to_stubber(stubber, match_params)
+        stubbers[service].append(stubber)
+        stubber.activate()
+
+    class ReplayingClient:
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            stub_client(self)
+
+    def add_replay_base(base_classes, **kwargs):
+        base_classes.insert(0, ReplayingClient)
+
+    session.events.register(
+        "creating-client-class", add_replay_base, unique_id=_CASSETTE_EVENT_ID
+    )
+    try:
+        yield stubbers
+        for service_stubbers in stubbers.values():
+            service_stubbers[0].assert_no_pending_responses()
+    finally:
+        session.events.unregister("creating-client-class", unique_id=_CASSETTE_EVENT_ID)
+        for service_stubbers in stubbers.values():
+            for stubber in service_stubbers:
+                stubber.deactivate()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs a scenario script while recording its AWS calls to a "
+        "cassette, or while replaying a cassette to it, and reports how long it ran."
+    )
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("cassette", help="The cassette file, such as run.json.gz.")
+    parser.add_argument("script", help="The scenario script to run.")
+    parser.add_argument(
+        "script_args", nargs=argparse.REMAINDER, help="Arguments for the script."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0,
+        help="When replaying, the number of seconds each call waits.",
+    )
+    parser.add_argument(
+        "--no-match-params",
+        action="store_true",
+        help="When replaying, don't verify that requests have the recorded "
+        "parameters.",
+    )
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        context = recording(args.cassette)
+    else:
+        context = replaying(
+            args.cassette, latency=args.latency, match_params=not args.no_match_params
+        )
+    sys.argv = [args.script, *args.script_args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    start = time.perf_counter()
+    with context:
+        runpy.run_path(args.script, run_name="__main__")
+    elapsed = time.perf_counter() - start
+    print(f"Ran {args.script} in {args.mode} mode in {elapsed:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,3 +31,32 @@ class CloudWatchLogsStubber(ExampleStubber):
                           pass requests through to AWS.
         """
         super().__init__(client, use_stubs)
+
+    def stub_start_query(
+        self,
+        log_group,
+        start_time,
+        end_time,
+        query_string,
+        limit,
+        query_id,
+        error_code=None,
+    ):
+        expected_params = {
+            "logGroupName": log_group,
+            "startTime": start_time,
+            "endTime": end_time,
+            "queryString": query_string,
+            "limit": limit,
+        }
+        response = {"queryId": query_id}
+        self._stub_bifurcator(
+            "start_query", expected_params, response, error_code=error_code
+        )
+
+    def stub_get_query_results(self, query_id, status, results, error_code=None):
+        expected_params = {"queryId": query_id}
+        response = {"status": status, "results": results}
+        self._stub_bifurcator(
+            "get_query_results", expected_params, response, error_code=error_code
+        )
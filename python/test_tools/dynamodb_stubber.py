@@ -211,6 +211,8 @@ class DynamoStubber(ExampleStubber):
         expression_attrs=None,
         start_key=None,
         last_key=None,
+        segment=None,
+        total_segments=None,
         error_code=None,
     ):
         expected_params = {"TableName": table_name}
@@ -224,6 +226,9 @@ class DynamoStubber(ExampleStubber):
             expected_params["ExpressionAttributeNames"] = expression_attrs
         if start_key:
             expected_params["ExclusiveStartKey"] = start_key
+        if total_segments is not None:
+            expected_params["Segment"] = segment
+            expected_params["TotalSegments"] = total_segments
         response = {
             "Items": [self._build_out_item(output_item) for output_item in output_items]
         }
@@ -239,9 +244,12 @@ class DynamoStubber(ExampleStubber):
         projection=None,
         expression_attrs=None,
         expression_attr_vals=None,
+        index_name=None,
         error_code=None,
     ):
         expected_params = {"TableName": table_name}
+        if index_name is not None:
+            expected_params["IndexName"] = index_name
         if key_condition is not None:
             expected_params["KeyConditionExpression"] = key_condition
         if projection is not None:
@@ -6,6 +6,8 @@ A base class for stubbers that are used by the Python code example unit tests.
 """
 
 import contextlib
+import time
+
 from botocore.stub import Stubber
 
 
@@ -28,6 +30,9 @@ class ExampleStubber(Stubber):
         """
         self.use_stubs = use_stubs
         self.region_name = client.meta.region_name
+        # The number of seconds each stubbed call waits before it returns, to
+        # simulate the time a request takes when responses are replayed.
+        self.latency = 0
         if self.use_stubs:
             super().__init__(client)
         else:
@@ -61,6 +66,19 @@ class ExampleStubber(Stubber):
                 response_meta,
             )
 
+    def share_queue(self, other):
+        """
+        When using stubs, take responses from the queue of another stubber of the
+        same service, so that calls from several clients are answered in order.
+        """
+        if self.use_stubs:
+            self._queue = other._queue
+
+    def _get_response_handler(self, model, params, context, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return super()._get_response_handler(model, params, context, **kwargs)
+
     def assert_no_pending_responses(self):
         """When using stubs, verify no more responses are waiting in the queue."""
         if self.use_stubs:
@@ -72,43 +72,73 @@ class KinesisStubber(ExampleStubber):
             "put_record", expected_params, response, error_code=error_code
         )
 
-    def stub_put_records(self, stream, batch, partition_key, error_code=None):
+    def stub_put_records(
+        self, stream, batch, partition_keys, failed_indexes=(), error_code=None
+    ):
         expected_params = {
             "StreamName": stream,
             "Records": [
                 {"Data": json.dumps(record), "PartitionKey": partition_key}
-                for record in batch
+                for record, partition_key in zip(batch, partition_keys)
             ],
         }
         response = {
-            "Records": [{"ShardId": "test-id", "SequenceNumber": "test-number"}]
+            "Records": [
+                {
+                    "ErrorCode": "ProvisionedThroughputExceededException",
+                    "ErrorMessage": "Rate exceeded for shard.",
+                }
+                if index in failed_indexes
+                else {"ShardId": "test-id", "SequenceNumber": "test-number"}
+                for index in range(len(batch))
+            ],
         }
+        if failed_indexes:
+            response["FailedRecordCount"] = len(failed_indexes)
         self._stub_bifurcator(
             "put_records", expected_params, response, error_code=error_code
         )
 
+    def stub_list_shards(self, stream_name, shards, error_code=None):
+        expected_params = {"StreamName": stream_name}
+        response = {"Shards": shards}
+        self._stub_bifurcator(
+            "list_shards", expected_params, response, error_code=error_code
+        )
+
     def stub_get_shard_iterator(
-        self, stream_name, shard_id, shard_iter, error_code=None
+        self,
+        stream_name,
+        shard_id,
+        shard_iter,
+        iterator_type="LATEST",
+        sequence_number=None,
+        error_code=None,
     ):
         expected_params = {
             "StreamName": stream_name,
             "ShardId": shard_id,
-            "ShardIteratorType": "LATEST",
+            "ShardIteratorType": iterator_type,
         }
+        if sequence_number is not None:
+            expected_params["StartingSequenceNumber"] = sequence_number
         response = {"ShardIterator": shard_iter}
         self._stub_bifurcator(
             "get_shard_iterator", expected_params, response, error_code=error_code
         )
 
-    def stub_get_records(self, shard_iter, limit, records, error_code=None):
+    def stub_get_records(
+        self, shard_iter, limit, records, closed=False, error_code=None
+    ):
         expected_params = {"ShardIterator": shard_iter, "Limit": limit}
         response = {
-            "NextShardIterator": shard_iter,
             "Records": [
                 {"Data": record, "SequenceNumber": "1", "PartitionKey": "partition_key"}
                 for record in records
             ],
         }
+        if not closed:
+            response["NextShardIterator"] = shard_iter
         self._stub_bifurcator(
             "get_records", expected_params, response, error_code=error_code
         )
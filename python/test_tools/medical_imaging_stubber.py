@@ -182,17 +182,24 @@ class MedicalImagingStubber(ExampleStubber):
             "get_image_set", expected_params, response, error_code=error_code
         )
 
-    def stub_get_image_set_metadata(self, datastore_id, image_set_id, error_code=None):
+    def stub_get_image_set_metadata(
+        self, datastore_id, image_set_id, metadata=None, error_code=None
+    ):
         expected_params = {"datastoreId": datastore_id, "imageSetId": image_set_id}
 
-        data_string = b'"{data: akdelfaldkflakdflkajs}"'
+        if metadata is None:
+            data_string = b'"{data: akdelfaldkflakdflkajs}"'
+        else:
+            data_string = json.dumps(metadata).encode()
 
         gzip_stream = io.BytesIO()
         with gzip.open(gzip_stream, "wb") as f:
             f.write(data_string)
         gzip_stream.seek(0)
 
-        stream = botocore.response.StreamingBody(gzip_stream, 49)
+        stream = botocore.response.StreamingBody(
+            gzip_stream, len(gzip_stream.getvalue())
+        )
 
         response = {
             "contentType": " text/plain",
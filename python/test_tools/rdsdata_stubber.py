@@ -6,6 +6,8 @@ Stub functions that are used by the Amazon RDS Data Service unit tests.
 """
 
 import datetime
+import json
+
 from test_tools.example_stubber import ExampleStubber
 
 VALUE_KEYS = {
@@ -52,6 +54,7 @@ class RdsDataStubber(ExampleStubber):
         generated_fields=None,
         error_code=None,
         error_message="",
+        formatted_records=None,
     ):
         expected_params = {
             "database": database,
@@ -63,11 +66,15 @@ class RdsDataStubber(ExampleStubber):
             expected_params["parameters"] = sql_params
         if transaction_id is not None:
             expected_params["transactionId"] = transaction_id
+        if formatted_records is not None:
+            expected_params["formatRecordsAs"] = "JSON"
         response = {}
         if records is not None:
             response["records"] = [
                 [{VALUE_KEYS[type(val)]: val} for val in record] for record in records
             ]
+        if formatted_records is not None:
+            response["formattedRecords"] = json.dumps(formatted_records)
         if generated_fields is not None:
             response["generatedFields"] = [
                 {VALUE_KEYS[type(field)]: field} for field in generated_fields
@@ -88,6 +95,7 @@ class RdsDataStubber(ExampleStubber):
         sql,
         sql_param_sets=None,
         generated_field_sets=None,
+        transaction_id=None,
         error_code=None,
     ):
         expected_params = {
@@ -98,6 +106,8 @@ class RdsDataStubber(ExampleStubber):
         }
         if sql_param_sets is not None:
             expected_params["parameterSets"] = sql_param_sets
+        if transaction_id is not None:
+            expected_params["transactionId"] = transaction_id
         response = {}
         if generated_field_sets is not None:
             response["updateResults"] = [
@@ -3,18 +3,28 @@
 
 """
 Finds all modules in the Python folder that have unit tests and runs them all
-sequentially as separate PyTest sessions.
+as separate PyTest sessions, several at a time.
 
 This script must be run from the root of the GitHub repo.
 
     py -m python.test_tools.run_all_tests
+
+Each session runs in its own process, with the module folder as its working
+directory, so sessions don't share state. The output of each session is printed
+when it finishes, followed by a table of the slowest folders and a summary of
+the results. When any session fails, the script exits with a non-zero code.
 """
 
 import argparse
+import json
 import os
-import platform
+import subprocess
 import sys
-import pytest
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 
 IGNORE_FOLDERS = {
     "venv",
@@ -24,37 +34,251 @@ IGNORE_FOLDERS = {
     "node_modules",
 }
 
+# The PyTest exit code when a session collects no tests, such as a folder that has
+# only integration tests when integration tests are not run.
+NO_TESTS_COLLECTED = 5
+
+FOLDER_CACHE = os.path.join(".pytest_cache", "run_all_tests_folders.json")
+
+
+@dataclass
+class FolderRun:
+    """The result of running the tests in one folder."""
+
+    folder: str
+    exit_code: int
+    seconds: float
+    output: str
+    junit_path: str
+
+    @property
+    def failed(self):
+        return self.exit_code not in (0, NO_TESTS_COLLECTED)
+
+
+def find_test_dirs(root):
+    """
+    Finds the subfolders of a folder that contain a `test` folder.
+
+    :param root: The folder to search.
+    :return: The list of test folders and a dict of the modification time of every
+             folder that was searched.
+    """
+    test_dirs = []
+    dir_mtimes = {}
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in IGNORE_FOLDERS]
+        dir_mtimes[folder] = os.stat(folder).st_mtime_ns
+        if "test" in dirs:
+            test_dirs.append(folder)
+    return test_dirs, dir_mtimes
+
+
+def load_test_dirs(root, cache_path):
+    """
+    Gets the test folders from the cache when no folder in the tree has changed
+    since they were found, and otherwise finds them again and updates the cache.
+
+    Adding or removing a file or folder changes the modification time of the
+    folder that contains it, so checking the time of each folder is enough to
+    know that no `test` folder was added or removed, and is faster than listing
+    every folder again.
+
+    :param root: The folder to search.
+    :param cache_path: The file the test folders are cached in. When this is None,
+                       the folders are always searched.
+    :return: The list of test folders.
+    """
+    if cache_path is not None:
+        try:
+            with open(cache_path) as cache_file:
+                cached = json.load(cache_file)
+            if cached["root"] == root and all(
+                os.stat(folder).st_mtime_ns == mtime
+                for folder, mtime in cached["dir_mtimes"].items()
+            ):
+                return cached["test_dirs"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    test_dirs, dir_mtimes = find_test_dirs(root)
+    if cache_path is not None:
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            with open(cache_path, "w") as cache_file:
+                json.dump(
+                    {"root": root, "test_dirs": test_dirs, "dir_mtimes": dir_mtimes},
+                    cache_file,
+                )
+        except OSError as err:
+            print(f"Couldn't cache the test folders in {cache_path}: {err}")
+    return test_dirs
+
+
+def run_test_dir(test_path, test_kind, junit_path, timeout=None):
+    """
+    Runs the tests in one folder as a PyTest session in a separate process.
+
+    :param test_path: The folder that contains the `test` folder.
+    :param test_kind: The PyTest marker expression that selects the tests to run.
+    :param junit_path: The file where PyTest writes a JUnit XML report.
+    :param timeout: The maximum number of seconds the session can run.
+    :return: The result of the run.
+    """
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pytest",
+                "-m",
+                test_kind,
+                f"--junitxml={junit_path}",
+            ],
+            cwd=test_path,
+            env=os.environ.copy(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+        exit_code, output = process.returncode, process.stdout
+    except subprocess.TimeoutExpired as err:
+        output = err.stdout or ""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        exit_code, output = -1, output + f"\nTimed out after {timeout} seconds.\n"
+    return FolderRun(
+        test_path, exit_code, time.perf_counter() - start, output, junit_path
+    )
+
+
+def merge_junit(runs, junit_path):
+    """
+    Merges the JUnit XML reports of all folders into one report, with a test suite
+    named for each folder.
+
+    :param runs: The results of the folder runs.
+    :param junit_path: The file to write the merged report to.
+    :return: The total counts of tests, failures, errors, and skipped tests.
+    """
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    merged = ET.Element("testsuites")
+    for run in runs:
+        try:
+            report = ET.parse(run.junit_path).getroot()
+        except (OSError, ET.ParseError):
+            continue
+        suites = [report] if report.tag == "testsuite" else report.iter("testsuite")
+        for suite in suites:
+            suite.set("name", run.folder)
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            merged.append(suite)
+    for key, count in totals.items():
+        merged.set(key, str(count))
+    if junit_path is not None:
+        ET.ElementTree(merged).write(junit_path, encoding="utf-8", xml_declaration=True)
+    return totals
+
+
+def print_summary(runs, totals, slowest, wall_seconds):
+    """Prints a table of the slowest folders and a summary of the results."""
+    if slowest > 0:
+        print(f"\nSlowest {min(slowest, len(runs))} of {len(runs)} folders:")
+        print(f"{'Seconds':>9}  {'Exit':>4}  Folder")
+        for run in sorted(runs, key=lambda r: r.seconds, reverse=True)[:slowest]:
+            print(f"{run.seconds:>9.1f}  {run.exit_code:>4}  {run.folder}")
+
+    failed = [run for run in runs if run.failed]
+    busy_seconds = sum(run.seconds for run in runs)
+    print(
+        f"\nRan {totals['tests']} tests in {len(runs)} folders in "
+        f"{wall_seconds:.1f} seconds ({busy_seconds:.1f} seconds of sessions): "
+        f"{totals['failures']} failures, {totals['errors']} errors, "
+        f"{totals['skipped']} skipped."
+    )
+    if failed:
+        print(f"{len(failed)} folders failed:")
+        for run in sorted(failed, key=lambda r: r.folder):
+            print(f"  {run.folder} (exit code {run.exit_code})")
+
 
 def main():
     """
     Finds all subfolders of the `python` folder that contain a `test` folder and
     assume the parent folder is testable.
-    Runs each testable folder as a separate PyTest session.
+    Runs each testable folder as a separate PyTest session, up to `--jobs` at a time.
     """
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--integ", action="store_true", help="When specified, run integration tests."
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The number of PyTest sessions to run at the same time. "
+        "Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--root", default="python", help="The folder to search for tests."
+    )
+    parser.add_argument(
+        "--junitxml",
+        help="When specified, write the merged JUnit XML report of all folders to "
+        "this file.",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        help="The number of slowest folders to list when the run completes.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="The maximum number of seconds that the tests of one folder can run.",
+    )
+    parser.add_argument(
+        "--no-folder-cache",
+        action="store_true",
+        help=f"Search for test folders instead of reusing the list cached in "
+        f"{FOLDER_CACHE} when no folder has changed.",
+    )
     args = parser.parse_args()
 
-    test_dirs = []
-    for root, dirs, files in os.walk("python"):
-        dirs[:] = [d for d in dirs if d not in IGNORE_FOLDERS]
-        if "test" in dirs:
-            test_dirs.append(root)
-
-    original_path = sys.path.copy()
+    test_dirs = load_test_dirs(
+        args.root, None if args.no_folder_cache else FOLDER_CACHE
+    )
+    test_kind = "integ" if args.integ else "not integ"
     root_dir = os.getcwd()
-    for test_dir in test_dirs:
-        test_path = os.path.join(root_dir, test_dir)
-        sys.path.append(test_path)
-        os.chdir(test_path)
-        test_kind = "integ" if args.integ else "not integ"
-        if platform.system() == "Windows":
-            os.system(f'py -m pytest -m "{test_kind}"')
-        else:
-            os.system(f'python -m pytest -m "{test_kind}"')
-        sys.path = original_path.copy()
+
+    start = time.perf_counter()
+    runs = []
+    with tempfile.TemporaryDirectory() as junit_dir:
+        with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+            futures = [
+                executor.submit(
+                    run_test_dir,
+                    os.path.join(root_dir, test_dir),
+                    test_kind,
+                    os.path.join(junit_dir, f"{index}.xml"),
+                    args.timeout,
+                )
+                for index, test_dir in enumerate(test_dirs)
+            ]
+            for future in as_completed(futures):
+                run = future.result()
+                run.folder = os.path.relpath(run.folder, root_dir)
+                runs.append(run)
+                print(f"===== {run.folder} (exit code {run.exit_code}) =====")
+                print(run.output, flush=True)
+        totals = merge_junit(runs, args.junitxml)
+
+    print_summary(runs, totals, args.slowest, time.perf_counter() - start)
+    sys.exit(1 if any(run.failed for run in runs) else 0)
 
 
 if __name__ == "__main__":
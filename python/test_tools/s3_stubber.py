@@ -312,6 +312,7 @@ class S3Stubber(ExampleStubber):
         prefix=None,
         delimiter=None,
         error_code=None,
+        e_tags=None,
     ):
         if not object_keys:
             object_keys = []
@@ -320,7 +321,10 @@ class S3Stubber(ExampleStubber):
             expected_params["Prefix"] = prefix
         if delimiter is not None:
             expected_params["Delimiter"] = delimiter
-        response = {"Contents": [{"Key": key} for key in object_keys]}
+        contents = [{"Key": key} for key in object_keys]
+        for content, e_tag in zip(contents, e_tags or []):
+            content["ETag"] = e_tag
+        response = {"Contents": contents}
         self._stub_bifurcator(
             "list_objects", expected_params, response, error_code=error_code
         )
@@ -331,6 +335,10 @@ class S3Stubber(ExampleStubber):
         object_keys=None,
         prefix=None,
         delimiter=None,
+        e_tags=None,
+        sizes=None,
+        continuation_token=None,
+        next_continuation_token=None,
         error_code=None,
     ):
         if not object_keys:
@@ -340,7 +348,17 @@ class S3Stubber(ExampleStubber):
             expected_params["Prefix"] = prefix
         if delimiter is not None:
             expected_params["Delimiter"] = delimiter
-        response = {"Contents": [{"Key": key} for key in object_keys]}
+        if continuation_token is not None:
+            expected_params["ContinuationToken"] = continuation_token
+        contents = [{"Key": key} for key in object_keys]
+        for content, e_tag in zip(contents, e_tags or []):
+            content["ETag"] = e_tag
+        for content, size in zip(contents, sizes or []):
+            content["Size"] = size
+        response = {"Contents": contents}
+        if next_continuation_token is not None:
+            response["IsTruncated"] = True
+            response["NextContinuationToken"] = next_continuation_token
         self._stub_bifurcator(
             "list_objects_v2", expected_params, response, error_code=error_code
         )
@@ -47,7 +47,7 @@ class SqsStubber(ExampleStubber):
         self._stub_bifurcator(
             "get_queue_attributes", expected_params, response, error_code=error_code
         )
-    
+
     def stub_get_queue_arn(self, url, arn, error_code=None):
         expected_params = {"AttributeNames": ["QueueArn"], "QueueUrl": url}
         response = {"Attributes": {"QueueArn": arn}}
@@ -94,7 +94,18 @@ class SqsStubber(ExampleStubber):
             "send_message", expected_params, response, error_code=error_code
         )
 
-    def stub_send_message_batch(self, url, messages, error_code=None):
+    def stub_send_message_batch(
+        self, url, messages, error_code=None, indexes=None, failed=None
+    ):
+        """
+        :param indexes: The indexes used as the entry Ids of the messages. Defaults
+                        to the position of each message in the list.
+        :param failed: A dict of message index to (error code, sender fault) for
+                       messages that fail to send.
+        """
+        failed = failed or {}
+        if indexes is None:
+            indexes = range(len(messages))
         expected_params = {
             "QueueUrl": url,
             "Entries": [
@@ -103,7 +114,7 @@ class SqsStubber(ExampleStubber):
                     "MessageBody": msg["body"],
                     "MessageAttributes": msg["attributes"],
                 }
-                for ind, msg in enumerate(messages)
+                for ind, msg in zip(indexes, messages)
             ],
         }
         response = {
@@ -113,9 +124,18 @@ class SqsStubber(ExampleStubber):
                     "MessageId": f"msg-{ind}",
                     "MD5OfMessageBody": "Test-MD5-Body",
                 }
-                for ind in range(0, len(messages))
+                for ind in indexes
+                if ind not in failed
+            ],
+            "Failed": [
+                {
+                    "Id": str(ind),
+                    "SenderFault": sender_fault,
+                    "Code": code,
+                    "Message": "Test error",
+                }
+                for ind, (code, sender_fault) in failed.items()
             ],
-            "Failed": [],
         }
         self._stub_bifurcator(
             "send_message_batch", expected_params, response, error_code=error_code
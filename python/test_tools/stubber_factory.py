@@ -6,70 +6,86 @@ A factory function that returns the stubber for an AWS service, based on the
 name of the service that is used by Boto 3.
 
 This factory is used by the make_stubber fixture found in the set of common fixtures.
+
+Stubber modules are imported the first time their service is requested, so a test
+session imports only the stubbers that its tests use.
 """
 
-from test_tools.acm_stubber import AcmStubber
-from test_tools.apigateway_stubber import ApiGatewayStubber
-from test_tools.apigatewaymanagementapi_stubber import ApiGatewayManagementApiStubber
-from test_tools.apigateway_v2_stubber import ApiGatewayV2Stubber
-from test_tools.auditmanager_stubber import AuditManagerStubber
-from test_tools.autoscaling_stubber import AutoScalingStubber
-from test_tools.bedrock_stubber import BedrockStubber
-from test_tools.bedrock_runtime_stubber import BedrockRuntimeStubber
-from test_tools.bedrock_agent_stubber import BedrockAgentStubber
-from test_tools.bedrock_agent_runtime_stubber import BedrockAgentRuntimeStubber
-from test_tools.cloudformation_stubber import CloudFormationStubber
-from test_tools.cloudfront_stubber import CloudFrontStubber
-from test_tools.cloudwatch_stubber import CloudWatchStubber
-from test_tools.cloudwatch_logs_stubber import CloudWatchLogsStubber
-from test_tools.cognito_idp_stubber import CognitoIdpStubber
-from test_tools.comprehend_stubber import ComprehendStubber
-from test_tools.config_stubber import ConfigStubber
-from test_tools.controltower_stubber import ControlTowerStubber
-from test_tools.controlcatalog_stubber import ControlCatalogStubber
-from test_tools.dynamodb_stubber import DynamoStubber
-from test_tools.ec2_stubber import Ec2Stubber
-from test_tools.ecr_stubber import EcrStubber
-from test_tools.elbv2_stubber import ELBv2Stubber
-from test_tools.emr_stubber import EmrStubber
-from test_tools.eventbridge_stubber import EventBridgeStubber
-from test_tools.glacier_stubber import GlacierStubber
-from test_tools.glue_stubber import GlueStubber
-from test_tools.iam_stubber import IamStubber
-from test_tools.iot_stubber import IoTStubber
-from test_tools.iot_sitewise_stubber import IoTSitewiseStubber
-from test_tools.healthlake_stubber import HealthLakeStubber
-from test_tools.keyspaces_stubber import KeyspacesStubber
-from test_tools.kinesis_stubber import KinesisStubber
-from test_tools.kinesis_analytics_v2_stubber import KinesisAnalyticsV2Stubber
-from test_tools.kms_stubber import KmsStubber
-from test_tools.lambda_stubber import LambdaStubber
-from test_tools.lookoutvision_stubber import LookoutVisionStubber
-from test_tools.organizations_stubber import OrganizationsStubber
-from test_tools.pinpoint_stubber import PinpointStubber
-from test_tools.pinpoint_email_stubber import PinpointEmailStubber
-from test_tools.pinpoint_sms_voice_stubber import PinpointSmsVoiceStubber
-from test_tools.polly_stubber import PollyStubber
-from test_tools.rdsdata_stubber import RdsDataStubber
-from test_tools.rds_stubber import RdsStubber
-from test_tools.rekognition_stubber import RekognitionStubber
-from test_tools.route53_stubber import Route53Stubber
-from test_tools.s3_stubber import S3Stubber
-from test_tools.s3control_stubber import S3ControlStubber
-from test_tools.secretsmanager_stubber import SecretsManagerStubber
-from test_tools.ses_stubber import SesStubber
-from test_tools.sns_stubber import SnsStubber
-from test_tools.sqs_stubber import SqsStubber
-from test_tools.ssm_stubber import SsmStubber
-from test_tools.stepfunctions_stubber import StepFunctionsStubber
-from test_tools.sts_stubber import StsStubber
-from test_tools.support_stubber import SupportStubber
-from test_tools.textract_stubber import TextractStubber
-from test_tools.transcribe_stubber import TranscribeStubber
-from test_tools.medical_imaging_stubber import MedicalImagingStubber
-from test_tools.redshift_stubber import RedshiftStubber
-from test_tools.redshift_data_stubber import RedshiftDataStubber
-from test_tools.scheduler_stubber import SchedulerStubber
+import importlib
+
+# Maps the Boto 3 service name to the test_tools module and class of its stubber.
+STUBBERS = {
+    "acm": ("acm_stubber", "AcmStubber"),
+    "apigateway": ("apigateway_stubber", "ApiGatewayStubber"),
+    "apigatewaymanagementapi": (
+        "apigatewaymanagementapi_stubber",
+        "ApiGatewayManagementApiStubber",
+    ),
+    "apigatewayv2": ("apigateway_v2_stubber", "ApiGatewayV2Stubber"),
+    "auditmanager": ("auditmanager_stubber", "AuditManagerStubber"),
+    "autoscaling": ("autoscaling_stubber", "AutoScalingStubber"),
+    "bedrock": ("bedrock_stubber", "BedrockStubber"),
+    "bedrock-runtime": ("bedrock_runtime_stubber", "BedrockRuntimeStubber"),
+    "bedrock-agent": ("bedrock_agent_stubber", "BedrockAgentStubber"),
+    "bedrock-agent-runtime": (
+        "bedrock_agent_runtime_stubber",
+        "BedrockAgentRuntimeStubber",
+    ),
+    "cloudformation": ("cloudformation_stubber", "CloudFormationStubber"),
+    "cloudfront": ("cloudfront_stubber", "CloudFrontStubber"),
+    "cloudwatch": ("cloudwatch_stubber", "CloudWatchStubber"),
+    "logs": ("cloudwatch_logs_stubber", "CloudWatchLogsStubber"),
+    "cognito-idp": ("cognito_idp_stubber", "CognitoIdpStubber"),
+    "comprehend": ("comprehend_stubber", "ComprehendStubber"),
+    "config": ("config_stubber", "ConfigStubber"),
+    "controltower": ("controltower_stubber", "ControlTowerStubber"),
+    "controlcatalog": ("controlcatalog_stubber", "ControlCatalogStubber"),
+    "dynamodb": ("dynamodb_stubber", "DynamoStubber"),
+    "ec2": ("ec2_stubber", "Ec2Stubber"),
+    "ecr": ("ecr_stubber", "EcrStubber"),
+    "elbv2": ("elbv2_stubber", "ELBv2Stubber"),
+    "emr": ("emr_stubber", "EmrStubber"),
+    "events": ("eventbridge_stubber", "EventBridgeStubber"),
+    "glacier": ("glacier_stubber", "GlacierStubber"),
+    "glue": ("glue_stubber", "GlueStubber"),
+    "iam": ("iam_stubber", "IamStubber"),
+    "iot": ("iot_stubber", "IoTStubber"),
+    "iotsitewise": ("iot_sitewise_stubber", "IoTSitewiseStubber"),
+    "healthlake": ("healthlake_stubber", "HealthLakeStubber"),
+    "keyspaces": ("keyspaces_stubber", "KeyspacesStubber"),
+    "kinesis": ("kinesis_stubber", "KinesisStubber"),
+    "kinesisanalyticsv2": ("kinesis_analytics_v2_stubber", "KinesisAnalyticsV2Stubber"),
+    "kms": ("kms_stubber", "KmsStubber"),
+    "lambda": ("lambda_stubber", "LambdaStubber"),
+    "lookoutvision": ("lookoutvision_stubber", "LookoutVisionStubber"),
+    "medical-imaging": ("medical_imaging_stubber", "MedicalImagingStubber"),
+    "organizations": ("organizations_stubber", "OrganizationsStubber"),
+    "pinpoint": ("pinpoint_stubber", "PinpointStubber"),
+    "pinpoint-email": ("pinpoint_email_stubber", "PinpointEmailStubber"),
+    "pinpoint-sms-voice": ("pinpoint_sms_voice_stubber", "PinpointSmsVoiceStubber"),
+    "polly": ("polly_stubber", "PollyStubber"),
+    "rds": ("rds_stubber", "RdsStubber"),
+    "rds-data": ("rdsdata_stubber", "RdsDataStubber"),
+    "redshift": ("redshift_stubber", "RedshiftStubber"),
+    "redshift-data": ("redshift_data_stubber", "RedshiftDataStubber"),
+    "rekognition": ("rekognition_stubber", "RekognitionStubber"),
+    "route53": ("route53_stubber", "Route53Stubber"),
+    "s3": ("s3_stubber", "S3Stubber"),
+    "s3control": ("s3control_stubber", "S3ControlStubber"),
+    "scheduler": ("scheduler_stubber", "SchedulerStubber"),
+    "secretsmanager": ("secretsmanager_stubber", "SecretsManagerStubber"),
+    "ses": ("ses_stubber", "SesStubber"),
+    "sns": ("sns_stubber", "SnsStubber"),
+    "sqs": ("sqs_stubber", "SqsStubber"),
+    "ssm": ("ssm_stubber", "SsmStubber"),
+    "stepfunctions": ("stepfunctions_stubber", "StepFunctionsStubber"),
+    "sts": ("sts_stubber", "StsStubber"),
+    "support": ("support_stubber", "SupportStubber"),
+    "textract": ("textract_stubber", "TextractStubber"),
+    "transcribe": ("transcribe_stubber", "TranscribeStubber"),
+}
+
+_stubber_classes = {}
 
 
 class StubberFactoryNotImplemented(Exception):
@@ -77,140 +93,22 @@ class StubberFactoryNotImplemented(Exception):
 
 
 def stubber_factory(service_name):
-    if service_name == "acm":
-        return AcmStubber
-    elif service_name == "apigateway":
-        return ApiGatewayStubber
-    elif service_name == "apigatewaymanagementapi":
-        return ApiGatewayManagementApiStubber
-    elif service_name == "apigatewayv2":
-        return ApiGatewayV2Stubber
-    elif service_name == "auditmanager":
-        return AuditManagerStubber
-    elif service_name == "autoscaling":
-        return AutoScalingStubber
-    elif service_name == "bedrock":
-        return BedrockStubber
-    elif service_name == "bedrock-runtime":
-        return BedrockRuntimeStubber
-    elif service_name == "bedrock-agent":
-        return BedrockAgentStubber
-    elif service_name == "bedrock-agent-runtime":
-        return BedrockAgentRuntimeStubber
-    elif service_name == "cloudformation":
-        return CloudFormationStubber
-    elif service_name == "cloudfront":
-        return CloudFrontStubber
-    elif service_name == "cloudwatch":
-        return CloudWatchStubber
-    elif service_name == "logs":
-        return CloudWatchLogsStubber
-    elif service_name == "cognito-idp":
-        return CognitoIdpStubber
-    elif service_name == "comprehend":
-        return ComprehendStubber
-    elif service_name == "config":
-        return ConfigStubber
-    elif service_name == "controltower":
-        return ControlTowerStubber
-    elif service_name == "controlcatalog":
-        return ControlCatalogStubber
-    elif service_name == "dynamodb":
-        return DynamoStubber
-    elif service_name == "ec2":
-        return Ec2Stubber
-    elif service_name == "ecr":
-        return EcrStubber
-    elif service_name == "config":
-        return ConfigStubber
-    elif service_name == "dynamodb":
-        return DynamoStubber
-    elif service_name == "ec2":
-        return Ec2Stubber
-    elif service_name == "ecr":
-        return EcrStubber
-    elif service_name == "elbv2":
-        return ELBv2Stubber
-    elif service_name == "emr":
-        return EmrStubber
-    elif service_name == "events":
-        return EventBridgeStubber
-    elif service_name == "glacier":
-        return GlacierStubber
-    elif service_name == "glue":
-        return GlueStubber
-    elif service_name == "iam":
-        return IamStubber
-    elif service_name == "iot":
-        return IoTStubber
-    elif service_name == "iotsitewise":
-        return IoTSitewiseStubber
-    elif service_name == "healthlake":
-        return HealthLakeStubber
-    elif service_name == "keyspaces":
-        return KeyspacesStubber
-    elif service_name == "kinesis":
-        return KinesisStubber
-    elif service_name == "kinesisanalyticsv2":
-        return KinesisAnalyticsV2Stubber
-    elif service_name == "kms":
-        return KmsStubber
-    elif service_name == "lambda":
-        return LambdaStubber
-    elif service_name == "lookoutvision":
-        return LookoutVisionStubber
-    elif service_name == "medical-imaging":
-        return MedicalImagingStubber
-    elif service_name == "organizations":
-        return OrganizationsStubber
-    elif service_name == "pinpoint":
-        return PinpointStubber
-    elif service_name == "pinpoint-email":
-        return PinpointEmailStubber
-    elif service_name == "pinpoint-sms-voice":
-        return PinpointSmsVoiceStubber
-    elif service_name == "polly":
-        return PollyStubber
-    elif service_name == "rds":
-        return RdsStubber
-    elif service_name == "rds-data":
-        return RdsDataStubber
-    elif service_name == "redshift":
-        return RedshiftStubber
-    elif service_name == "redshift-data":
-        return RedshiftDataStubber
-    elif service_name == "rekognition":
-        return RekognitionStubber
-    elif service_name == "route53":
-        return Route53Stubber
-    elif service_name == "s3":
-        return S3Stubber
-    elif service_name == "s3control":
-        return S3ControlStubber
-    elif service_name == "scheduler":
-        return SchedulerStubber
-    elif service_name == "secretsmanager":
-        return SecretsManagerStubber
-    elif service_name == "ses":
-        return SesStubber
-    elif service_name == "sns":
-        return SnsStubber
-    elif service_name == "sqs":
-        return SqsStubber
-    elif service_name == "ssm":
-        return SsmStubber
-    elif service_name == "stepfunctions":
-        return StepFunctionsStubber
-    elif service_name == "sts":
-        return StsStubber
-    elif service_name == "support":
-        return SupportStubber
-    elif service_name == "textract":
-        return TextractStubber
-    elif service_name == "transcribe":
-        return TranscribeStubber
-    else:
-        raise StubberFactoryNotImplemented(
-            "If you see this exception, it probably means that you forgot to add "
-            "a new stubber to stubber_factory.py."
-        )
+    """
+    Gets the stubber class for a service, importing its module on first use.
+
+    :param service_name: The Boto 3 name of the service, such as 'dynamodb'.
+    :return: The stubber class for the service.
+    """
+    stubber_class = _stubber_classes.get(service_name)
+    if stubber_class is None:
+        try:
+            module_name, class_name = STUBBERS[service_name]
+        except KeyError:
+            raise StubberFactoryNotImplemented(
+                "If you see this exception, it probably means that you forgot to add "
+                "a new stubber to STUBBERS in stubber_factory.py."
+            )
+        module = importlib.import_module(f"test_tools.{module_name}")
+        stubber_class = getattr(module, class_name)
+        _stubber_classes[service_name] = stubber_class
+    return stubber_class
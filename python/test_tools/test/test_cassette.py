@@ -0,0 +1,160 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for cassette.py. Calls are recorded from clients that are stubbed by a
+Stubber, and then replayed to clients of a fresh session.
+"""
+
+import datetime
+import io
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, StubAssertionError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from test_tools import cassette
+
+BUCKET = "test-bucket"
+MODIFIED = datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=datetime.timezone.utc)
+
+
+def make_session():
+    return boto3.Session(
+        aws_access_key_id="test-key",
+        aws_secret_access_key="test-secret",
+        region_name="us-east-1",
+    )
+
+
+def run_scenario(session):
+    """Makes calls with two S3 clients, the way a scenario with helpers might."""
+    writer = session.client("s3")
+    reader = session.client("s3")
+    writer.put_object(Bucket=BUCKET, Key="greeting", Body=b"\x00hello")
+    listed = reader.list_objects_v2(Bucket=BUCKET)
+    body = reader.get_object(Bucket=BUCKET, Key="greeting")["Body"].read()
+    with pytest.raises(ClientError) as exc_info:
+        writer.get_object(Bucket=BUCKET, Key="missing")
+    return listed["Contents"], body, exc_info.value.response
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Records the scenario from a stubbed session and returns the cassette path."""
+    path = tmp_path / "scenario.json.gz"
+    session = make_session()
+    stubbers = []
+
+    def stub_client(client):
+        stubber = Stubber(client)
+        stubbers.append(stubber)
+        if len(stubbers) == 1:
+            stubber.add_response(
+                "put_object",
+                {"ETag": '"etag"'},
+                {"Bucket": BUCKET, "Key": "greeting", "Body": b"\x00hello"},
+            )
+            stubber.add_client_error(
+                "get_object",
+                service_error_code="NoSuchKey",
+                service_message="The key does not exist.",
+                http_status_code=404,
+            )
+        else:
+            stubber.add_response(
+                "list_objects_v2",
+                {
+                    "Contents": [
+                        {"Key": "greeting", "LastModified": MODIFIED, "Size": 6}
+                    ]
+                },
+            )
+            stubber.add_response(
+                "get_object",
+                {
+                    "Body": StreamingBody(io.BytesIO(b"\x00hello"), 6),
+                    "ContentLength": 6,
+                },
+            )
+        stubber.activate()
+
+    class StubbedClient:
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            stub_client(self)
+
+    session.events.register(
+        "creating-client-class",
+        lambda base_classes, **kwargs: base_classes.insert(0, StubbedClient),
+    )
+
+    with cassette.recording(path, session=session) as recorder:
+        contents, body, error = run_scenario(session)
+
+    assert [call["operation"] for call in recorder.interactions] == [
+        "PutObject",
+        "ListObjectsV2",
+        "GetObject",
+        "GetObject",
+    ]
+    assert body == b"\x00hello"
+    for stubber in stubbers:
+        stubber.assert_no_pending_responses()
+    return path
+
+
+def test_replay(recorded):
+    session = make_session()
+
+    with cassette.replaying(recorded, session=session) as stubbers:
+        contents, body, error = run_scenario(session)
+
+    assert len(stubbers["s3"]) == 2
+    assert contents == [{"Key": "greeting", "LastModified": MODIFIED, "Size": 6}]
+    assert body == b"\x00hello"
+    assert error["Error"]["Code"] == "NoSuchKey"
+    assert error["ResponseMetadata"]["HTTPStatusCode"] == 404
+
+
+def test_replay_checks_params(recorded):
+    session = make_session()
+
+    with pytest.raises(StubAssertionError):
+        with cassette.replaying(recorded, session=session):
+            session.client("s3").put_object(Bucket=BUCKET, Key="other", Body=b"")
+
+
+def test_replay_without_matching_params(recorded):
+    session = make_session()
+
+    with cassette.replaying(recorded, session=session, match_params=False):
+        client = session.client("s3")
+        client.put_object(Bucket=BUCKET, Key="other", Body=b"")
+        client.list_objects_v2(Bucket=BUCKET)
+        client.get_object(Bucket=BUCKET, Key="other")
+        with pytest.raises(ClientError):
+            client.get_object(Bucket=BUCKET, Key="other")
+
+
+def test_replay_asserts_every_response_is_used(recorded):
+    session = make_session()
+
+    with pytest.raises(AssertionError):
+        with cassette.replaying(recorded, session=session):
+            session.client("s3").put_object(
+                Bucket=BUCKET, Key="greeting", Body=b"\x00hello"
+            )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"When": MODIFIED, "Data": b"\xff\x00", "Items": [1, "two", None, True]},
+        [{"Nested": [MODIFIED]}],
+    ],
+)
+def test_encode_decode(value):
+    assert cassette.decode(cassette.encode(value)) == value
@@ -74,9 +74,23 @@ class TextractStubber(ExampleStubber):
             error_code=error_code,
         )
 
-    def stub_get_document_text_detection(self, job_id, status, error_code=None):
+    def stub_get_document_text_detection(
+        self,
+        job_id,
+        status,
+        error_code=None,
+        blocks=None,
+        next_token=None,
+        response_next_token=None,
+    ):
         expected_params = {"JobId": job_id}
+        if next_token is not None:
+            expected_params["NextToken"] = next_token
         response = {"JobStatus": status}
+        if blocks is not None:
+            response["Blocks"] = blocks
+        if response_next_token is not None:
+            response["NextToken"] = response_next_token
         self._stub_bifurcator(
             "get_document_text_detection",
             expected_params,
@@ -108,9 +122,23 @@ class TextractStubber(ExampleStubber):
             "start_document_analysis", expected_params, response, error_code=error_code
         )
 
-    def stub_get_document_analysis(self, job_id, status, error_code=None):
+    def stub_get_document_analysis(
+        self,
+        job_id,
+        status,
+        error_code=None,
+        blocks=None,
+        next_token=None,
+        response_next_token=None,
+    ):
         expected_params = {"JobId": job_id}
+        if next_token is not None:
+            expected_params["NextToken"] = next_token
         response = {"JobStatus": status}
+        if blocks is not None:
+            response["Blocks"] = blocks
+        if response_next_token is not None:
+            response["NextToken"] = response_next_token
         self._stub_bifurcator(
             "get_document_analysis", expected_params, response, error_code=error_code
         )
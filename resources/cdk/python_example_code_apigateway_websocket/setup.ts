@@ -50,6 +50,7 @@ export class SetupStack extends cdk.Stack {
         effect: Effect.ALLOW,
         resources: [table.tableArn],
         actions: [
+          "dynamodb:BatchWriteItem",
           "dynamodb:DeleteItem",
           "dynamodb:GetItem",
           "dynamodb:PutItem",